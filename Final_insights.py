@@ -1,6 +1,13 @@
 import pandas as pd
+import numpy as np
+import argparse
+import json
 import os
 
+from data_registry import file_signature, load_dataset, store_aware, store_file
+from movement_stream import read_log_blocks, watermark_matches
+from zone_stats import get_zone_stats
+
 # Define file paths
 DATA_DIR = "data"
 INSIGHTS_DIR = "insights"
@@ -9,46 +16,172 @@ STORE_LAYOUT_PATH = os.path.join(DATA_DIR, "store_layout.csv")
 MOVEMENTS_PATH = os.path.join(DATA_DIR, "movements.csv")
 ONLINE_PERFORMANCE_PATH = os.path.join(DATA_DIR, "online_product_performance.csv")
 FINAL_INSIGHTS_FILE_PATH = os.path.join(INSIGHTS_DIR, "final_product_insights.csv")
-
-# Ensure directories exist
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(INSIGHTS_DIR, exist_ok=True)
-
-def _load_df(file_path):
-    """Helper to load CSV, returning empty DataFrame if file is missing or empty."""
-    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-        print(f"Warning: {file_path} not found or is empty.")
-        return pd.DataFrame()
+# Watermark for incremental runs: byte offset into movements.csv (with the file's inode
+# and a checksum of the bytes before it) plus per-zone visit counters
+INCREMENTAL_STATE_PATH = os.path.join(INSIGHTS_DIR, "final_insights_state.json")
+
+def _categorize_zones(visits):
+    """Label zones Hot/Cold against the mean visit count ('Unknown' without movement data)."""
+    if visits.empty or visits.sum() <= 0:
+        return pd.Series('Unknown', index=visits.index)
+    threshold = visits.mean() # Using mean as a simple threshold
+    print(f"DEBUG: Zone categories calculated with threshold (mean visits): {threshold}")
+    return pd.Series(np.where(visits >= threshold, 'Hot', 'Cold'), index=visits.index)
+
+
+def _load_state():
+    path = store_file(INCREMENTAL_STATE_PATH)
+    if not os.path.exists(path):
+        return None
     try:
-        return pd.read_csv(file_path)
-    except pd.errors.EmptyDataError:
-        print(f"Warning: {file_path} is an empty CSV file.")
-        return pd.DataFrame()
+        with open(path, 'r') as f:
+            return json.load(f)
     except Exception as e:
-        print(f"Error loading {file_path}: {e}")
-        return pd.DataFrame()
+        print(f"Warning: {path} unreadable ({e}). Falling back to a full rebuild.")
+        return None
+
+
+def _save_state(state):
+    path = store_file(INCREMENTAL_STATE_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def _input_signatures():
+    sigs = {}
+    for path in (STORE_LAYOUT_PATH, ONLINE_PERFORMANCE_PATH):
+        sig = file_signature(path)
+        sigs[path] = list(sig) if sig else None
+    return sigs
+
+
+def _read_new_movements(path, offset, limit):
+    """Count zone visits in complete rows appended to the movement CSV between ``offset`` and ``limit``.
+
+    Returns ``(zone_counts, rows, read)``; ``read`` holds the header and the
+    watermark reached. A trailing partial line is left for the next run.
+    """
+    read = {}
+    zone_counts = pd.Series(dtype='int64')
+    rows = 0
+    for chunk in read_log_blocks(path, limit, read, offset=offset):
+        if 'Zone' not in chunk.columns:
+            continue
+        zone_counts = zone_counts.add(chunk['Zone'].dropna().astype(str).value_counts(), fill_value=0)
+        rows += len(chunk)
+    return zone_counts.astype(int), rows, read
 
-def generate_final_insights():
+
+def _watermark(read):
+    return {k: read[k] for k in ('offset', 'inode', 'tail_sha256')}
+
+
+def _save_full_state(zone_visits, read):
+    """Save the watermark of the log bytes the full build counted (``read``)."""
+    if not read:
+        return
+    _save_state({
+        'movements_path': read['path'],
+        'header': read['header'],
+        **_watermark(read),
+        'inputs': _input_signatures(),
+        'zone_visits': {str(z): int(v) for z, v in zone_visits.items()},
+    })
+
+
+def update_final_insights_incremental():
+    """Fold movement rows appended since the last run into final_product_insights.csv.
+
+    Only rows whose zone visit count or Hot/Cold category changed are updated, so
+    relocation columns written by other steps are preserved. Returns False when
+    a full rebuild is needed instead (no watermark, rewritten log, changed layout).
+    """
+    state = _load_state()
+    sig = file_signature(MOVEMENTS_PATH)
+    final_df = load_dataset(FINAL_INSIGHTS_FILE_PATH)
+    if state is None or sig is None or final_df.empty:
+        return False
+    resolved, _, size = sig
+    if state.get('movements_path') != resolved or not watermark_matches(resolved, state):
+        print("DEBUG: movements.csv was replaced, rewritten or truncated; incremental watermark invalid.")
+        return False
+    if state.get('inputs') != _input_signatures():
+        print("DEBUG: store layout or online performance changed; incremental update not possible.")
+        return False
+
+    new_counts, new_rows, read = _read_new_movements(resolved, state['offset'], size)
+    if read['header'] != state.get('header'):
+        print("DEBUG: movements.csv header changed; incremental watermark invalid.")
+        return False
+    state.update(_watermark(read))
+    if not new_rows:
+        print("No new movement rows since the last run. Final insights are up to date.")
+        # Touched so mtime-based consumers (the pipeline) see it refreshed
+        os.utime(store_file(FINAL_INSIGHTS_FILE_PATH))
+        _save_state(state)
+        return True
+
+    zone_visits = pd.Series(state['zone_visits'], dtype='int64')
+    zone_visits = zone_visits.add(new_counts, fill_value=0).astype(int)
+
+    # Re-derive categories over the layout's zones, as in the full build
+    layout_zones = pd.Index(final_df['Zone'].astype(str).unique())
+    layout_visits = zone_visits.reindex(layout_zones, fill_value=0)
+    categories = _categorize_zones(layout_visits)
+
+    new_visits = final_df['Zone'].astype(str).map(layout_visits).fillna(0).astype(int)
+    new_category = final_df['Zone'].astype(str).map(categories).fillna('Unknown')
+    affected = (new_visits != final_df['Visits']) | (new_category != final_df['Zone_Category'])
+
+    if affected.any():
+        final_df = final_df.copy()
+        final_df.loc[affected, 'Visits'] = new_visits[affected]
+        final_df.loc[affected, 'Zone_Category'] = new_category[affected]
+        final_df.to_csv(store_file(FINAL_INSIGHTS_FILE_PATH), index=False)
+    else:
+        os.utime(store_file(FINAL_INSIGHTS_FILE_PATH))
+
+    state['zone_visits'] = {str(z): int(v) for z, v in zone_visits.items()}
+    _save_state(state)
+    print(
+        f"Folded {new_rows} new movement rows; updated {int(affected.sum())} of "
+        f"{len(final_df)} rows in {FINAL_INSIGHTS_FILE_PATH}"
+    )
+    return True
+
+
+@store_aware
+def generate_final_insights(incremental=False):
+    """Build final_product_insights.csv.
+
+    With ``incremental=True`` only movement rows appended since the previous run
+    are processed; the full rebuild is used when no valid watermark exists.
+    ``store_id`` selects the store (see ``data_registry.store_scope``).
+    """
+    if incremental and update_final_insights_incremental():
+        return
     print("Generating final product insights...")
 
     # Load data
-    store_layout_df = _load_df(STORE_LAYOUT_PATH)
-    movements_df = _load_df(MOVEMENTS_PATH)
-    online_performance_df = _load_df(ONLINE_PERFORMANCE_PATH)
+    store_layout_df = load_dataset(STORE_LAYOUT_PATH)
+    zone_stats = get_zone_stats()
+    footfall = zone_stats['Footfall']
+    online_performance_df = load_dataset(ONLINE_PERFORMANCE_PATH)
 
     if store_layout_df.empty:
         print("Error: store_layout.csv is empty or missing. Cannot generate insights.")
         return
-    if movements_df.empty:
+    if footfall.sum() == 0:
         print("Warning: movements.csv is empty or missing. Zone categories and visits might be inaccurate.")
     if online_performance_df.empty:
         print("Warning: online_product_performance.csv is empty or missing. Online views will be N/A.")
 
     # 1. Calculate Zone Visits and Category
-    if not movements_df.empty:
-        zone_visits = movements_df.groupby('Zone').size().reset_index(name='Visits')
-    else:
-        zone_visits = pd.DataFrame(columns=['Zone', 'Visits']) # Empty if no movements
+    # Footfall per zone comes from the shared zone stats table
+    zone_visits = footfall[footfall > 0].rename('Visits').reset_index()
 
     # Determine Zone Category based on visits (simple threshold)
     # Get all unique zones from store_layout to ensure all zones are covered
@@ -58,13 +191,8 @@ def generate_final_insights():
 
     # Define 'Hot' and 'Cold' zones - adjust threshold as needed for your data
     # Calculate median or average visits to set a dynamic threshold
-    if not zone_data.empty and zone_data['Visits'].sum() > 0:
-        threshold = zone_data['Visits'].mean() # Using mean as a simple threshold
-        zone_data['Zone_Category'] = zone_data['Visits'].apply(lambda x: 'Hot' if x >= threshold else 'Cold')
-        print(f"DEBUG: Zone categories calculated with threshold (mean visits): {threshold}")
-        print(zone_data[['Zone', 'Visits', 'Zone_Category']].head()) # Debugging
-    else:
-        zone_data['Zone_Category'] = 'Unknown' # Default if no movement data
+    zone_data['Zone_Category'] = _categorize_zones(zone_data['Visits'])
+    print(zone_data[['Zone', 'Visits', 'Zone_Category']].head()) # Debugging
 
     # 2. Merge all data
     # Merge store layout with online performance first
@@ -91,10 +219,20 @@ def generate_final_insights():
         final_insights_df['Old_Product_Name'] = ''
 
     # Save the final insights
-    final_insights_df.to_csv(FINAL_INSIGHTS_FILE_PATH, index=False)
+    os.makedirs(store_file(INSIGHTS_DIR), exist_ok=True)
+    final_insights_df.to_csv(store_file(FINAL_INSIGHTS_FILE_PATH), index=False)
     print(f"Final product insights saved to {FINAL_INSIGHTS_FILE_PATH}")
     print(f"DEBUG: Columns in final_product_insights.csv: {final_insights_df.columns.tolist()}") # Debugging
     print(f"DEBUG: Head of final_product_insights.csv:\n{final_insights_df.head()}") # Debugging
 
+    # Record the watermark of the bytes the footfall was counted over, so the next
+    # incremental run reads exactly the rows appended after them
+    _save_full_state(footfall[footfall > 0], zone_stats.attrs.get('movements_read'))
+
 if __name__ == "__main__":
-    generate_final_insights()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate final product insights.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fold movement rows appended since the last run")
+    parser.add_argument("--store", help="store ID under stores/ (default: the working directory)")
+    args = parser.parse_args()
+    generate_final_insights(incremental=args.incremental, store_id=args.store)
\ No newline at end of file
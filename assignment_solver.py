@@ -0,0 +1,71 @@
+"""Capacity-constrained product-to-zone assignment.
+
+The relocation planners score every (product, zone) pair and need the plan that
+maximizes total benefit while respecting zone capacity, one move per product and
+pairs ruled out by business rules. That is a bipartite transportation problem;
+its constraint matrix is totally unimodular, so the LP relaxation solved with the
+HiGHS dual simplex returns an integral, globally optimal assignment.
+"""
+import numpy as np
+
+
+def solve_assignment(benefit, capacity, allowed=None) -> np.ndarray:
+    """Assign rows (products) to columns (zones) maximizing the summed benefit.
+
+    Args:
+        benefit: ``(n_products, n_zones)`` array of gains; pairs with benefit <= 0
+            are never chosen because staying put is worth 0.
+        capacity: ``(n_zones,)`` maximum number of products each zone can receive.
+        allowed: optional boolean mask of the same shape as ``benefit``; False
+            pairs (current zone, incompatible category, recently moved) are excluded.
+
+    Returns:
+        ``(n_products,)`` array with the chosen zone index per product, or -1.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+    benefit = np.asarray(benefit, dtype=float)
+    capacity = np.asarray(capacity, dtype=float)
+    n_rows, n_cols = benefit.shape
+    result = np.full(n_rows, -1, dtype=int)
+
+    mask = benefit > 0
+    if allowed is not None:
+        mask &= np.asarray(allowed, dtype=bool)
+    mask[:, capacity <= 0] = False
+    rows, cols = np.nonzero(mask)
+    if rows.size == 0:
+        return result
+
+    # One variable per candidate pair; row constraints cap each product at one
+    # zone, column constraints cap each zone at its capacity.
+    n_vars = rows.size
+    var_idx = np.arange(n_vars)
+    a_ub = coo_matrix(
+        (np.ones(2 * n_vars), (np.concatenate([rows, n_rows + cols]), np.concatenate([var_idx, var_idx]))),
+        shape=(n_rows + n_cols, n_vars),
+    ).tocsc()
+    b_ub = np.concatenate([np.ones(n_rows), capacity])
+
+    res = linprog(-benefit[rows, cols], A_ub=a_ub, b_ub=b_ub, bounds=(0, 1), method="highs-ds")
+    if res.status != 0 or res.x is None:
+        print(f"Warning: assignment LP failed ({res.message}); falling back to greedy assignment.")
+        return _greedy_assignment(benefit, capacity, mask)
+
+    chosen = res.x > 0.5
+    result[rows[chosen]] = cols[chosen]
+    return result
+
+
+def _greedy_assignment(benefit, capacity, mask) -> np.ndarray:
+    """Best-pair-first fallback used only if the LP solver reports a failure."""
+    result = np.full(benefit.shape[0], -1, dtype=int)
+    remaining = capacity.copy()
+    rows, cols = np.nonzero(mask)
+    for i in np.argsort(-benefit[rows, cols], kind="stable"):
+        r, c = rows[i], cols[i]
+        if result[r] == -1 and remaining[c] > 0:
+            result[r] = c
+            remaining[c] -= 1
+    return result
@@ -0,0 +1,256 @@
+"""Scaling benchmarks for the core HeatSight pipelines.
+
+For every requested scale a synthetic store is generated in a temporary
+folder (see ``synthetic_store``) and each pipeline runs there: once cold,
+``repeat`` more times warm (served from the in-memory caches), ``repeat`` times
+with those caches cleared first (``recompute``) and once under ``tracemalloc``
+for its peak Python memory. The results are written as a JSON report. Pass
+``--baseline`` with an earlier report to flag pipelines whose recompute (or,
+for older reports, cold) time got slower; warm runs only time cache lookups.
+
+    python benchmark_suite.py --preset small medium
+    python benchmark_suite.py --rows 40 --cols 40 --products 5000 --customers 20000 --days 7
+"""
+import argparse
+import json
+import os
+import platform
+import runpy
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from synthetic_store import generate_synthetic_store
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_REPORT_PATH = os.path.join("insights", "benchmark_report.json")
+REGRESSION_THRESHOLD = 1.25
+# Ignore slowdowns smaller than this; millisecond timings are mostly noise
+REGRESSION_MIN_DELTA_S = 0.01
+
+# In-memory caches cleared before every recompute run; files saved next to the
+# data (traffic cube, journey index, Parquet copies) stay, as between sessions
+MODULE_CACHES = [
+    ("conversion_engine", "_CACHE"),
+    ("customer_path_analysis", "_PATH_COUNTS"),
+    ("heatmap_renderer", "_PNG_CACHE"),
+    ("journey_index", "_INDEX"),
+    ("movement_stream", "_CACHE"),
+    ("product_index", "_INDEXES"),
+    ("relocation_intelligence", "_SCORER"),
+    ("traffic_cube", "_CUBE"),
+    ("zone_stats", "_PARTIALS"),
+]
+
+PRESETS = {
+    "small": {"rows": 10, "cols": 10, "n_products": 100, "n_customers": 200, "days": 1},
+    "medium": {"rows": 20, "cols": 20, "n_products": 1000, "n_customers": 2000, "days": 3},
+    "large": {"rows": 40, "cols": 40, "n_products": 5000, "n_customers": 20000, "days": 7},
+}
+
+
+def _cases():
+    """``(name, callable)`` pairs, imported lazily so module-level setup runs in the bench folder."""
+    import matplotlib.pyplot as plt
+
+    from Final_insights import generate_final_insights
+    from relocation_intelligence import generate_relocation_scores
+    from layout_optimizer import optimize_store_layout
+    from dynamic_zone_assignment import assign_recommended_zones
+    from simulation_engine import run_what_if_batch, run_what_if_placement
+    from pos_heatmap import generate_pos_sales_heatmap
+    from data_registry import load_dataset
+    import heatsight_tools as tools
+
+    def what_if():
+        layout = load_dataset(os.path.join("data", "store_layout.csv"))
+        return run_what_if_placement(layout["Product_Name"].iloc[0], layout["Zone"].iloc[-1])
+
+    def zone_heatmap():
+        runpy.run_path(os.path.join(REPO_DIR, "heatmap", "zone_heatmap.py"), run_name="__main__")
+        plt.close("all")
+
+    def pos_heatmap():
+        generate_pos_sales_heatmap()
+        plt.close("all")
+
+    return [
+        ("generate_final_insights", generate_final_insights),
+        ("generate_relocation_scores", generate_relocation_scores),
+        ("optimize_store_layout", optimize_store_layout),
+        ("assign_recommended_zones", assign_recommended_zones),
+        ("run_what_if_placement", what_if),
+        ("run_what_if_batch", run_what_if_batch),
+        ("pos_sales_heatmap", pos_heatmap),
+        ("zone_heatmap", zone_heatmap),
+        ("tool.get_dwell_time_by_zone", tools.get_dwell_time_by_zone.func),
+        ("tool.get_conversion_rate_by_zone", tools.get_conversion_rate_by_zone.func),
+        ("tool.get_customer_journey_patterns", tools.get_customer_journey_patterns.func),
+        ("tool.get_top_footfall_zones", tools.get_top_footfall_zones.func),
+        ("tool.get_products_to_relocate", tools.get_products_to_relocate.func),
+        ("tool.analyze_restock_needs", tools.analyze_restock_needs.func),
+    ]
+
+
+def _time_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def clear_module_caches():
+    """Drop the data registry and every loaded module cache in ``MODULE_CACHES``."""
+    from data_registry import invalidate
+
+    invalidate()
+    for module, attr in MODULE_CACHES:
+        cache = getattr(sys.modules.get(module), attr, None)
+        if cache is not None:
+            cache.clear()
+
+
+def _time_recompute(func):
+    clear_module_caches()
+    return _time_call(func)
+
+
+def _peak_memory(func):
+    # Measured on a recompute; warm cache hits would allocate next to nothing
+    clear_module_caches()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(name, func, repeat):
+    result = {"name": name}
+    try:
+        result["cold_s"] = _time_call(func)
+        warm = [_time_call(func) for _ in range(repeat)]
+        result["warm_median_s"] = statistics.median(warm) if warm else None
+        result["warm_min_s"] = min(warm) if warm else None
+        recompute = [_time_recompute(func) for _ in range(repeat)]
+        result["recompute_median_s"] = statistics.median(recompute) if recompute else None
+        result["peak_mb"] = _peak_memory(func) / 1e6
+    except BaseException as e:  # zone_heatmap.py calls exit() on missing data
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_scale(scale, repeat=3, seed=0):
+    """Generate one synthetic store and benchmark every case against it."""
+    from data_registry import invalidate
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="heatsight_bench_") as root:
+        gen_start = time.perf_counter()
+        counts = generate_synthetic_store(root, seed=seed, **scale)
+        generate_s = time.perf_counter() - gen_start
+        os.chdir(root)
+        try:
+            invalidate()
+            results = []
+            for name, func in _cases():
+                print(f"Benchmarking {name}...")
+                results.append(run_case(name, func, repeat))
+        finally:
+            os.chdir(cwd)
+            invalidate()
+    return {"params": scale, "counts": counts, "generate_s": generate_s, "results": results}
+
+
+def compare_reports(baseline, current, threshold=REGRESSION_THRESHOLD, min_delta=REGRESSION_MIN_DELTA_S):
+    """Return ``(scale_label, case, old_s, new_s)`` for cases slower than ``threshold``x.
+
+    Cases are compared on their recompute median, or on the cold time when
+    either report lacks it; warm timings only measure cache hits.
+    """
+    def by_key(report):
+        table = {}
+        for scale in report.get("scales", []):
+            label = json.dumps(scale["params"], sort_keys=True)
+            for r in scale["results"]:
+                table[(label, r["name"])] = r
+        return table
+
+    old, new = by_key(baseline), by_key(current)
+    regressions = []
+    for key in sorted(new):
+        if key not in old:
+            continue
+        metric = "recompute_median_s"
+        if old[key].get(metric) is None or new[key].get(metric) is None:
+            metric = "cold_s"
+        old_s, new_s = old[key].get(metric), new[key].get(metric)
+        if old_s is None or new_s is None:
+            continue
+        if new_s > old_s * threshold and new_s - old_s > min_delta:
+            regressions.append((key[0], key[1], old_s, new_s))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HeatSight pipelines on synthetic stores.")
+    parser.add_argument("--preset", nargs="*", choices=sorted(PRESETS), help="Named scales to run")
+    parser.add_argument("--rows", type=int)
+    parser.add_argument("--cols", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--days", type=int)
+    parser.add_argument("--repeat", type=int, default=3, help="Warm and recompute runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=BENCHMARK_REPORT_PATH)
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    scales = [PRESETS[p] for p in (args.preset or [])]
+    custom = {"rows": args.rows, "cols": args.cols, "n_products": args.products,
+              "n_customers": args.customers, "days": args.days}
+    if any(v is not None for v in custom.values()) or not scales:
+        scales.append({k: (v if v is not None else PRESETS["small"][k]) for k, v in custom.items()})
+
+    sys.path.insert(0, REPO_DIR)
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "scales": [run_scale(scale, args.repeat, args.seed) for scale in scales],
+    }
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    for scale in report["scales"]:
+        print(f"\nScale {scale['counts']}:")
+        for r in scale["results"]:
+            if "error" in r:
+                print(f"  {r['name']:<38} ERROR {r['error']}")
+            else:
+                warm = f"{r['warm_median_s']:.3f}s" if r["warm_median_s"] is not None else "-"
+                recompute = f"{r['recompute_median_s']:.3f}s" if r["recompute_median_s"] is not None else "-"
+                print(f"  {r['name']:<38} cold {r['cold_s']:.3f}s  warm {warm}  recompute {recompute}  "
+                      f"peak {r['peak_mb']:.1f}MB")
+    print(f"\nBenchmark report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(json.load(f), report)
+        for label, name, old, new in regressions:
+            print(f"REGRESSION {name} at {label}: {old:.3f}s -> {new:.3f}s")
+        if not regressions:
+            print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
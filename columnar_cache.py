@@ -0,0 +1,168 @@
+"""Typed columnar (Parquet) copies of the large CSV datasets.
+
+``ingest_columnar`` converts the movement log, store layout, final insights and
+POS sales CSVs into Parquet files stored next to them in a ``.columnar``
+folder. The data registry reads the Parquet copy instead of the CSV whenever it
+is at least as new as the CSV, so a regenerated CSV transparently wins until the
+next ingest.
+"""
+import os
+
+import pandas as pd
+
+COLUMNAR_DIRNAME = ".columnar"
+INGEST_CHUNKSIZE = 1_000_000
+
+# Column typing applied during ingest. Category columns are stored dictionary
+# encoded and come back as pandas categoricals; string columns stay text even
+# when a chunk holds only nulls; datetime columns are parsed once. Other columns
+# take the type inferred from the first chunk.
+COLUMNAR_SCHEMAS = {
+    "movements.csv": {"category": ["Customer_ID", "Zone"], "string": [], "datetime": ["Timestamp"]},
+    "pos_sales.csv": {"category": [], "string": ["Zone", "Product_ID"], "datetime": ["Date"]},
+    "store_layout.csv": {"category": [], "string": ["Zone", "Product_ID", "Product_Name"], "datetime": []},
+    "final_product_insights.csv": {
+        "category": [],
+        "string": ["Zone", "Product_ID", "Product_Name", "Zone_Category", "New_Zone",
+                   "Old_Product_Name", "Recommended_Zone"],
+        "datetime": [],
+    },
+}
+
+INGEST_PATHS = [
+    os.path.join("data", "movements.csv"),
+    os.path.join("data", "store_layout.csv"),
+    os.path.join("data", "pos_sales.csv"),
+    os.path.join("insights", "final_product_insights.csv"),
+]
+
+
+def columnar_path(csv_path):
+    """Return the Parquet path that shadows ``csv_path``."""
+    folder, name = os.path.split(csv_path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(folder, COLUMNAR_DIRNAME, f"{stem}.parquet")
+
+
+def columnar_signature(csv_path, csv_mtime_ns):
+    """Return ``(mtime_ns, size)`` of a fresh columnar copy, or None if absent/stale."""
+    try:
+        st = os.stat(columnar_path(csv_path))
+    except OSError:
+        return None
+    if st.st_mtime_ns < csv_mtime_ns:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def read_columnar(csv_path):
+    """Read the columnar copy of ``csv_path`` with its categorical columns restored."""
+    import pyarrow.parquet as pq
+
+    schema = COLUMNAR_SCHEMAS.get(os.path.basename(csv_path), {})
+    table = pq.read_table(columnar_path(csv_path), read_dictionary=schema.get("category") or None)
+    return table.to_pandas()
+
+
+def _text_columns(schema):
+    return schema.get("category", []) + schema.get("string", [])
+
+
+def _typed_chunks(csv_path, chunksize):
+    schema = COLUMNAR_SCHEMAS.get(os.path.basename(csv_path), {})
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    text = {col: str for col in _text_columns(schema) if col in columns}
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=text):
+        for col in schema.get("datetime", []):
+            if col in chunk.columns:
+                chunk[col] = pd.to_datetime(chunk[col])
+        yield chunk
+
+
+def _arrow_schema(csv_path, chunk):
+    """Arrow schema of a columnar copy: declared columns typed explicitly, the rest inferred from ``chunk``."""
+    import pyarrow as pa
+
+    schema = COLUMNAR_SCHEMAS.get(os.path.basename(csv_path), {})
+    text = set(_text_columns(schema))
+    datetimes = set(schema.get("datetime", []))
+    inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+    fields = []
+    for col in chunk.columns:
+        if col in text:
+            dtype = pa.string()
+        elif col in datetimes:
+            dtype = pa.timestamp("ns")
+        elif chunk[col].isna().all():
+            # An all-null column in the first chunk says nothing about the later ones
+            dtype = pa.string()
+        else:
+            dtype = inferred.field(col).type
+        fields.append(pa.field(col, dtype))
+    return pa.schema(fields)
+
+
+def write_columnar(csv_path, chunksize=INGEST_CHUNKSIZE):
+    """Convert one CSV into its columnar copy, streaming it in chunks."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    out_path = columnar_path(csv_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    writer = None
+    rows = 0
+    try:
+        for chunk in _typed_chunks(csv_path, chunksize):
+            if writer is None:
+                arrow_schema = _arrow_schema(csv_path, chunk)
+                writer = pq.ParquetWriter(tmp_path, arrow_schema)
+                as_text = [f.name for f in arrow_schema if pa.types.is_string(f.type)]
+            for col in as_text:
+                if chunk[col].dtype != object:
+                    chunk[col] = chunk[col].astype("string")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return 0
+    os.replace(tmp_path, out_path)
+    return rows
+
+
+def ingest_columnar(paths=None):
+    """Refresh the columnar copies of ``paths`` (default: ``INGEST_PATHS``).
+
+    Copies that are already newer than their CSV are left alone. Returns a dict
+    mapping each CSV path to the number of rows written (0 when skipped).
+    """
+    from data_registry import file_signature
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("Warning: pyarrow is not installed; columnar ingest skipped, CSVs will be used.")
+        return {}
+
+    written = {}
+    for path in paths or INGEST_PATHS:
+        sig = file_signature(path)
+        if sig is None or sig[2] == 0:
+            print(f"Warning: {path} not found or is empty. Skipping columnar ingest.")
+            continue
+        resolved, mtime, _ = sig
+        if columnar_signature(resolved, mtime) is not None:
+            written[resolved] = 0
+            continue
+        try:
+            written[resolved] = write_columnar(resolved)
+            print(f"Columnar copy of {resolved} written to {columnar_path(resolved)} ({written[resolved]} rows)")
+        except Exception as e:
+            print(f"Error writing columnar copy of {resolved}: {e}")
+    return written
+
+
+if __name__ == "__main__":
+    ingest_columnar()
@@ -1,14 +1,16 @@
-import pandas as pd
 import os
 
+from data_registry import load_dataset
+from product_index import match_products
+
 PAIR_PATH = os.path.join('data', 'product_pairs.csv')
 
 
 def get_complementary(product_name: str):
-    if not os.path.exists(PAIR_PATH):
+    df = load_dataset(PAIR_PATH)
+    if df.empty:
         return []
-    df = pd.read_csv(PAIR_PATH)
-    matches = df[df['Product'].str.contains(product_name, case=False, na=False)]
+    matches = match_products(df, product_name, column='Product')
     return matches['Complementary'].tolist()
 
 
@@ -0,0 +1,181 @@
+"""Zone conversion rates (sales per visit) at zone, hour or day granularity.
+
+Every report joins footfall and sales on one aligned zone x partition grid:
+zone and partition labels are mapped to integer codes once, sales are summed
+into the grid with a single ``np.bincount`` and visits come straight from the
+traffic cube's hour/day slices, so the cost grows with the number of rows, not
+with zones x partitions lookups. Hourly sales come from ``sales_by_hour.csv``
+(products mapped to zones through the store layout); daily sales need a
+``Date`` column in ``sales_by_hour.csv`` or ``pos_sales.csv``. Without dated
+sales the daily table still lists the cube's visits, with ``Sales`` and
+``Conversion_Rate`` left NaN.
+
+``conversion_rates`` is the one definition of the metric; ``zone_stats``,
+the agent tools and ``simulation_engine`` all use it.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_registry import file_signature, fingerprint, load_dataset
+from traffic_cube import HOURLY_TRAFFIC_PATH, MOVEMENTS_PATH, get_traffic_cube, visits_by_day, visits_by_hour
+
+POS_SALES_PATH = os.path.join("data", "pos_sales.csv")
+SALES_BY_HOUR_PATH = os.path.join("data", "sales_by_hour.csv")
+STORE_LAYOUT_PATH = os.path.join("data", "store_layout.csv")
+GRANULARITIES = ("zone", "hour", "day")
+CONVERSION_COLUMNS = {"zone": [], "hour": ["Hour"], "day": ["Date"]}
+UNDATED_SALES_NOTE = "daily conversion needs a Date column in sales_by_hour.csv or pos_sales.csv"
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def conversion_rates(sales, visits):
+    """Sales per visit; zones without visits divide by 1 instead of 0."""
+    return sales / np.where(np.asarray(visits) == 0, 1, visits)
+
+
+def _empty_table(granularity):
+    return pd.DataFrame(columns=["Zone"] + CONVERSION_COLUMNS[granularity] + ["Visits", "Sales", "Conversion_Rate"])
+
+
+def _sales_zones(sales_df):
+    """Zone of every sales row, from its ``Zone`` column or via the layout's ``Product_ID``."""
+    if "Zone" in sales_df.columns:
+        return sales_df["Zone"].astype(str).to_numpy(dtype=object)
+    layout = load_dataset(STORE_LAYOUT_PATH)
+    if "Product_ID" not in sales_df.columns or layout.empty:
+        return np.full(len(sales_df), None, dtype=object)
+    product_zone = layout.drop_duplicates("Product_ID").set_index("Product_ID")["Zone"].astype(str)
+    codes = pd.Index(product_zone.index).get_indexer(sales_df["Product_ID"])
+    zones = product_zone.to_numpy(dtype=object)
+    return np.where(codes >= 0, zones[codes], None)
+
+
+def _aligned_table(part_name, part_labels, visit_zones, visits, sales_zones, sales_parts, sales):
+    """Join ``visits`` (partitions x visit_zones) with sales rows on one zone x partition grid.
+
+    Only cells with visits or sales are returned, ordered by zone then partition.
+    """
+    known = pd.notna(sales_zones) & (sales_parts >= 0)
+    sales_zones, sales_parts, sales = sales_zones[known], sales_parts[known], sales[known]
+    zone_index = pd.Index(visit_zones, dtype=object).union(pd.Index(pd.unique(sales_zones), dtype=object))
+    n_zones, n_parts = len(zone_index), len(part_labels)
+
+    grid_visits = np.zeros((n_zones, n_parts), dtype=np.int64)
+    if len(visit_zones):
+        grid_visits[zone_index.get_indexer(visit_zones)] = visits.T
+    flat = zone_index.get_indexer(sales_zones).astype(np.int64) * n_parts + sales_parts
+    grid_sales = np.bincount(flat, weights=sales, minlength=n_zones * n_parts).reshape(n_zones, n_parts)
+    if np.issubdtype(sales.dtype, np.integer):
+        grid_sales = np.rint(grid_sales).astype(np.int64)
+
+    keep = (grid_visits > 0) | (grid_sales > 0)
+    zone_idx, part_idx = np.nonzero(keep)
+    v, s = grid_visits[keep], grid_sales[keep]
+    return pd.DataFrame({
+        "Zone": zone_index.to_numpy(dtype=object)[zone_idx],
+        part_name: np.asarray(part_labels, dtype=object)[part_idx],
+        "Visits": v,
+        "Sales": s,
+        "Conversion_Rate": conversion_rates(s, v),
+    })
+
+
+def _sales_values(sales_df):
+    sales = pd.to_numeric(sales_df["Sales"], errors="coerce")
+    if sales.isna().any():
+        return sales.fillna(0).to_numpy(dtype=float)
+    return sales.to_numpy()
+
+
+def _zone_table():
+    from zone_stats import get_zone_stats
+
+    if file_signature(MOVEMENTS_PATH) is None or file_signature(POS_SALES_PATH) is None:
+        return _empty_table("zone")
+    stats = get_zone_stats()
+    return stats[["Footfall", "Sales", "Conversion_Rate"]].rename(columns={"Footfall": "Visits"}).reset_index()
+
+
+def _hour_table():
+    sales_df = load_dataset(SALES_BY_HOUR_PATH)
+    if sales_df.empty or not {"Hour", "Sales"}.issubset(sales_df.columns):
+        return _empty_table("hour")
+    cube = get_traffic_cube()
+    hours = pd.to_numeric(sales_df["Hour"], errors="coerce").to_numpy()
+    hours = np.where((hours >= 0) & (hours < 24), np.nan_to_num(hours, nan=-1), -1).astype(np.int64)
+    return _aligned_table("Hour", list(range(24)), cube["zone_names"], visits_by_hour(cube),
+                          _sales_zones(sales_df), hours, _sales_values(sales_df))
+
+
+def _day_visits_table(cube, dates, visits):
+    """Daily visits per zone with ``Sales`` and ``Conversion_Rate`` unknown (NaN)."""
+    empty = np.zeros(0)
+    table = _aligned_table("Date", dates, cube["zone_names"], visits,
+                           empty.astype(object), empty.astype(np.int64), empty)
+    table["Sales"] = np.nan
+    table["Conversion_Rate"] = np.nan
+    return table
+
+
+def _day_table():
+    sales_df = load_dataset(SALES_BY_HOUR_PATH)
+    if "Date" not in sales_df.columns:
+        sales_df = load_dataset(POS_SALES_PATH)
+    cube = get_traffic_cube()
+    dates, visits = visits_by_day(cube)
+    if sales_df.empty or not {"Date", "Sales"}.issubset(sales_df.columns):
+        print(f"Warning: {UNDATED_SALES_NOTE}; reporting daily visits only.")
+        return _day_visits_table(cube, dates, visits)
+    sale_dates = pd.to_datetime(sales_df["Date"], errors="coerce").dt.normalize()
+    labels = pd.DatetimeIndex(pd.to_datetime(dates)).union(pd.DatetimeIndex(sale_dates.dropna().unique()))
+    # Align the cube's days to the (possibly wider) set of partition labels
+    day_visits = np.zeros((len(labels), visits.shape[1]), dtype=np.int64)
+    if len(dates):
+        day_visits[labels.get_indexer(pd.to_datetime(dates))] = visits
+    parts = labels.get_indexer(sale_dates)
+    return _aligned_table("Date", [d.date() for d in labels], cube["zone_names"], day_visits,
+                          _sales_zones(sales_df), parts, _sales_values(sales_df))
+
+
+_BUILDERS = {"zone": _zone_table, "hour": _hour_table, "day": _day_table}
+
+
+def get_conversion_table(granularity="zone"):
+    """Conversion rates per zone, per (zone, hour) or per (zone, date).
+
+    Columns are ``Zone``, ``Hour``/``Date`` for the finer granularities,
+    ``Visits``, ``Sales`` and ``Conversion_Rate``. Recomputed only when an
+    input file changes; the frame is shared, so copy it before mutating.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    sig = fingerprint(MOVEMENTS_PATH, HOURLY_TRAFFIC_PATH, POS_SALES_PATH, SALES_BY_HOUR_PATH, STORE_LAYOUT_PATH)
+    with _LOCK:
+        cached = _CACHE.get(granularity)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+    table = _BUILDERS[granularity]()
+    with _LOCK:
+        _CACHE[granularity] = (sig, table)
+    return table
+
+
+def store_conversion(granularity="hour"):
+    """Store-wide visits, sales and conversion per hour or date (NaN sales when undated)."""
+    table = get_conversion_table(granularity)
+    part = CONVERSION_COLUMNS[granularity]
+    if table.empty or not part:
+        return pd.DataFrame(columns=part + ["Visits", "Sales", "Conversion_Rate"])
+    totals = table.groupby(part[0], sort=True)[["Visits", "Sales"]].sum(min_count=1)
+    totals["Conversion_Rate"] = conversion_rates(totals["Sales"].to_numpy(), totals["Visits"].to_numpy())
+    return totals.reset_index()
+
+
+if __name__ == "__main__":
+    for level in GRANULARITIES:
+        print(get_conversion_table(level).head(10))
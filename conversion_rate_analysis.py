@@ -1,20 +1,14 @@
-import pandas as pd
 import os
 
+from conversion_engine import get_conversion_table
+
 MOVEMENTS_PATH = os.path.join('data', 'movements.csv')
 POS_SALES_PATH = os.path.join('data', 'pos_sales.csv')
 
 
 def calculate_zone_conversion_rates():
-    if not os.path.exists(MOVEMENTS_PATH) or not os.path.exists(POS_SALES_PATH):
-        return pd.DataFrame()
-    move_df = pd.read_csv(MOVEMENTS_PATH)
-    sales_df = pd.read_csv(POS_SALES_PATH)
-    visits = move_df['Zone'].value_counts().rename('Visits')
-    sales = sales_df.groupby('Zone')['Sales'].sum()
-    df = pd.concat([visits, sales], axis=1).fillna(0)
-    df['Conversion_Rate'] = df['Sales'] / df['Visits'].replace(0, 1)
-    return df.reset_index().rename(columns={'index': 'Zone'})
+    """Zone, Visits, Sales and Conversion_Rate per zone (empty without movements or POS sales)."""
+    return get_conversion_table('zone')
 
 
 if __name__ == '__main__':
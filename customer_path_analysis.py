@@ -1,14 +1,29 @@
-import pandas as pd
 import os
 
+from data_registry import file_signature, load_dataset
+
 JOURNEY_PATH = os.path.join('data', 'customer_journeys.csv')
 
+# Path counts are computed once per version of the journeys file
+_PATH_COUNTS = {}
+
+
+def _path_counts():
+    sig = file_signature(JOURNEY_PATH)
+    cached = _PATH_COUNTS.get('counts')
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    df = load_dataset(JOURNEY_PATH)
+    counts = df['Path'].value_counts() if not df.empty else None
+    _PATH_COUNTS['counts'] = (sig, counts)
+    return counts
+
 
 def common_paths(top_n=5):
-    if not os.path.exists(JOURNEY_PATH):
+    counts = _path_counts()
+    if counts is None:
         return []
-    df = pd.read_csv(JOURNEY_PATH)
-    counts = df['Path'].value_counts().head(top_n)
+    counts = counts.head(top_n)
     return list(zip(counts.index, counts.values))
 
 
@@ -0,0 +1,222 @@
+"""Shared dataset registry used by every module that reads the CSV datasets.
+
+Frames are cached per resolved path and keyed on the file's mtime and size, so a
+regenerated file is re-read on the next access while unchanged files are served
+from memory. When ``columnar_cache`` has a Parquet copy at least as new as the
+CSV, the typed copy is read instead. Callers share the cached frame and must
+``.copy()`` before mutating it.
+
+Each store's files live under ``stores/<store_id>/`` with the usual ``data/``
+and ``insights/`` layout. Inside ``store_scope(store_id)`` relative paths are
+resolved under that folder (``store_file`` does the same for outputs), so the
+same module code serves any store; outside a scope paths stay relative to the
+working directory. The scope is a context variable, so threads and processes
+can work on different stores at once.
+"""
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+
+import pandas as pd
+
+import columnar_cache
+
+# Data directories may vary in casing across platforms and scripts
+DATA_DIRS = ["data", "Data"]
+STORES_DIR = "stores"
+
+_CACHE = {}
+_RESOLVED = {}
+_LOCK = threading.RLock()
+
+# Process-wide read counters, plus per-context sinks opened by ``track_reads``
+_STATS = {"hits": 0, "misses": 0, "bytes_read": 0}
+_SINKS = contextvars.ContextVar("data_registry_sinks", default=())
+# Folder of the store selected by ``store_scope``; None means the working directory
+_STORE_ROOT = contextvars.ContextVar("data_registry_store_root", default=None)
+
+
+def store_dir(store_id):
+    """Folder holding one store's ``data/`` and ``insights/``."""
+    return os.path.join(STORES_DIR, str(store_id))
+
+
+def list_stores():
+    """IDs of the stores under ``stores/``, sorted."""
+    try:
+        entries = os.listdir(STORES_DIR)
+    except OSError:
+        return []
+    return sorted(e for e in entries if os.path.isdir(os.path.join(STORES_DIR, e)))
+
+
+@contextlib.contextmanager
+def store_scope(store_id):
+    """Resolve relative dataset paths under ``stores/<store_id>`` inside the block.
+
+    ``None`` keeps the enclosing scope. Raises ``FileNotFoundError`` for an
+    unknown store.
+    """
+    if store_id is None:
+        yield
+        return
+    root = store_dir(store_id)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"Store {store_id!r} not found in {STORES_DIR}/")
+    token = _STORE_ROOT.set(os.path.abspath(root))
+    try:
+        yield
+    finally:
+        _STORE_ROOT.reset(token)
+
+
+def store_file(path):
+    """``path`` inside the active store's folder; unchanged outside a store scope or when absolute."""
+    root = _STORE_ROOT.get()
+    if root is None or os.path.isabs(path):
+        return path
+    return os.path.join(root, path)
+
+
+def store_aware(func):
+    """Add a ``store_id`` keyword that runs ``func`` inside ``store_scope(store_id)``."""
+    @functools.wraps(func)
+    def wrapper(*args, store_id=None, **kwargs):
+        with store_scope(store_id):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _casing_candidates(path):
+    parts = os.path.normpath(path).split(os.sep)
+    if parts[0] not in DATA_DIRS:
+        return [path]
+    rest = parts[1:]
+    candidates = [path]
+    for d in DATA_DIRS:
+        alt = os.path.join(d, *rest)
+        if alt not in candidates:
+            candidates.append(alt)
+    return candidates
+
+
+def resolve_path(path):
+    """Return the existing on-disk path for ``path``, trying both data dir casings.
+
+    Inside a ``store_scope`` relative paths are looked up in the store's folder.
+    Resolutions are remembered once found; a missing file is re-checked on the
+    next call because a pipeline step may generate it later.
+    """
+    key = (_STORE_ROOT.get(), path)
+    resolved = _RESOLVED.get(key)
+    if resolved is not None and os.path.exists(resolved):
+        return resolved
+    for candidate in _casing_candidates(path):
+        candidate = store_file(candidate)
+        if os.path.exists(candidate):
+            _RESOLVED[key] = candidate
+            return candidate
+    _RESOLVED.pop(key, None)
+    return store_file(path)
+
+
+def file_signature(path):
+    """Return ``(resolved_path, mtime_ns, size)`` or ``None`` when the file is missing."""
+    resolved = resolve_path(path)
+    try:
+        st = os.stat(resolved)
+    except OSError:
+        return None
+    return resolved, st.st_mtime_ns, st.st_size
+
+
+def fingerprint(*paths):
+    """Combined signature of several files, usable as a memoization key."""
+    return tuple(file_signature(p) for p in paths)
+
+
+def record_read(hit, nbytes=0):
+    """Count one cached lookup; ``nbytes`` is the on-disk size read on a miss."""
+    key = "hits" if hit else "misses"
+    with _LOCK:
+        _STATS[key] += 1
+        _STATS["bytes_read"] += nbytes
+    for sink in _SINKS.get():
+        sink[key] += 1
+        sink["bytes_read"] += nbytes
+
+
+def registry_stats():
+    """Process-wide ``hits``, ``misses`` and ``bytes_read`` since start-up."""
+    with _LOCK:
+        return dict(_STATS)
+
+
+@contextlib.contextmanager
+def track_reads():
+    """Collect the reads made inside the block (and its callees) into a dict."""
+    sink = {"hits": 0, "misses": 0, "bytes_read": 0}
+    token = _SINKS.set(_SINKS.get() + (sink,))
+    try:
+        yield sink
+    finally:
+        _SINKS.reset(token)
+
+
+def load_dataset(path, **read_kwargs):
+    """Load a CSV through the shared cache, re-reading only if the file changed.
+
+    A fresh columnar copy is preferred over the CSV unless ``read_kwargs`` are
+    given. Returns an empty DataFrame when the file is missing, empty or unreadable.
+    """
+    sig = file_signature(path)
+    if sig is None:
+        print(f"Warning: {path} not found.")
+        return pd.DataFrame()
+    resolved, mtime, size = sig
+    if size == 0:
+        print(f"Warning: {resolved} is empty.")
+        return pd.DataFrame()
+
+    columnar_sig = None if read_kwargs else columnar_cache.columnar_signature(resolved, mtime)
+    version = (mtime, size, columnar_sig)
+    key = (resolved, repr(sorted(read_kwargs.items())))
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] == version:
+            record_read(True)
+            return entry[1]
+        record_read(False, columnar_sig[1] if columnar_sig is not None else size)
+        df = None
+        if columnar_sig is not None:
+            try:
+                df = columnar_cache.read_columnar(resolved)
+            except Exception as e:
+                print(f"Warning: columnar copy of {resolved} unreadable ({e}); falling back to CSV.")
+        try:
+            if df is None:
+                df = pd.read_csv(resolved, **read_kwargs)
+        except pd.errors.EmptyDataError:
+            print(f"Warning: {resolved} is an empty CSV file.")
+            df = pd.DataFrame()
+        except Exception as e:
+            print(f"Error loading {resolved}: {e}")
+            return pd.DataFrame()
+        _CACHE[key] = (version, df)
+        return df
+
+
+def invalidate(path=None):
+    """Drop cached frames and the resolved location of ``path`` (or everything when ``path`` is None)."""
+    with _LOCK:
+        if path is None:
+            _CACHE.clear()
+            _RESOLVED.clear()
+            return
+        resolved = resolve_path(path)
+        for key in [k for k in _CACHE if k[0] == resolved]:
+            del _CACHE[key]
+        # A regenerated file may now exist under the other data dir casing
+        _RESOLVED.pop((_STORE_ROOT.get(), path), None)
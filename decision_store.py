@@ -0,0 +1,134 @@
+"""Append-only store for the agent's relocation decision log.
+
+Decisions live in an SQLite database in WAL mode, so several Streamlit
+sessions can append and read concurrently. Each append is one INSERT,
+independent of history size. Product name, both zones and the date are
+indexed, so filtered history queries only touch matching rows. The legacy
+``decision_log.json`` is imported once, the first time the database is
+created, and is not written afterwards. Each store (see
+``data_registry.store_scope``) has its own database.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from data_registry import store_file
+
+DECISION_DB_PATH = os.path.join("agent_memory", "decision_log.sqlite")
+LEGACY_DECISION_LOG_PATH = os.path.join("agent_memory", "decision_log.json")
+DECISION_FIELDS = ["product_name", "old_zone", "new_zone", "date", "outcome_description"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL COLLATE NOCASE,
+    old_zone TEXT COLLATE NOCASE,
+    new_zone TEXT COLLATE NOCASE,
+    date TEXT,
+    outcome_description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_product ON decisions(product_name);
+CREATE INDEX IF NOT EXISTS idx_decisions_old_zone ON decisions(old_zone);
+CREATE INDEX IF NOT EXISTS idx_decisions_new_zone ON decisions(new_zone);
+CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# sqlite3 connections must not be shared across threads
+_LOCAL = threading.local()
+
+
+def _migrate_legacy_log(conn):
+    """Import the legacy JSON log once; later calls are a single-row lookup."""
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another session may have imported while we waited for the write lock
+        if not conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            entries = []
+            legacy_path = store_file(LEGACY_DECISION_LOG_PATH)
+            if os.path.exists(legacy_path) and os.path.getsize(legacy_path) > 0:
+                try:
+                    with open(legacy_path, "r") as f:
+                        entries = json.load(f)
+                except json.JSONDecodeError:
+                    print(f"Warning: {legacy_path} is corrupted. Skipping import.")
+            conn.executemany(
+                "INSERT INTO decisions (product_name, old_zone, new_zone, date, outcome_description) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [tuple(e.get(k) for k in DECISION_FIELDS) for e in entries if e.get("product_name")],
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(len(entries)),))
+            print(f"DEBUG: Imported {len(entries)} decisions from {legacy_path}.")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _connect():
+    # Keyed on the absolute path so a change of working directory or store opens the right file
+    db_path = os.path.abspath(store_file(DECISION_DB_PATH))
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and getattr(_LOCAL, "path", None) == db_path:
+        return conn
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript(_SCHEMA)
+    _migrate_legacy_log(conn)
+    _LOCAL.conn, _LOCAL.path = conn, db_path
+    return conn
+
+
+def append_decision(product_name, old_zone, new_zone, date, outcome_description):
+    """Append one decision; durable once this returns."""
+    # Autocommit: each INSERT is its own WAL transaction
+    _connect().execute(
+        "INSERT INTO decisions (product_name, old_zone, new_zone, date, outcome_description) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (product_name, old_zone, new_zone, date, outcome_description),
+    )
+
+
+def has_decisions():
+    return _connect().execute("SELECT 1 FROM decisions LIMIT 1").fetchone() is not None
+
+
+def query_decisions(product_name=None, zones=None, since=None):
+    """Return decisions in insertion order, optionally filtered.
+
+    Args:
+        product_name: exact product name (case-insensitive).
+        zones: iterable of zone IDs; matches moves whose old or new zone is one
+            of them (case-insensitive).
+        since: ISO date/datetime string; only decisions dated at or after it.
+    """
+    clauses, params = [], []
+    if product_name:
+        clauses.append("product_name = ?")
+        params.append(product_name)
+    if zones is not None:
+        zones = list(zones)
+        if not zones:
+            return []
+        marks = ", ".join("?" * len(zones))
+        clauses.append(f"(old_zone IN ({marks}) OR new_zone IN ({marks}))")
+        params.extend(zones + zones)
+    if since:
+        clauses.append("date >= ?")
+        params.append(since)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = _connect().execute(
+        f"SELECT {', '.join(DECISION_FIELDS)} FROM decisions{where} ORDER BY id", params
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def decided_product_names():
+    """Distinct product names that have any recorded decision."""
+    return {r[0] for r in _connect().execute("SELECT DISTINCT product_name FROM decisions")}
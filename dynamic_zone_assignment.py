@@ -1,30 +1,23 @@
 import pandas as pd
+import numpy as np
 import os
-import json
 from datetime import datetime
 
+from data_registry import load_dataset
+
 from conversion_rate_analysis import calculate_zone_conversion_rates
 from revenue_per_sqft_calculator import calculate_revenue_per_sqft
-from relocation_intelligence import generate_relocation_scores
+from relocation_intelligence import categorize_products, generate_relocation_scores, zone_pair_mask
+from assignment_solver import solve_assignment
+from decision_store import decided_product_names
 
 INSIGHTS_DIR = "insights"
 DATA_DIR = "data"
-DECISION_LOG_PATH = os.path.join("agent_memory", "decision_log.json")
 FINAL_INSIGHTS_PATH = os.path.join(INSIGHTS_DIR, "final_product_insights.csv")
 RELOCATION_PLAN_PATH = os.path.join(INSIGHTS_DIR, "relocation_plan.csv")
 ZONE_PERF_PATH = os.path.join(INSIGHTS_DIR, "zone_performance.csv")
 
 
-def _load_decision_log():
-    if not os.path.exists(DECISION_LOG_PATH):
-        return []
-    try:
-        with open(DECISION_LOG_PATH, "r") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-
 def _normalize(series: pd.Series) -> pd.Series:
     if series.empty:
         return series
@@ -69,14 +62,12 @@ def _build_zone_performance(final_df: pd.DataFrame) -> pd.DataFrame:
 
 
 def assign_recommended_zones(top_n: int | None = None) -> pd.DataFrame:
-    if not os.path.exists(FINAL_INSIGHTS_PATH):
-        print("final_product_insights.csv not found")
-        return pd.DataFrame()
-
-    final_df = pd.read_csv(FINAL_INSIGHTS_PATH)
+    final_df = load_dataset(FINAL_INSIGHTS_PATH)
     if final_df.empty:
-        print("final_product_insights.csv is empty")
+        print("final_product_insights.csv not found or empty")
         return pd.DataFrame()
+    # Recommended_Zone is written back below; don't mutate the shared cached frame
+    final_df = final_df.copy()
 
     ri_df = generate_relocation_scores()
     if ri_df.empty:
@@ -93,37 +84,54 @@ def assign_recommended_zones(top_n: int | None = None) -> pd.DataFrame:
     if top_n:
         ri_df = ri_df.head(top_n)
 
-    recent_moves = {entry.get("product_name") for entry in _load_decision_log()}
-    zone_capacity = final_df["Zone"].value_counts().to_dict()
-    max_capacity = {z: zone_capacity.get(z, 0) + 5 for z in hot_zones}
-    assigned_counts = {z: 0 for z in hot_zones}
-
-    plan = []
-    for _, row in ri_df.iterrows():
-        if row["Product_Name"] in recent_moves:
-            continue
-        current_zone = row["Current_Zone"]
-        for zone in hot_zones:
-            if zone == current_zone:
-                continue
-            if assigned_counts[zone] >= max_capacity[zone]:
-                continue
-            final_df.loc[final_df["Product_ID"] == row["Product_ID"], "Recommended_Zone"] = zone
-            assigned_counts[zone] += 1
-            plan.append(
-                {
-                    "product_id": row["Product_ID"],
-                    "current_zone": current_zone,
-                    "recommended_zone": zone,
-                    "relocation_score": row["Relocation_Score"],
-                    "reason": row.get("Why_This_Zone", ""),
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-            )
-            break
+    recent_moves = decided_product_names()
+    capacity = final_df["Zone"].value_counts().reindex(hot_zones, fill_value=0).to_numpy() + 5
+
+    # Per product category, only the hottest compatible zones that can jointly
+    # absorb every candidate (twice over) enter the solver; a cooler compatible
+    # zone could never win against them. Incompatible zones don't count towards
+    # a category's prefix, so e.g. electronics still reach cooler non-grocery zones.
+    zone_products = final_df.drop_duplicates("Zone", keep="last").set_index("Zone")["Product_Name"]
+    hot_zones = np.asarray(hot_zones, dtype=object)
+    zone_categories = categorize_products(zone_products.reindex(hot_zones).fillna(""))
+    product_categories = categorize_products(ri_df["Product_Name"])
+    keep = np.zeros(len(hot_zones), dtype=bool)
+    for category in np.unique(product_categories):
+        compatible = zone_pair_mask([None], [category], hot_zones, zone_categories)[0]
+        enough = np.searchsorted(np.cumsum(np.where(compatible, capacity, 0)), 2 * len(ri_df)) + 1
+        keep[:enough] |= compatible[:enough]
+    candidate_zones = hot_zones[keep]
+    capacity = capacity[keep]
+    hot_score = zone_perf["hot_score"].to_numpy()[keep]
+
+    allowed = zone_pair_mask(
+        ri_df["Current_Zone"].to_numpy(dtype=object),
+        product_categories,
+        candidate_zones,
+        zone_categories[keep],
+    )
+    allowed &= ~ri_df["Product_Name"].isin(recent_moves).to_numpy()[:, None]
+    benefit = np.maximum(ri_df["Relocation_Score"].to_numpy(), 0)[:, None] * (hot_score[None, :] + 0.01)
+    choice = solve_assignment(benefit, capacity, allowed)
+
+    moved = ri_df[choice >= 0]
+    recommended = candidate_zones[choice[choice >= 0]]
+    new_zone = final_df["Product_ID"].map(dict(zip(moved["Product_ID"], recommended)))
+    if "Recommended_Zone" in final_df.columns:
+        new_zone = new_zone.fillna(final_df["Recommended_Zone"])
+    final_df["Recommended_Zone"] = new_zone
+
+    plan = pd.DataFrame({
+        "product_id": moved["Product_ID"].to_numpy(),
+        "current_zone": moved["Current_Zone"].to_numpy(),
+        "recommended_zone": recommended,
+        "relocation_score": moved["Relocation_Score"].to_numpy(),
+        "reason": moved["Why_This_Zone"].to_numpy() if "Why_This_Zone" in moved.columns else "",
+        "timestamp": datetime.utcnow().isoformat(),
+    })
 
     final_df.to_csv(FINAL_INSIGHTS_PATH, index=False)
-    pd.DataFrame(plan).to_csv(RELOCATION_PLAN_PATH, index=False)
+    plan.to_csv(RELOCATION_PLAN_PATH, index=False)
     return final_df
 
 
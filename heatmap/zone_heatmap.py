@@ -1,56 +1,42 @@
 # zone_Heatmap.py
-import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 import os
-import numpy as np
+import sys
+
+# Shared grid helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_registry import load_dataset
+from heatmap_renderer import render_heatmap
+from store_grid import zone_grid
 
 # Ensure the 'heatmap' directory exists
 os.makedirs("heatmap", exist_ok=True)
 
 # Load the movement data
-try:
-    movement_df = pd.read_csv("data/movements.csv")
-    print("Loaded data/movements.csv for heatmap generation.")
-except FileNotFoundError:
-    print("Error: data/movements.csv not found. Please run movements.py first.")
+MOVEMENTS_PATH = os.path.join("data", "movements.csv")
+movement_df = load_dataset(MOVEMENTS_PATH)
+if movement_df.empty:
+    print(f"Error: {MOVEMENTS_PATH} is missing or empty. Please run movements.py first.")
     exit()
+print(f"Loaded {MOVEMENTS_PATH} for heatmap generation.")
 
 # 1. Count visits per zone
-zone_counts = movement_df["Zone"].value_counts().to_dict()
-
-# 2. Define the 10x10 grid structure
-rows = [chr(ord('A') + i) for i in range(10)] # A, B, ..., J
-cols = range(1, 11) # 1, 2, ..., 10
+zone_counts = movement_df["Zone"].value_counts()
 
-# 3. Populate the heatmap grid
-# Initialize a 10x10 numpy array with zeros
-heatmap_grid = np.zeros((len(rows), len(cols)), dtype=int)
+# 2. Populate the heatmap grid; its size follows the zone IDs in the log
+heatmap_grid, rows, cols = zone_grid(zone_counts.index, zone_counts.to_numpy())
 
-for r_idx, row_label in enumerate(rows):
-    for c_idx, col_label in enumerate(cols):
-        zone_name = f"{row_label}{col_label}"
-        heatmap_grid[r_idx, c_idx] = zone_counts.get(zone_name, 0)
-
-print("\nPopulated heatmap grid with zone visit counts.")
+print(f"\nPopulated {len(rows)}x{len(cols)} heatmap grid with zone visit counts.")
 print("Sample of heatmap_grid (top-left 5x5):")
 print(heatmap_grid[:5, :5])
 
 
-# 4. Create the heatmap visualization
-plt.figure(figsize=(12, 10)) # Adjust figure size for a 10x10 grid
-sns.heatmap(heatmap_grid, annot=True, fmt="d", cmap="YlOrRd",
-            xticklabels=cols, yticklabels=rows, linewidths=.5, linecolor='lightgray')
-
-plt.title("🛍️ Heatmap of In-Store Zone Visits (Customer Movement)", fontsize=16)
-plt.xlabel("Shelf Column", fontsize=12)
-plt.ylabel("Shelf Row", fontsize=12)
-plt.xticks(rotation=0) # Keep column labels horizontal
-plt.yticks(rotation=0) # Keep row labels horizontal
-plt.tight_layout() # Adjust layout to prevent labels from overlapping
+# 3. Create the heatmap visualization
+fig = render_heatmap(heatmap_grid, rows, cols, "🛍️ Heatmap of In-Store Zone Visits (Customer Movement)",
+                     cmap="YlOrRd", dark=False)
 
 # Save the heatmap image
-plt.savefig("heatmap/zone_heatmap.png")
+fig.savefig("heatmap/zone_heatmap.png")
 plt.show()
 
 print("\nIn-store Heatmap generated and saved to heatmap/zone_heatmap.png")
\ No newline at end of file
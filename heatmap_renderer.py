@@ -0,0 +1,158 @@
+"""Matplotlib rendering for store grid heatmaps.
+
+``render_heatmap`` draws a grid from ``store_grid.zone_grid`` at any size.
+Small grids keep the per-cell numbers and cell borders; larger ones drop them
+and thin the tick labels, since thousands of text artists make seaborn both
+slow and unreadable.
+
+``heatmap_png`` serves rendered PNG bytes from a cache keyed by the source
+data's fingerprint, colormap and figure size, kept in memory and under
+``heatmap/.render_cache`` so only a data change triggers a new render.
+matplotlib and seaborn are imported on the first render, so importing this
+module (and serving cached PNGs) stays cheap.
+"""
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Grids with more cells than this are drawn without per-cell annotations
+ANNOTATE_MAX_CELLS = 400
+# Tick labels kept per inch of axis; the rest are blanked so they never overlap
+TICK_LABELS_PER_INCH = 2.5
+DARK_BACKGROUND = '#121212'
+
+RENDER_CACHE_DIR = os.path.join("heatmap", ".render_cache")
+RENDER_CACHE_SIZE = 16
+
+_PNG_CACHE = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _figsize(n_rows, n_cols, width=12):
+    """Figure size following the grid's aspect ratio; 10x10 gives the classic 12x10."""
+    height = min(max(width * 10 / 12 * n_rows / max(n_cols, 1), 3), 14)
+    return width, height
+
+
+def _tick_labels(labels, inches):
+    """Every label when they fit along ``inches`` of axis, otherwise every n-th one."""
+    max_labels = max(int(inches * TICK_LABELS_PER_INCH), 1)
+    if len(labels) <= max_labels:
+        return list(labels)
+    step = math.ceil(len(labels) / max_labels)
+    return [label if i % step == 0 else "" for i, label in enumerate(labels)]
+
+
+def render_heatmap(grid, row_labels, col_labels, title, cmap="YlOrRd", dark=True,
+                   figsize=None, annotate=None):
+    """Draw ``grid`` and return the figure.
+
+    ``annotate`` defaults to True only for grids up to ``ANNOTATE_MAX_CELLS``.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    n_rows, n_cols = grid.shape
+    if annotate is None:
+        annotate = grid.size <= ANNOTATE_MAX_CELLS
+    fmt = "d" if np.issubdtype(grid.dtype, np.integer) else ".0f"
+
+    width, height = figsize or _figsize(n_rows, n_cols)
+    fig, ax = plt.subplots(figsize=(width, height))
+    sns.heatmap(grid, annot=annotate, fmt=fmt, cmap=cmap,
+                xticklabels=_tick_labels(col_labels, width), yticklabels=_tick_labels(row_labels, height),
+                linewidths=.5 if annotate else 0, linecolor='lightgray', ax=ax)
+    text_color = '#f0f0f0' if dark else 'black'
+    ax.set_title(title, fontsize=16, color=text_color)
+    ax.set_xlabel("Shelf Column", fontsize=12, color=text_color)
+    ax.set_ylabel("Shelf Row", fontsize=12, color=text_color)
+    tick_color = '#e0e0e0' if dark else 'black'
+    ax.tick_params(axis='x', rotation=0, colors=tick_color)
+    ax.tick_params(axis='y', rotation=0, colors=tick_color)
+    if dark:
+        ax.set_facecolor(DARK_BACKGROUND)
+        fig.patch.set_facecolor(DARK_BACKGROUND)
+    fig.tight_layout()
+    return fig
+
+
+def _cache_file(name, key):
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(RENDER_CACHE_DIR, f"{name}-{digest}.png")
+
+
+def _remember(key, png):
+    with _LOCK:
+        _PNG_CACHE[key] = png
+        _PNG_CACHE.move_to_end(key)
+        while len(_PNG_CACHE) > RENDER_CACHE_SIZE:
+            _PNG_CACHE.popitem(last=False)
+
+
+def _write_cache_file(name, path, png):
+    """Atomically store ``png``, dropping older renders of the same heatmap."""
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+    for entry in os.listdir(RENDER_CACHE_DIR):
+        stale = os.path.join(RENDER_CACHE_DIR, entry)
+        if entry.startswith(f"{name}-") and entry.endswith(".png") and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def heatmap_png(name, data_key, build_grid, title, cmap="YlOrRd", dark=True, figsize=None, persist=True):
+    """PNG bytes of a heatmap, rendered only when ``data_key`` or the style changed.
+
+    ``data_key`` identifies the source data (e.g. ``data_registry.fingerprint``
+    of the input files) and ``build_grid`` returns ``(grid, row_labels,
+    col_labels)``; it is only called on a cache miss. ``persist=False`` keeps
+    the render in memory only, for short-lived views. Returns ``(png, rendered)``.
+    """
+    import matplotlib
+
+    key = (name, data_key, title, cmap, dark, figsize, matplotlib.rcParams["figure.dpi"])
+    with _LOCK:
+        png = _PNG_CACHE.get(key)
+        if png is not None:
+            _PNG_CACHE.move_to_end(key)
+            return png, False
+
+    path = _cache_file(name, key)
+    png = None
+    if persist:
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+        except OSError:
+            pass
+    if png:
+        _remember(key, png)
+        return png, False
+
+    import matplotlib.pyplot as plt
+
+    grid, row_labels, col_labels = build_grid()
+    fig = render_heatmap(grid, row_labels, col_labels, title, cmap=cmap, dark=dark, figsize=figsize)
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format="png", facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    png = buf.getvalue()
+    _remember(key, png)
+    if persist:
+        try:
+            _write_cache_file(name, path, png)
+        except OSError as e:
+            print(f"Warning: could not write heatmap render cache {path}: {e}")
+    return png, True
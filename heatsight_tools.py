@@ -1,8 +1,18 @@
 import pandas as pd
-import json
 import os
 from datetime import datetime
-from langchain.tools import tool
+from langchain_core.tools import tool
+from langchain_core.tools import BaseTool
+
+from data_registry import load_dataset
+from zone_stats import get_zone_stats
+from movement_stream import get_movement_stats, top_transitions
+from tool_metrics import instrument_tool
+from decision_store import append_decision, has_decisions, query_decisions
+from journey_index import next_zones, top_paths, top_paths_through
+from traffic_cube import last_days_window, zone_traffic
+from product_index import match_products, search_products
+from conversion_engine import GRANULARITIES, UNDATED_SALES_NOTE, get_conversion_table, store_conversion
 
 # --- Configuration ---
 # Define core directories relative to the project root
@@ -19,113 +29,74 @@ RELOCATION_PLAN_PATH = os.path.join(INSIGHTS_DIR, "relocation_plan.csv")
 DECISION_LOG_PATH = os.path.join(AGENT_MEMORY_DIR, "decision_log.json") # Renamed for clarity
 PRODUCT_CATEGORY_MAP_PATH = os.path.join(DATA_DIR, "product_category_map.csv")
 
-# List of premium products considered for special placement simulations
-premium_products = [
-    "Chocolate Gift Pack",
-    "Protein Shake",
-    "Luxury Shampoo",
-    "Dry Fruits",
-    "Premium Cookies",
-]
-
-# Ensure directories exist
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(INSIGHTS_DIR, exist_ok=True)
-os.makedirs(AGENT_MEMORY_DIR, exist_ok=True)
+# Importing this module does no I/O; tools that write create their output
+# directories when they run.
 
 
 # --- Helper Functions for Data Loading ---
-
-_DATA_CACHE = {}
-
-def _load_df(file_path):
-    """General helper to load a DataFrame from a given CSV file path with simple caching."""
-    if file_path in _DATA_CACHE:
-        return _DATA_CACHE[file_path]
-
-    print(f"DEBUG: Attempting to load file: {file_path}")
-    if not os.path.exists(file_path):
-        print(f"ERROR: File NOT FOUND at expected path: {file_path}")
-        return pd.DataFrame()
-
-    if os.path.getsize(file_path) == 0:
-        print(f"Warning: File is empty: {file_path}")
-        return pd.DataFrame()
-
-    try:
-        df = pd.read_csv(file_path)
-        _DATA_CACHE[file_path] = df
-        print(f"DEBUG: Successfully loaded {file_path}. Shape: {df.shape}")
-        if df.empty:
-            print(f"DEBUG: DataFrame loaded from {file_path} is empty.")
-        else:
-            print(f"DEBUG: First 2 rows of {file_path}:\n{df.head(2)}")
-        return df
-    except pd.errors.EmptyDataError:
-        print(f"Warning: No columns to parse from file {file_path}. It might be empty or just headers.")
-        return pd.DataFrame()
-    except Exception as e:
-        print(f"ERROR: Exception while loading {file_path}: {e}")
-        return pd.DataFrame()
-
-
-# --- Global DataFrames loaded once for tool consistency ---
-_final_insights_df = _load_df(FINAL_INSIGHTS_FILE_PATH)
-_relocation_plan_df = _load_df(RELOCATION_PLAN_PATH)
+# All CSV access goes through the shared data registry, which resolves the
+# data/ vs Data/ casing and re-reads a file only when it changes on disk.
 
 
 def _load_final_insights_df():
-    """Returns the in-memory final product insights DataFrame."""
-    global _final_insights_df
-    if _final_insights_df is None or _final_insights_df.empty:
-        _final_insights_df = _load_df(FINAL_INSIGHTS_FILE_PATH)
-    return _final_insights_df
+    """Returns the current final product insights DataFrame."""
+    return load_dataset(FINAL_INSIGHTS_FILE_PATH)
 
 def _load_relocation_plan_df():
-    """Returns the in-memory relocation plan DataFrame."""
-    global _relocation_plan_df
-    if _relocation_plan_df is None or _relocation_plan_df.empty:
-        _relocation_plan_df = _load_df(RELOCATION_PLAN_PATH)
-    return _relocation_plan_df
+    """Returns the current relocation plan DataFrame."""
+    return load_dataset(RELOCATION_PLAN_PATH)
+
+
+def _did_you_mean(df, product_name):
+    """" Did you mean: ...?" with the closest catalog names and IDs, or "" when nothing is close."""
+    candidates = search_products(df, product_name, k=3)
+    if not candidates:
+        return ""
+    names = ", ".join(
+        f"{c['Product_Name']} ({c['Product_ID']})" if c['Product_ID'] is not None else str(c['Product_Name'])
+        for c in candidates
+    )
+    return f" Did you mean: {names}?"
 
 
 # --- Agent Memory Management ---
 
-def _load_decision_log():
-    """Loads the agent's decision log from JSON."""
-    os.makedirs(os.path.dirname(DECISION_LOG_PATH), exist_ok=True) # Ensure directory exists
-    
-    # Check if the file exists AND is not empty (important for JSON loading)
-    if os.path.exists(DECISION_LOG_PATH) and os.path.getsize(DECISION_LOG_PATH) > 0:
-        with open(DECISION_LOG_PATH, 'r') as f:
-            try:
-                data = json.load(f)
-                print(f"DEBUG: Successfully loaded decision log from {DECISION_LOG_PATH}. Entries: {len(data)}")
-                return data
-            except json.JSONDecodeError:
-                print(f"Warning: {DECISION_LOG_PATH} is corrupted or empty. Starting with empty memory.")
-                return []
-    print(f"DEBUG: Decision log file not found or empty at {DECISION_LOG_PATH}. Starting with empty memory.")
-    return []
-
-def _save_decision_log(log_data):
-    """Saves the agent's decision log to JSON."""
-    os.makedirs(os.path.dirname(DECISION_LOG_PATH), exist_ok=True)
-    try:
-        with open(DECISION_LOG_PATH, 'w') as f:
-            json.dump(log_data, f, indent=4)
-        print(f"DEBUG: Successfully saved decision log to {DECISION_LOG_PATH}. Entries: {len(log_data)}")
-    except Exception as e:
-        print(f"ERROR: Failed to save decision log to {DECISION_LOG_PATH}: {e}")
+# Decisions are kept in decision_store (SQLite, append-only). DECISION_LOG_PATH is
+# the legacy JSON log it imports on first use.
 
 
 # --- ShelfSense Tools ---
 
+def _zone_window_summary(zone_id, start_hour=None, end_hour=None, last_n_days=None):
+    """One line with a zone's visits in an hour/day window, sliced from the traffic cube."""
+    start_hour = 0 if start_hour is None else int(start_hour)
+    end_hour = 24 if end_hour is None else int(end_hour)
+    start_date, end_date = last_days_window(int(last_n_days)) if last_n_days else (None, None)
+    try:
+        visits = zone_traffic(start_hour, end_hour, start_date, end_date)
+    except ValueError as e:
+        return f"Could not compute visits for that time window: {e}"
+
+    upper = {z.upper(): z for z in visits.index}
+    zone = upper.get(zone_id.strip().upper())
+    if zone is None:
+        return f"No movement data recorded for zone {zone_id.upper()} in that time window."
+    count = int(visits[zone])
+    rank = int((visits > count).sum()) + 1
+    period = f"{start_date} to {end_date}" if start_date is not None else "all recorded days"
+    return (
+        f"Visits between {start_hour:02d}:00 and {end_hour:02d}:00 ({period}): "
+        f"**{count}** (rank {rank} of {len(visits)} zones)."
+    )
+
+
 @tool
-def get_zone_performance(zone_id: str) -> str:
+def get_zone_performance(zone_id: str, start_hour: int = None, end_hour: int = None, last_n_days: int = None) -> str:
     """
     Provides detailed performance metrics for a specific store zone (e.g., 'A1', 'B5').
     Includes products in zone, total visits, online views of products, and zone category (Hot/Cold).
+    Optionally also reports the zone's visits in a time window: start_hour/end_hour (0-24, e.g. 18 and 20
+    for 18:00-20:00) and last_n_days (e.g. 7 for "last week", counted back from the latest recorded day).
     """
     print(f"DEBUG: get_zone_performance called for zone_id: {zone_id}")
     df = _load_final_insights_df()
@@ -149,7 +120,10 @@ def get_zone_performance(zone_id: str) -> str:
     response += "\nProducts in this zone:\n"
     for prod in products_in_zone:
         response += f"- {prod['Product_Name']} (In-store visits: {prod['Visits']}, Online views: {prod['Online_Views']})\n"
-    
+
+    if start_hour is not None or end_hour is not None or last_n_days:
+        response += _zone_window_summary(zone_id, start_hour, end_hour, last_n_days) + "\n"
+
     print(f"DEBUG: get_zone_performance response: {response[:100]}...") # Print a snippet
     return response.strip()
 
@@ -164,11 +138,11 @@ def get_product_insights(product_name: str) -> str:
     if df.empty:
         return "Final insights data not available. Please ensure final_insights.py has been run."
 
-    # Use .str.contains for flexible matching, but guide LLM to be precise
-    product_data = df[df['Product_Name'].str.contains(product_name, case=False, na=False)]
+    # Case-insensitive substring match through the shared product index
+    product_data = match_products(df, product_name)
 
     if product_data.empty:
-        return f"No data found for product '{product_name}'. Please provide a valid product name."
+        return f"No data found for product '{product_name}'. Please provide a valid product name." + _did_you_mean(df, product_name)
 
     # If multiple products match (e.g., "juice" matches "Apple Juice", "Orange Juice")
     if len(product_data) > 1:
@@ -258,7 +232,7 @@ def get_hot_cold_zones() -> str:
 @tool
 def get_past_relocation_outcomes(product_name: str = None, zone: str = None) -> str:
     """
-    Retrieves recorded outcomes of past product relocations from the agent's memory (decision_log.json).
+    Retrieves recorded outcomes of past product relocations from the agent's memory (the decision store).
     Can retrieve all outcomes or filter by a specific product name or zone.
 
     Args:
@@ -266,32 +240,20 @@ def get_past_relocation_outcomes(product_name: str = None, zone: str = None) ->
         zone (str, optional): Filter by a zone involved in the move (old or new).
     """
     print(f"DEBUG: get_past_relocation_outcomes called for product_name={product_name}, zone={zone}")
-    decision_log = _load_decision_log()
-    if not decision_log:
+    if not has_decisions():
         return "Agent memory is empty. No past relocation outcomes have been recorded yet."
 
-    relevant_outcomes = decision_log
-    if product_name:
-        relevant_outcomes = [entry for entry in relevant_outcomes if entry['product_name'].lower() == product_name.lower()]
+    zones = None
     if zone:
         zone_l = zone.lower()
         if zone_l in ("hot", "cold"):
             df = _load_final_insights_df()
-            zone_set = set(
+            zones = set(
                 df[df["Zone_Category"].str.lower() == zone_l]["Zone"].str.upper()
             )
-            relevant_outcomes = [
-                entry
-                for entry in relevant_outcomes
-                if entry["old_zone"].upper() in zone_set or entry["new_zone"].upper() in zone_set
-            ]
         else:
-            zone_u = zone.upper()
-            relevant_outcomes = [
-                entry
-                for entry in relevant_outcomes
-                if entry["old_zone"].upper() == zone_u or entry["new_zone"].upper() == zone_u
-            ]
+            zones = [zone]
+    relevant_outcomes = query_decisions(product_name=product_name, zones=zones)
     if not relevant_outcomes:
         filters = []
         if product_name:
@@ -326,18 +288,13 @@ def record_relocation_outcome(product_name: str, old_zone: str, new_zone: str, o
     """
     print(f"DEBUG: record_relocation_outcome called for {product_name} from {old_zone} to {new_zone}.")
     try:
-        current_log = _load_decision_log()
-        
-        new_entry = {
-            "product_name": product_name,
-            "old_zone": old_zone,
-            "new_zone": new_zone,
-            "date": datetime.now().date().isoformat(),
-            "outcome_description": outcome_description,
-        }
-        
-        current_log.append(new_entry)
-        _save_decision_log(current_log)
+        append_decision(
+            product_name=product_name,
+            old_zone=old_zone,
+            new_zone=new_zone,
+            date=datetime.now().date().isoformat(),
+            outcome_description=outcome_description,
+        )
         
         response = f"Successfully recorded relocation outcome for {product_name} from {old_zone} to {new_zone}. Simulated Impact: This data will help ShelfSense provide more accurate future recommendations."
         print(f"DEBUG: record_relocation_outcome success: {response}")
@@ -356,9 +313,9 @@ def explain_relocation_reason(product_name: str) -> str:
     if insights_df.empty:
         return "Final insights data not available. Please ensure final_insights.py has been run."
 
-    product_df = insights_df[insights_df['Product_Name'].str.contains(product_name, case=False, na=False)]
+    product_df = match_products(insights_df, product_name)
     if product_df.empty:
-        return f"No data found for product '{product_name}'. Please provide a valid product name."
+        return f"No data found for product '{product_name}'. Please provide a valid product name." + _did_you_mean(insights_df, product_name)
     if len(product_df) > 1:
         matches = ", ".join(product_df['Product_Name'].tolist())
         return f"Multiple products match '{product_name}'. Please be more specific. Matches: {matches}"
@@ -371,7 +328,7 @@ def explain_relocation_reason(product_name: str) -> str:
     online_views = int(product_row['Online_Views'])
 
     relocation_df = _load_relocation_plan_df()
-    relocation_match = relocation_df[relocation_df['Product_Name'].str.contains(product_name, case=False, na=False)] if not relocation_df.empty else pd.DataFrame()
+    relocation_match = match_products(relocation_df, product_name) if not relocation_df.empty else pd.DataFrame()
 
     if relocation_match.empty:
         return (
@@ -416,9 +373,8 @@ def run_store_layout_optimizer() -> str:
 def get_relocation_score(product_name: str) -> str:
     """Return the relocation score and suggested zone for a given product."""
     path = os.path.join(INSIGHTS_DIR, "relocation_intelligence.csv")
-    if os.path.exists(path) and os.path.getsize(path) > 0:
-        df = pd.read_csv(path)
-    else:
+    df = load_dataset(path)
+    if df.empty:
         try:
             from relocation_intelligence import generate_relocation_scores
             df = generate_relocation_scores()
@@ -426,9 +382,9 @@ def get_relocation_score(product_name: str) -> str:
             return f"Failed to compute relocation score: {e}"
     if df.empty:
         return "Relocation intelligence data is unavailable."
-    match = df[df['Product_Name'].str.contains(product_name, case=False, na=False)]
+    match = match_products(df, product_name)
     if match.empty:
-        return f"No relocation score found for '{product_name}'."
+        return f"No relocation score found for '{product_name}'." + _did_you_mean(df, product_name)
     row = match.iloc[0]
     return (
         f"{row['Product_Name']} currently in {row['Current_Zone']} has a relocation score of "
@@ -439,14 +395,10 @@ def get_relocation_score(product_name: str) -> str:
 @tool
 def get_dwell_time_by_zone() -> str:
     """Compute average dwell time per zone from movement logs."""
-    df = _load_df(MOVEMENTS_PATH)
-    if df.empty or 'Timestamp' not in df.columns:
+    stats = get_zone_stats()
+    if stats['Footfall'].sum() == 0:
         return "Movement data unavailable."
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-    df = df.sort_values(['Customer_ID', 'Timestamp'])
-    df['Next_Time'] = df.groupby('Customer_ID')['Timestamp'].shift(-1)
-    df['Dwell'] = (df['Next_Time'] - df['Timestamp']).dt.total_seconds()
-    dwell = df.groupby('Zone')['Dwell'].mean().dropna()
+    dwell = stats['Mean_Dwell'].dropna()
     if dwell.empty:
         return "Not enough movement data to compute dwell time."
     lines = ["Average dwell time by zone (seconds):"]
@@ -454,22 +406,49 @@ def get_dwell_time_by_zone() -> str:
         lines.append(f"- {zone}: {sec:.1f}")
     return "\n".join(lines)
 
+def _format_zone_conversion(table):
+    return "\n".join(["Zone conversion rates:"] + [
+        f"- {zone}: {rate:.2f}" for zone, rate in zip(table['Zone'], table['Conversion_Rate'])
+    ])
+
+
 @tool
-def get_conversion_rate_by_zone() -> str:
-    """Return conversion rate (sales/visits) for each zone."""
-    visits_df = _load_df(MOVEMENTS_PATH)
-    sales_df = _load_df(os.path.join(DATA_DIR, 'pos_sales.csv'))
-    if visits_df.empty or sales_df.empty:
+def get_conversion_rate_by_zone(granularity: str = "zone") -> str:
+    """Return conversion rate (sales/visits) for each zone.
+    granularity can be 'zone' (default), 'hour' (store conversion per hour of day, from sales_by_hour.csv)
+    or 'day' (store conversion per date), each with the best converting zone of that hour or day.
+    Without dated sales, 'day' lists the daily visits and says sales are undated.
+    """
+    granularity = (granularity or "zone").strip().lower()
+    if granularity not in GRANULARITIES:
+        return f"Unknown granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}."
+    table = get_conversion_table(granularity)
+    if table.empty:
         return "Movement or sales data unavailable."
-    visits = visits_df['Zone'].value_counts()
-    result_lines = ["Zone conversion rates:"]
-    for _, row in sales_df.iterrows():
-        zone = row['Zone']
-        sales = row['Sales']
-        v = visits.get(zone, 0)
-        rate = sales / v if v > 0 else 0
-        result_lines.append(f"- {zone}: {rate:.2f}")
-    return "\n".join(result_lines)
+    if granularity == "zone":
+        return _format_zone_conversion(table)
+
+    part = "Hour" if granularity == "hour" else "Date"
+    totals = store_conversion(granularity)
+    if totals['Sales'].isna().all():
+        # Undated sales: the movement log still gives the daily visits
+        busiest = table.loc[table.groupby(part)['Visits'].idxmax()].set_index(part)
+        lines = [f"Daily conversion unavailable: {UNDATED_SALES_NOTE}. Store visits by date (sales are undated):"]
+        for label, visits in zip(totals[part], totals['Visits']):
+            lines.append(f"- {label}: {visits} visits, busiest zone {busiest.at[label, 'Zone']} "
+                         f"({busiest.at[label, 'Visits']})")
+        return "\n".join(lines)
+    # Zones without visits would divide by 1, so only visited zones compete for "best"
+    visited = table[table['Visits'] > 0]
+    best = visited.loc[visited.groupby(part)['Conversion_Rate'].idxmax()].set_index(part) if not visited.empty else visited
+    lines = [f"Store conversion rates by {part.lower()}:"]
+    for label, visits, sales, rate in zip(totals[part], totals['Visits'], totals['Sales'], totals['Conversion_Rate']):
+        label_text = f"{label:02d}:00" if part == "Hour" else str(label)
+        line = f"- {label_text}: {rate:.2f} ({sales} sales / {visits} visits)"
+        if label in best.index:
+            line += f", best zone {best.at[label, 'Zone']} ({best.at[label, 'Conversion_Rate']:.2f})"
+        lines.append(line)
+    return "\n".join(lines)
 
 @tool
 def get_sales_velocity(product_name: str) -> str:
@@ -477,15 +456,14 @@ def get_sales_velocity(product_name: str) -> str:
     insights_df = _load_final_insights_df()
     if insights_df.empty:
         return "Insights data unavailable."
-    prod_df = insights_df[insights_df['Product_Name'].str.contains(product_name, case=False, na=False)]
+    prod_df = match_products(insights_df, product_name)
     if prod_df.empty:
-        return f"Product '{product_name}' not found."
+        return f"Product '{product_name}' not found." + _did_you_mean(insights_df, product_name)
     row = prod_df.iloc[0]
     zone = row['Zone']
-    sales_df = _load_df(os.path.join(DATA_DIR, 'pos_sales.csv'))
-    sales = sales_df.loc[sales_df['Zone'] == zone, 'Sales'].sum() if not sales_df.empty else 0
-    move_df = _load_df(MOVEMENTS_PATH)
-    visits = (move_df['Zone'] == zone).sum() if not move_df.empty else 0
+    stats = get_zone_stats()
+    sales = stats['Sales'].get(zone, 0)
+    visits = stats['Footfall'].get(zone, 0)
     velocity = sales / visits if visits else sales
     return (
         f"{row['Product_Name']} in zone {zone} has a sales velocity of {velocity:.2f} units per visit "
@@ -497,13 +475,14 @@ def get_inventory_reorder_recommendations() -> str:
     """Suggest products that need reordering based on stock levels."""
     stock_path = os.path.join(DATA_DIR, 'stock_levels.csv')
     alert_path = os.path.join('insights', 'stock_alerts.csv')
-    stock_df = _load_df(stock_path)
+    stock_df = load_dataset(stock_path)
     if stock_df.empty:
         return "Stock level data not available."
     threshold = max(5, int(stock_df['Stock'].quantile(0.25)))
     low_df = stock_df[stock_df['Stock'] <= threshold]
     if low_df.empty:
         return "All products sufficiently stocked."
+    os.makedirs(INSIGHTS_DIR, exist_ok=True)
     low_df.to_csv(alert_path, index=False)
     lines = ["Products needing reorder:"]
     for _, r in low_df.iterrows():
@@ -513,29 +492,58 @@ def get_inventory_reorder_recommendations() -> str:
 @tool
 def get_customer_journey_patterns() -> str:
     """Identify common customer paths through the store."""
-    df = _load_df(MOVEMENTS_PATH)
-    if df.empty:
+    stats = get_movement_stats(MOVEMENTS_PATH)
+    if not stats['zones']:
         return "Movement data unavailable."
-    df = df.sort_values(['Customer_ID', 'Timestamp'])
-    transitions = df.groupby('Customer_ID')['Zone'].apply(lambda x: list(x))
-    pairs = {}
-    for path in transitions:
-        for i in range(len(path) - 1):
-            pair = (path[i], path[i+1])
-            pairs[pair] = pairs.get(pair, 0) + 1
-    if not pairs:
+    top = top_transitions(stats, top_n=5)
+    if not top:
         return "Not enough data to derive journeys."
-    top = sorted(pairs.items(), key=lambda x: x[1], reverse=True)[:5]
     lines = ["Top customer movements:"]
-    for (a,b), count in top:
+    for a, b, count in top:
         lines.append(f"- {a} → {b}: {count} times")
     return "\n".join(lines)
 
+@tool
+def get_top_paths_through_zone(zone: str, top_n: int = 5) -> str:
+    """List the most common three-zone customer paths that pass through a zone."""
+    paths = top_paths_through(zone, k=top_n, steps=2, path=MOVEMENTS_PATH)
+    if not paths:
+        return f"No customer paths found through zone {zone}."
+    lines = [f"Top customer paths through {zone}:"]
+    for zones, count in paths:
+        lines.append(f"- {' → '.join(zones)}: {count} times")
+    return "\n".join(lines)
+
+@tool
+def get_next_zone_after(zone: str, top_n: int = 3) -> str:
+    """Return the zones customers most often visit right after the given zone."""
+    nxt = next_zones(zone, k=top_n, path=MOVEMENTS_PATH)
+    if not nxt:
+        return f"No movements recorded after zone {zone}."
+    lines = [f"Most common next zones after {zone}:"]
+    for z, count, share in nxt:
+        lines.append(f"- {z}: {count} times ({share:.0%})")
+    return "\n".join(lines)
+
+@tool
+def get_top_multi_step_paths(steps: int = 2, top_n: int = 5) -> str:
+    """List the most common customer paths of 1 or 2 consecutive zone moves."""
+    try:
+        paths = top_paths(steps=steps, k=top_n, path=MOVEMENTS_PATH)
+    except ValueError as e:
+        return str(e)
+    if not paths:
+        return "Not enough data to derive journeys."
+    lines = [f"Top {steps}-step customer paths:"]
+    for zones, count in paths:
+        lines.append(f"- {' → '.join(zones)}: {count} times")
+    return "\n".join(lines)
+
 @tool
 def suggest_seasonal_layout_changes() -> str:
     """Provide seasonal placement suggestions from seasonal_plan.csv."""
     path = os.path.join('insights', 'seasonal_plan.csv')
-    df = _load_df(path)
+    df = load_dataset(path)
     if df.empty:
         return "Seasonal plan data unavailable."
     lines = ["Seasonal relocation suggestions:"]
@@ -546,8 +554,8 @@ def suggest_seasonal_layout_changes() -> str:
 @tool
 def compare_layout_metrics(before_csv: str, after_csv: str) -> str:
     """Compare zone visit totals before and after a layout change."""
-    before = _load_df(before_csv)
-    after = _load_df(after_csv)
+    before = load_dataset(before_csv)
+    after = load_dataset(after_csv)
     if before.empty or after.empty:
         return "One of the layout files is missing or empty."
     diff = after['Visits'].sum() - before['Visits'].sum()
@@ -574,11 +582,11 @@ def fetch_complementary_products(product_name: str) -> str:
     df = _load_final_insights_df()
     if df.empty:
         return "Product insights unavailable."
-    products = df[df['Product_Name'].str.contains(product_name, case=False, na=False)]
+    products = match_products(df, product_name)
     if products.empty:
-        return f"Product '{product_name}' not found."
-    all_products = df['Product_Name'].tolist()
-    comp = [p for p in all_products if p not in products['Product_Name'].tolist()]
+        return f"Product '{product_name}' not found." + _did_you_mean(df, product_name)
+    matched = set(products['Product_Name'])
+    comp = [p for p in df['Product_Name'].tolist() if p not in matched]
     suggestions = comp[:3]
     return "Complementary items: " + ", ".join(suggestions)
 
@@ -601,14 +609,10 @@ def get_real_time_placement_recommendation(event_context: str) -> str:
 @tool
 def get_zone_conversion_rate() -> str:
     """Return conversion rate per zone using movements and POS sales."""
-    from conversion_rate_analysis import calculate_zone_conversion_rates
-    df = calculate_zone_conversion_rates()
+    df = get_conversion_table("zone")
     if df.empty:
         return "Conversion rate data unavailable."
-    lines = ["Zone conversion rates:"]
-    for _, r in df.iterrows():
-        lines.append(f"- {r['Zone']}: {r['Conversion_Rate']:.2f}")
-    return "\n".join(lines)
+    return _format_zone_conversion(df)
 
 
 @tool
@@ -627,9 +631,9 @@ def get_declining_products() -> str:
 @tool
 def compare_dwell_time(zone_a: str, zone_b: str) -> str:
     """Compare average dwell time between two zones."""
-    if not os.path.exists('data/dwell_time.csv'):
+    df = load_dataset(os.path.join(DATA_DIR, 'dwell_time.csv'))
+    if df.empty:
         return "Dwell time data not available."
-    df = pd.read_csv('data/dwell_time.csv')
     a = df[df['Zone'] == zone_a]['Avg_Dwell_Time'].mean()
     b = df[df['Zone'] == zone_b]['Avg_Dwell_Time'].mean()
     if pd.isna(a) or pd.isna(b):
@@ -652,10 +656,7 @@ def suggest_complementary_pairs() -> str:
     """
     Returns a list of complementary product placement pairs based on category similarity and current location.
     """
-    if not os.path.exists(PRODUCT_CATEGORY_MAP_PATH):
-        return "Product category mapping file not available."
-
-    df = pd.read_csv(PRODUCT_CATEGORY_MAP_PATH)
+    df = load_dataset(PRODUCT_CATEGORY_MAP_PATH)
     if df.empty:
         return "Product category mapping file not available."
 
@@ -708,10 +709,9 @@ def recommend_product_placement() -> str:
 @tool
 def analyze_restock_needs() -> str:
     """Analyze restock log for recent activity."""
-    path = os.path.join('data', 'restock_log.csv')
-    if not os.path.exists(path):
+    df = load_dataset(os.path.join(DATA_DIR, 'restock_log.csv'))
+    if df.empty:
         return "Restock log not found."
-    df = pd.read_csv(path)
     recent = df.tail(3)
     lines = ["Recent restocks:"]
     for _, r in recent.iterrows():
@@ -737,8 +737,8 @@ def get_low_conversion_hot_zones() -> str:
     """Identify hot zones with many visits but low sales."""
     insights_df = _load_final_insights_df()
     sales_path = os.path.join(DATA_DIR, 'sales_by_hour.csv')
-    sales_df = _load_df(sales_path)
-    layout_df = _load_df(STORE_LAYOUT_PATH)
+    sales_df = load_dataset(sales_path)
+    layout_df = load_dataset(STORE_LAYOUT_PATH)
     if insights_df.empty or sales_df.empty or layout_df.empty:
         return "Required data unavailable."
     sales_totals = sales_df.groupby('Product_ID')['Sales'].sum().reset_index()
@@ -785,8 +785,8 @@ def simulate_relocation_swap(product_a: str, zone_a: str, product_b: str, zone_b
     df = _load_final_insights_df()
     if df.empty:
         return "Final insights data not available."
-    a_row = df[df['Product_Name'].str.contains(product_a, case=False, na=False)]
-    b_row = df[df['Product_Name'].str.contains(product_b, case=False, na=False)]
+    a_row = match_products(df, product_a)
+    b_row = match_products(df, product_b)
     if a_row.empty or b_row.empty:
         return "One of the products not found."
     a_vis = int(a_row.iloc[0]['Visits'])
@@ -804,8 +804,8 @@ def get_high_online_low_pos_products(top_n: int = 5) -> str:
     """Products with high online views but low POS sales."""
     insights_df = _load_final_insights_df()
     sales_path = os.path.join(DATA_DIR, 'sales_by_hour.csv')
-    sales_df = _load_df(sales_path)
-    layout_df = _load_df(STORE_LAYOUT_PATH)
+    sales_df = load_dataset(sales_path)
+    layout_df = load_dataset(STORE_LAYOUT_PATH)
     if insights_df.empty or sales_df.empty or layout_df.empty:
         return "Required data unavailable."
     sales_totals = sales_df.groupby('Product_ID')['Sales'].sum().reset_index()
@@ -825,11 +825,10 @@ def get_high_online_low_pos_products(top_n: int = 5) -> str:
 @tool
 def get_last_month_relocations() -> str:
     """Retrieve relocation decisions from the last month."""
-    log = _load_decision_log()
-    if not log:
+    if not has_decisions():
         return "No relocation history available."
     cutoff = datetime.now() - pd.Timedelta(days=30)
-    recent = [d for d in log if datetime.fromisoformat(d['date']) >= cutoff]
+    recent = query_decisions(since=cutoff.isoformat())
     if not recent:
         return "No relocations in the last month."
     lines = ["Relocations in the last month:"]
@@ -847,7 +846,7 @@ def recommend_seasonal_plan(festival: str) -> str:
         from seasonal_planner import generate_seasonal_plan
         generate_seasonal_plan(festival)
         path = os.path.join('insights', 'seasonal_plan.csv')
-        df = _load_df(path)
+        df = load_dataset(path)
         if df.empty:
             return "Seasonal plan data unavailable."
         top = df.head(5)
@@ -882,3 +881,8 @@ def trigger_stock_alerts() -> str:
     except Exception as e:
         return f"Failed to generate alerts: {e}"
 
+
+
+# Every tool reports latency, data reads and result size to tool_metrics
+for _tool in [obj for obj in list(globals().values()) if isinstance(obj, BaseTool)]:
+    instrument_tool(_tool)
@@ -0,0 +1,128 @@
+"""Import-time profile of the HeatSight entry points.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+(``repeat`` times, keeping the fastest run so bytecode compilation does not
+count) and its total import time is checked against ``IMPORT_BUDGETS``. The
+report lists the packages that cost the most, by their own import time, and
+is saved as JSON; the exit status is 1 when a module is over budget.
+
+    python import_profile.py
+    python import_profile.py relocation_engine stock_alerts --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_PROFILE_PATH = os.path.join("insights", "import_profile.json")
+TOP_PACKAGES = 8
+
+# Seconds allowed for a cold import of each entry point. Batch scripts should not
+# pull in the agent or plotting stacks; the dashboard loads those lazily.
+IMPORT_BUDGETS = {
+    "relocation_engine": 1.0,
+    "stock_alerts": 1.0,
+    "Final_insights": 1.0,
+    "layout_optimizer": 1.0,
+    "seasonal_planner": 1.0,
+    "simulation_engine": 1.0,
+    "pos_heatmap": 1.0,
+    "heatsight_tools": 1.5,
+    "main": 4.0,
+}
+
+
+def _parse_importtime(stderr, module):
+    """``(total_s, {package: self_s})`` for ``module`` from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        rows.append((int(self_us), int(cumulative_us), name[1:]))
+
+    # Modules are listed after their own imports: the entry's rows are the ones
+    # between the previous top-level import (interpreter startup) and itself
+    total_us, start, end = 0, 0, len(rows)
+    for i, (_, cumulative_us, name) in enumerate(rows):
+        if not name.startswith(" "):
+            if name == module:
+                total_us, end = cumulative_us, i + 1
+                break
+            start = i + 1
+    by_package = defaultdict(int)
+    for self_us, _, name in rows[start:end]:
+        by_package[name.strip().split(".")[0]] += self_us
+    return total_us / 1e6, {k: v / 1e6 for k, v in by_package.items()}
+
+
+def profile_module(module, repeat=3):
+    """Fastest of ``repeat`` cold imports of ``module``, with its costliest packages."""
+    env = dict(os.environ, MPLBACKEND="Agg")
+    best = None
+    for _ in range(max(repeat, 1)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+            return {"module": module, "error": error}
+        total, packages = _parse_importtime(proc.stderr, module)
+        if best is None or total < best[0]:
+            best = (total, packages)
+    total, packages = best
+    top = sorted(packages.items(), key=lambda item: -item[1])[:TOP_PACKAGES]
+    budget = IMPORT_BUDGETS.get(module)
+    return {
+        "module": module,
+        "import_s": round(total, 4),
+        "budget_s": budget,
+        "over_budget": budget is not None and total > budget,
+        "top_packages": [{"package": name, "self_s": round(secs, 4)} for name, secs in top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of HeatSight entry points.")
+    parser.add_argument("modules", nargs="*", help="Modules to profile (default: every budgeted module)")
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest counts")
+    parser.add_argument("--output", default=IMPORT_PROFILE_PATH)
+    args = parser.parse_args()
+
+    results = [profile_module(m, args.repeat) for m in (args.modules or list(IMPORT_BUDGETS))]
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for r in results:
+        if "error" in r:
+            print(f"{r['module']:<20} ERROR {r['error']}")
+            continue
+        budget = f"{r['budget_s']:.2f}s" if r["budget_s"] is not None else "-"
+        flag = "  OVER BUDGET" if r["over_budget"] else ""
+        top = ", ".join(f"{p['package']} {p['self_s']:.2f}s" for p in r["top_packages"][:4])
+        print(f"{r['module']:<20} {r['import_s']:.3f}s (budget {budget}){flag}  [{top}]")
+    print(f"\nImport profile saved to {args.output}")
+
+    if any(r.get("over_budget") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Persisted n-gram index of customer paths through the store.
+
+Consecutive zone visits of each customer are counted as bigrams and trigrams
+(``MAX_ORDER``) in one streamed pass over the movement log and saved to
+``insights/journey_index.npz`` (in the active store's folder) together with
+the log's signature. Every order is stored sorted by count, and per-zone
+offsets are built once on load, so the journey queries below slice a
+precomputed list instead of rescanning customers.
+"""
+import os
+import threading
+
+import numpy as np
+
+from data_registry import file_signature, store_file
+from movement_stream import MOVEMENTS_PATH, iter_customer_partitions
+
+JOURNEY_INDEX_PATH = os.path.join("insights", "journey_index.npz")
+MAX_ORDER = 3
+
+_INDEX = {}
+_LOCK = threading.Lock()
+
+
+def _count_ngrams(zone, same, order, n_zones):
+    """Encoded keys and counts of the ``order``-grams that stay within one customer."""
+    n = len(zone) - order + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    valid = np.ones(n, dtype=bool)
+    keys = np.zeros(n, dtype=np.int64)
+    for k in range(order):
+        if k < order - 1:
+            valid &= same[k:k + n]
+        keys = keys * n_zones + zone[k:k + n]
+    return np.unique(keys[valid], return_counts=True)
+
+
+def build_journey_index(path=MOVEMENTS_PATH, max_order=MAX_ORDER):
+    """Count zone n-grams (orders 2..``max_order``) across every customer path."""
+    zones = []
+    partial = {order: ([], []) for order in range(2, max_order + 1)}
+    for zones, cust, _, zone in iter_customer_partitions(path):
+        same = cust[:-1] == cust[1:]
+        zone = zone.astype(np.int64)
+        for order in partial:
+            keys, counts = _count_ngrams(zone, same, order, len(zones))
+            partial[order][0].append(keys)
+            partial[order][1].append(counts)
+
+    index = {"zones": np.array(zones, dtype=str)}
+    n_zones = max(len(zones), 1)
+    for order, (key_parts, count_parts) in partial.items():
+        keys = np.concatenate(key_parts) if key_parts else np.zeros(0, dtype=np.int64)
+        counts = np.concatenate(count_parts) if count_parts else np.zeros(0, dtype=np.int64)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+        ranked = np.argsort(-counts, kind="stable")
+        keys, counts = keys[ranked], counts[ranked]
+        paths = np.empty((len(keys), order), dtype=np.int32)
+        for k in range(order - 1, -1, -1):
+            paths[:, k] = keys % n_zones
+            keys = keys // n_zones
+        index[f"paths{order}"] = paths
+        index[f"counts{order}"] = counts
+    return index
+
+
+def _zone_offsets(paths, n_zones, positions):
+    """CSR lists of path rows per zone appearing at any of ``positions``, best first."""
+    zone_col = paths[:, positions].ravel()
+    rows = np.repeat(np.arange(len(paths)), len(positions))
+    # Rows are already ranked by count, so sorting by (zone, row) keeps that order
+    pairs = np.unique(zone_col.astype(np.int64) * len(paths) + rows) if len(paths) else np.zeros(0, dtype=np.int64)
+    zone_of = pairs // max(len(paths), 1)
+    offsets = np.searchsorted(zone_of, np.arange(n_zones + 1))
+    return offsets, pairs % max(len(paths), 1)
+
+
+def _prepare(index):
+    zones = [str(z) for z in index["zones"]]
+    index["zone_codes"] = {z: i for i, z in enumerate(zones)}
+    index["zone_codes_upper"] = {z.upper(): i for i, z in enumerate(zones)}
+    index["zone_names"] = zones
+    for order in range(2, MAX_ORDER + 1):
+        paths = index[f"paths{order}"]
+        index[f"through{order}"] = _zone_offsets(paths, len(zones), list(range(order)))
+        index[f"starting{order}"] = _zone_offsets(paths, len(zones), [0])
+    return index
+
+
+def save_journey_index(index, signature, path=JOURNEY_INDEX_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {k: v for k, v in index.items() if k == "zones" or k.startswith(("paths", "counts"))}
+    arrays["source"] = np.array([signature[1], signature[2]], dtype=np.int64)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_saved(signature, path=JOURNEY_INDEX_PATH):
+    try:
+        with np.load(path) as data:
+            if tuple(data["source"]) != (signature[1], signature[2]):
+                return None
+            index = {k: data[k] for k in data.files if k != "source"}
+    except (OSError, KeyError, ValueError):
+        return None
+    if any(f"paths{order}" not in index for order in range(2, MAX_ORDER + 1)):
+        return None
+    return index
+
+
+def get_journey_index(path=MOVEMENTS_PATH):
+    """Return the journey index, rebuilding and re-saving it if the log changed."""
+    sig = file_signature(path)
+    key = sig[0] if sig is not None else path
+    with _LOCK:
+        cached = _INDEX.get(key)
+        if cached is not None and cached[0] == sig:
+            return cached[1]
+        index = None
+        if sig is not None:
+            index = _load_saved(sig, store_file(JOURNEY_INDEX_PATH))
+            if index is None:
+                index = build_journey_index(path)
+                try:
+                    save_journey_index(index, sig, store_file(JOURNEY_INDEX_PATH))
+                except OSError as e:
+                    print(f"Warning: could not save journey index: {e}")
+        if index is None:
+            index = build_journey_index(path)
+        index = _prepare(index)
+        _INDEX[key] = (sig, index)
+        return index
+
+
+def _zone_code(index, zone):
+    code = index["zone_codes"].get(zone)
+    if code is None:
+        code = index["zone_codes_upper"].get(str(zone).strip().upper())
+    return code
+
+
+def _rows(index, order, rows):
+    names = index["zone_names"]
+    paths = index[f"paths{order}"]
+    counts = index[f"counts{order}"]
+    return [(tuple(names[z] for z in paths[r]), int(counts[r])) for r in rows]
+
+
+def top_paths(steps=1, k=5, path=MOVEMENTS_PATH):
+    """Most common paths of ``steps`` consecutive moves as ``(zones, count)``."""
+    order = steps + 1
+    if not 2 <= order <= MAX_ORDER:
+        raise ValueError(f"steps must be between 1 and {MAX_ORDER - 1}")
+    index = get_journey_index(path)
+    return _rows(index, order, range(min(k, len(index[f"counts{order}"]))))
+
+
+def top_paths_through(zone, k=5, steps=2, path=MOVEMENTS_PATH):
+    """Most common ``steps``-move paths that pass through ``zone``."""
+    order = steps + 1
+    if not 2 <= order <= MAX_ORDER:
+        raise ValueError(f"steps must be between 1 and {MAX_ORDER - 1}")
+    index = get_journey_index(path)
+    code = _zone_code(index, zone)
+    if code is None:
+        return []
+    offsets, rows = index[f"through{order}"]
+    return _rows(index, order, rows[offsets[code]:min(offsets[code] + k, offsets[code + 1])])
+
+
+def next_zones(zone, k=5, path=MOVEMENTS_PATH):
+    """Most common next zones after ``zone`` as ``(zone, count, share)``."""
+    index = get_journey_index(path)
+    code = _zone_code(index, zone)
+    if code is None:
+        return []
+    offsets, rows = index["starting2"]
+    counts = index["counts2"]
+    total = counts[rows[offsets[code]:offsets[code + 1]]].sum()
+    return [
+        (zones[1], count, count / total)
+        for zones, count in _rows(index, 2, rows[offsets[code]:min(offsets[code] + k, offsets[code + 1])])
+    ]
+
+
+if __name__ == "__main__":
+    for zones, count in top_paths(steps=2, k=10):
+        print(" > ".join(zones), count)
@@ -5,30 +5,21 @@ from typing import Dict
 
 import numpy as np
 import pandas as pd
-from heatsight_tools import _load_final_insights_df
+from data_registry import file_signature, load_dataset, store_aware, store_file
+from zone_stats import get_zone_stats
 
+FINAL_INSIGHTS_PATH = os.path.join('insights', 'final_product_insights.csv')
 OPTIMIZED_LAYOUT_PATH = os.path.join('insights', 'optimized_layout.csv')
 
 # Path for caching past relocations
 RELOCATION_MEMORY_PATH = 'relocation_memory.json'
 
-# Data directories may vary in casing across platforms
-DATA_DIRS = ['data', 'Data']
-
-
-def _find_data_file(filename: str) -> str:
-    """Return the first existing path for filename in known data dirs."""
-    for d in DATA_DIRS:
-        path = os.path.join(d, filename)
-        if os.path.exists(path):
-            return path
-    # default to first dir
-    return os.path.join(DATA_DIRS[0], filename)
+POS_SALES_PATH = os.path.join('data', 'pos_sales.csv')
 
 
 def optimize_layout():
     """Greedy layout optimizer assigning top products to highest traffic zones."""
-    df = _load_final_insights_df()
+    df = load_dataset(FINAL_INSIGHTS_PATH)
     if df.empty:
         print('Final insights unavailable. Layout not optimized.')
         pd.DataFrame().to_csv(OPTIMIZED_LAYOUT_PATH, index=False)
@@ -46,6 +37,17 @@ def optimize_layout():
     print(f'Optimized layout saved to {OPTIMIZED_LAYOUT_PATH}')
 
 
+def _days_since(record: Dict, now: datetime) -> int:
+    """Days since a relocation memory record was written (9999 if unknown)."""
+    if 'timestamp' not in record:
+        return 9999
+    try:
+        return (now - datetime.fromisoformat(record['timestamp'])).days
+    except Exception:
+        return 9999
+
+
+@store_aware
 def optimize_store_layout(alpha: float = 0.4, beta: float = 0.4, gamma: float = 0.2,
                            theta: float = 0.5, delta: float = 0.3, kappa: float = 0.2) -> pd.DataFrame:
     """Smart optimizer combining footfall, POS sales and online interest.
@@ -53,38 +55,22 @@ def optimize_store_layout(alpha: float = 0.4, beta: float = 0.4, gamma: float =
     Returns a DataFrame with suggested product placements sorted by zone desirability."""
 
     # Load datasets
-    final_df = _load_final_insights_df()
+    final_df = load_dataset(FINAL_INSIGHTS_PATH)
     if final_df.empty:
         print('Final product insights unavailable. Cannot optimize layout.')
         return pd.DataFrame()
 
-    movements_path = _find_data_file('movements.csv')
-    sales_path = _find_data_file('pos_sales.csv')
-
-    movements_df = pd.read_csv(movements_path) if os.path.exists(movements_path) else pd.DataFrame()
-
-    if os.path.exists(sales_path):
-        pos_sales_df = pd.read_csv(sales_path)
-    else:
+    if file_signature(POS_SALES_PATH) is None:
         # create random sales if missing
         layout_zones = final_df['Zone'].unique()
         np.random.seed(0)
         pos_sales_df = pd.DataFrame({'Zone': layout_zones,
                                      'Sales': np.random.randint(50, 200, len(layout_zones))})
-        os.makedirs(os.path.dirname(sales_path), exist_ok=True)
-        pos_sales_df.to_csv(sales_path, index=False)
+        os.makedirs(os.path.dirname(store_file(POS_SALES_PATH)), exist_ok=True)
+        pos_sales_df.to_csv(store_file(POS_SALES_PATH), index=False)
 
-    # Compute footfall per zone
-    if not movements_df.empty:
-        footfall_df = movements_df.groupby('Zone').size().reset_index(name='Footfall')
-    else:
-        footfall_df = pd.DataFrame({'Zone': final_df['Zone'].unique(), 'Footfall': 0})
-
-    zone_df = pd.merge(pos_sales_df, footfall_df, on='Zone', how='outer').fillna(0)
-    zone_df['Conversion_Rate'] = zone_df.apply(
-        lambda r: (r['Sales'] / r['Footfall']) if r['Footfall'] else 0,
-        axis=1
-    )
+    # Footfall, sales and conversion per zone come from the shared zone stats table
+    zone_df = get_zone_stats()[['Footfall', 'Sales', 'Conversion_Rate']].reset_index()
     zone_df['Zone_Score'] = (
         alpha * zone_df['Footfall'] + beta * zone_df['Sales'] + gamma * zone_df['Conversion_Rate']
     )
@@ -95,82 +81,86 @@ def optimize_store_layout(alpha: float = 0.4, beta: float = 0.4, gamma: float =
     final_df['Past_Sales'] = final_df['Past_Sales'].fillna(0)
 
     # Load relocation memory
-    if os.path.exists(RELOCATION_MEMORY_PATH) and os.path.getsize(RELOCATION_MEMORY_PATH) > 0:
-        with open(RELOCATION_MEMORY_PATH, 'r') as f:
+    memory_path = store_file(RELOCATION_MEMORY_PATH)
+    if os.path.exists(memory_path) and os.path.getsize(memory_path) > 0:
+        with open(memory_path, 'r') as f:
             relocation_mem: Dict[str, Dict] = json.load(f)
     else:
         relocation_mem = {}
 
     now = datetime.now()
 
-    def penalty(product_id: str) -> float:
-        record = relocation_mem.get(product_id)
-        if not record:
-            return 0.0
-        try:
-            last_time = datetime.fromisoformat(record['timestamp'])
-            days = (now - last_time).days
-        except Exception:
-            days = 9999
-        return -1.0 / (days + 1)
-
-    final_df['Penalty'] = final_df['Product_ID'].apply(penalty)
+    # Per-product memory constraints, computed once: the zone it was last
+    # suggested for, and whether it was moved within a week and still sells.
+    product_ids = final_df['Product_ID'].tolist()
+    records = [relocation_mem.get(pid) or {} for pid in product_ids]
+    days_since = np.array([_days_since(rec, now) for rec in records])
+    mem_sales = np.array([rec.get('sales', 0) for rec in records], dtype=float)
+    mem_zone = np.array([rec.get('zone') for rec in records], dtype=object)
+
+    penalty = np.where([bool(rec) for rec in records], -1.0 / (days_since + 1), 0.0)
     final_df['Product_Score'] = (
         theta * final_df['Online_Views'] +
         delta * final_df['Past_Sales'] +
-        kappa * final_df['Penalty']
+        kappa * penalty
     )
+    final_df['Blocked'] = (days_since < 7) & (final_df['Past_Sales'].to_numpy() >= mem_sales * 0.5)
+    final_df['Memory_Zone'] = mem_zone
+
+    zones_sorted = zone_df.sort_values('Zone_Score', ascending=False)
+    products_sorted = final_df.sort_values('Product_Score', ascending=False)
 
-    zones_sorted = zone_df.sort_values('Zone_Score', ascending=False).reset_index(drop=True)
-    products_sorted = final_df.sort_values('Product_Score', ascending=False).reset_index(drop=True)
+    zone_ids = zones_sorted['Zone'].tolist()
+    zone_scores = zones_sorted['Zone_Score'].tolist()
+    zone_footfall = zones_sorted['Footfall'].tolist()
+    zone_sales = zones_sorted['Sales'].tolist()
+
+    prod_ids = products_sorted['Product_ID'].tolist()
+    prod_names = products_sorted['Product_Name'].tolist()
+    prod_scores = products_sorted['Product_Score'].to_numpy()
+    prod_mem_zone = products_sorted['Memory_Zone'].to_numpy()
+    # Blocked products can never be placed, so they start out as taken
+    taken = products_sorted['Blocked'].to_numpy(dtype=bool).copy()
 
     assignments = []
+    first_free = 0
+    n_products = len(prod_ids)
 
-    for _, zone_row in zones_sorted.iterrows():
-        if products_sorted.empty:
-            break
-        for idx, prod_row in products_sorted.iterrows():
-            pid = prod_row['Product_ID']
-            mem_rec = relocation_mem.get(pid, {})
-            if mem_rec.get('zone') == zone_row['Zone']:
-                continue  # avoid repeating the same suggestion
-
-            days_since = 9999
-            if 'timestamp' in mem_rec:
-                try:
-                    days_since = (now - datetime.fromisoformat(mem_rec['timestamp'])).days
-                except Exception:
-                    days_since = 9999
-
-            if days_since < 7 and prod_row['Past_Sales'] >= mem_rec.get('sales', 0) * 0.5:
-                continue
-
-            explanation = (
-                f"Zone score {zone_row['Zone_Score']:.2f} (footfall {zone_row['Footfall']}, "
-                f"sales {zone_row['Sales']}) matches product score {prod_row['Product_Score']:.2f}."
-            )
-
-            assignments.append({
-                'Zone': zone_row['Zone'],
-                'Product_ID': pid,
-                'Product_Name': prod_row['Product_Name'],
-                'Why_This_Zone': explanation
-            })
-
-            relocation_mem[pid] = {
-                'zone': zone_row['Zone'],
-                'timestamp': now.isoformat(),
-                'sales': zone_row['Sales']
-            }
-
-            products_sorted = products_sorted.drop(idx).reset_index(drop=True)
+    for z, zone in enumerate(zone_ids):
+        while first_free < n_products and taken[first_free]:
+            first_free += 1
+        if first_free == n_products:
             break
-
-    with open(RELOCATION_MEMORY_PATH, 'w') as f:
+        # Best remaining product, skipping only those last suggested for this zone
+        i = first_free
+        while i < n_products and (taken[i] or prod_mem_zone[i] == zone):
+            i += 1
+        if i == n_products:
+            continue
+
+        taken[i] = True
+        pid = prod_ids[i]
+        explanation = (
+            f"Zone score {zone_scores[z]:.2f} (footfall {zone_footfall[z]}, "
+            f"sales {zone_sales[z]}) matches product score {prod_scores[i]:.2f}."
+        )
+        assignments.append({
+            'Zone': zone,
+            'Product_ID': pid,
+            'Product_Name': prod_names[i],
+            'Why_This_Zone': explanation
+        })
+        relocation_mem[pid] = {
+            'zone': zone,
+            'timestamp': now.isoformat(),
+            'sales': zone_sales[z]
+        }
+
+    with open(memory_path, 'w') as f:
         json.dump(relocation_mem, f, indent=4)
 
     result_df = pd.DataFrame(assignments)
-    result_df.to_csv(OPTIMIZED_LAYOUT_PATH, index=False)
+    result_df.to_csv(store_file(OPTIMIZED_LAYOUT_PATH), index=False)
     print(f'Smart optimized layout saved to {OPTIMIZED_LAYOUT_PATH}')
     return result_df
 
@@ -1,24 +1,16 @@
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import numpy as np
 import os
-import json
-import time
 
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
 
-from seasonal_planner import generate_seasonal_plan
-from layout_optimizer import optimize_store_layout
-from staff_scheduler import generate_staff_schedule
-from pos_heatmap import generate_pos_sales_heatmap
-from stock_alerts import generate_stock_alerts
+from pos_heatmap import get_pos_sales_heatmap_png
+from heatmap_renderer import heatmap_png
+from store_grid import zone_grid
+from data_registry import file_signature, fingerprint, load_dataset
+from zone_stats import MOVEMENTS_PATH, get_zone_stats
+from traffic_cube import cube_dates, get_traffic_cube, zone_traffic
+from tool_metrics import export_metrics, metrics_frame, to_prometheus
 
 # --- UPDATED IMPORTS FOR HEATSIHGT_TOOLS ---
 from heatsight_tools import (
@@ -34,6 +26,9 @@ from heatsight_tools import (
     get_sales_velocity,
     get_inventory_reorder_recommendations,
     get_customer_journey_patterns,
+    get_top_paths_through_zone,
+    get_next_zone_after,
+    get_top_multi_step_paths,
     suggest_seasonal_layout_changes,
     compare_layout_metrics,
     run_what_if_placement,
@@ -63,20 +58,104 @@ from heatsight_tools import (
 load_dotenv()
 
 
-# Caching heavy CSV files to speed up repeated access
-@st.cache_data
-def load_final_insights():
-    return pd.read_csv("insights/final_product_insights.csv")
+# Heavy CSV files are cached by the shared data registry, which re-reads a file
+# only after it changes on disk so regenerated data shows up on the next rerun.
+def _load_required(path):
+    df = load_dataset(path)
+    if df.empty:
+        raise FileNotFoundError(path)
+    return df
 
 
-@st.cache_data
-def load_movements():
-    return pd.read_csv("data/movements.csv")
+def load_final_insights():
+    return _load_required(os.path.join("insights", "final_product_insights.csv"))
 
 
-@st.cache_data
 def load_pos_sales():
-    return pd.read_csv("data/pos_sales.csv")
+    return _load_required(os.path.join("data", "pos_sales.csv"))
+
+
+# --- UPDATED TOOLS LIST ---
+COPILOT_TOOLS = [
+    get_zone_performance,
+    get_product_insights,
+    get_relocation_plan_summary,
+    record_relocation_outcome,
+    explain_relocation_reason,
+    run_store_layout_optimizer,
+    get_relocation_score,
+    get_dwell_time_by_zone,
+    get_conversion_rate_by_zone,
+    get_sales_velocity,
+    get_inventory_reorder_recommendations,
+    get_customer_journey_patterns,
+    get_top_paths_through_zone,
+    get_next_zone_after,
+    get_top_multi_step_paths,
+    suggest_seasonal_layout_changes,
+    compare_layout_metrics,
+    run_what_if_placement,
+    fetch_complementary_products,
+    get_real_time_placement_recommendation,
+    get_zone_conversion_rate,
+    get_declining_products,
+    compare_dwell_time,
+    get_complementary_products,
+    suggest_complementary_pairs,
+    get_top_footfall_zones,
+    get_low_conversion_hot_zones,
+    get_products_to_relocate,
+    get_past_relocation_outcomes,
+    get_relocation_reason,
+    simulate_relocation_swap,
+    get_high_online_low_pos_products,
+    get_last_month_relocations,
+    recommend_seasonal_plan,
+    get_impulse_placement_suggestions,
+    recommend_product_placement,
+    analyze_restock_needs,
+    trigger_stock_alerts,
+]
+# --- END UPDATED TOOLS LIST ---
+
+COPILOT_SYSTEM_PROMPT = (
+    "You are ShelfSense AI, a retail optimization copilot. "
+    "You help analyze shelf performance, recommend product relocations, simulate changes, and give business insights across footfall, POS sales, and online interest. "
+    "You have access to memory, real-time data files, and tools to analyze store layout and behavior. "
+    "Use the get_past_relocation_outcomes tool whenever a user asks about prior moves or relocation history. "
+    "You can use category-level complementary logic to enhance placement strategy."
+)
+
+
+def _build_agent_executor():
+    # The LLM client and agent stack are only imported when the copilot is first used
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain.agents import AgentExecutor, create_tool_calling_agent
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain.memory import ConversationBufferMemory
+
+    # Tools are instrumented by heatsight_tools (see tool_metrics)
+    tools = list(COPILOT_TOOLS)
+    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.5)
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", COPILOT_SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ]
+    )
+    conversational_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True, k=3)
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=True, memory=conversational_memory).with_config({"timeout": 20})
+
+
+def get_agent_executor():
+    """Agent executor for this browser session, built on first use and reused
+    across reruns so the LLM client, tools and chat memory are created once."""
+    if "agent_executor" not in st.session_state:
+        st.session_state.agent_executor = _build_agent_executor()
+    return st.session_state.agent_executor
 
 st.set_page_config(
     layout="wide",
@@ -267,14 +346,15 @@ Welcome to HeatSight, an innovative solution for Walmart's Sparkathon! This plat
 </p>
 """, unsafe_allow_html=True)
 
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
     "📊 Dashboard Overview",
     "🔥 In-Store Heatmap",
     "💵 POS Sales Heatmap",
     "📈 Omnichannel Insights",
     "🚚 Relocation Intelligence 🔥",
     "🤖 ShelfSense Copilot",
-    "🧠 Ask Anything"
+    "🧠 Ask Anything",
+    "⏱️ Tool Metrics"
 ])
 
 with tab1:
@@ -316,37 +396,43 @@ with tab1:
 with tab2:
     st.header("🔥 In-Store Customer Movement Heatmap")
     st.markdown("""
-    Visualizing customer traffic patterns across the store's 10x10 grid.
+    Visualizing customer traffic patterns across the store's zone grid.
     <span style='color: #FFC300; font-weight: bold;'>Darker reds indicate 'Hot' zones with higher customer visits</span>,
     while lighter areas are 'Cold' zones.
     """, unsafe_allow_html=True)
 
+    def build_visit_grid():
+        # Visit counts come from the shared zone stats table instead of a raw log scan
+        zone_counts = get_zone_stats()["Footfall"]
+        if zone_counts.empty or zone_counts.sum() == 0:
+            raise FileNotFoundError("data/movements.csv")
+        return zone_grid(zone_counts.index, zone_counts.to_numpy())
+
     try:
-        # Assuming movements.csv is still in 'data/'
-        movement_df = load_movements()
-        zone_counts = movement_df["Zone"].value_counts().to_dict()
-
-        rows = [chr(ord('A') + i) for i in range(10)]
-        cols = range(1, 11)
-
-        heatmap_grid = np.zeros((len(rows), len(cols)), dtype=int)
-        for r_idx, row_label in enumerate(rows):
-            for c_idx, col_label in enumerate(cols):
-                zone_name = f"{row_label}{col_label}"
-                heatmap_grid[r_idx, c_idx] = zone_counts.get(zone_name, 0)
-
-        fig, ax = plt.subplots(figsize=(12, 10))
-        sns.heatmap(heatmap_grid, annot=True, fmt="d", cmap="YlOrRd",
-                    xticklabels=cols, yticklabels=rows, linewidths=.5, linecolor='lightgray', ax=ax)
-        ax.set_title("Heatmap of In-Store Zone Visits", fontsize=16, color='#f0f0f0')
-        ax.set_xlabel("Shelf Column", fontsize=12, color='#f0f0f0')
-        ax.set_ylabel("Shelf Row", fontsize=12, color='#f0f0f0')
-        ax.tick_params(axis='x', rotation=0, colors='#e0e0e0')
-        ax.tick_params(axis='y', rotation=0, colors='#e0e0e0')
-        ax.set_facecolor('#121212')
-        fig.patch.set_facecolor('#121212')
-        plt.tight_layout()
-        st.pyplot(fig)
+        if file_signature(MOVEMENTS_PATH) is None:
+            raise FileNotFoundError("data/movements.csv")
+
+        traffic_cube = get_traffic_cube()
+        date_bounds = cube_dates(traffic_cube)
+        if date_bounds is None:
+            raise FileNotFoundError("data/movements.csv")
+        hours = st.slider("Hour of day", 0, 24, (0, 24), help="Visits from the start hour up to (not including) the end hour.")
+        days = date_bounds
+        if date_bounds and date_bounds[0] < date_bounds[1]:
+            days = st.slider("Dates", min_value=date_bounds[0], max_value=date_bounds[1], value=date_bounds)
+
+        if hours == (0, 24) and days == date_bounds:
+            # The PNG is only re-rendered when the movement log changes
+            png, _ = heatmap_png("zone_visits", fingerprint(MOVEMENTS_PATH), build_visit_grid,
+                                 "Heatmap of In-Store Zone Visits")
+        else:
+            # Windows are sliced from the precomputed cube; each slice is a few array lookups
+            visits = zone_traffic(hours[0], hours[1], days[0], days[1], include_undated=False, cube=traffic_cube)
+            png, _ = heatmap_png("zone_visits_window", (fingerprint(MOVEMENTS_PATH), hours, days),
+                                 lambda: zone_grid(visits.index, visits.to_numpy()),
+                                 f"Zone Visits {hours[0]:02d}:00-{hours[1]:02d}:00, {days[0]} to {days[1]}",
+                                 persist=False)
+        st.image(png, use_column_width=True)
 
     except FileNotFoundError:
         st.error("Error: 'data/movements.csv' not found. Please run `movements.py`.")
@@ -371,6 +457,7 @@ with tab4:
         with col_dist1:
             st.write("Breakdown of Hot vs. Cold Zones by Count:")
             zone_category_counts = final_insights_df["Zone_Category"].value_counts()
+            import matplotlib.pyplot as plt
             fig_cat, ax_cat = plt.subplots(figsize=(6, 4))
             zone_category_counts.plot(kind='bar', ax=ax_cat, color=['#FFC300', '#007ACC'])
             ax_cat.set_title("Distribution of Hot vs. Cold Zones", color='#f0f0f0')
@@ -414,81 +501,8 @@ with tab6:
     It can analyze data, explain trends, and provide recommendations using its intelligent tools and memory.
     """)
 
-    # --- UPDATED TOOLS LIST ---
-    tools = [
-        get_zone_performance,
-        get_product_insights,
-        get_relocation_plan_summary,
-        record_relocation_outcome,
-        explain_relocation_reason,
-        run_store_layout_optimizer,
-        get_relocation_score,
-        get_dwell_time_by_zone,
-        get_conversion_rate_by_zone,
-        get_sales_velocity,
-        get_inventory_reorder_recommendations,
-        get_customer_journey_patterns,
-        suggest_seasonal_layout_changes,
-        compare_layout_metrics,
-        run_what_if_placement,
-        fetch_complementary_products,
-        get_real_time_placement_recommendation,
-        get_zone_conversion_rate,
-        get_declining_products,
-        compare_dwell_time,
-        get_complementary_products,
-        suggest_complementary_pairs,
-        get_top_footfall_zones,
-        get_low_conversion_hot_zones,
-        get_products_to_relocate,
-        get_past_relocation_outcomes,
-        get_relocation_reason,
-        simulate_relocation_swap,
-        get_high_online_low_pos_products,
-        get_last_month_relocations,
-        recommend_seasonal_plan,
-        get_impulse_placement_suggestions,
-        recommend_product_placement,
-        analyze_restock_needs,
-        trigger_stock_alerts,
-    ]
-
-    def profile_tool(tool):
-        original = tool.func
-        def wrapped(*args, **kwargs):
-            start = time.time()
-            result = original(*args, **kwargs)
-            duration = time.time() - start
-            print(f"TOOL {tool.name} executed in {duration:.2f}s")
-            return result
-        tool.func = wrapped
-        return tool
-
-    tools = [profile_tool(t) for t in tools]
-    # --- END UPDATED TOOLS LIST ---
-
     try:
-        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.5)
-        
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are ShelfSense AI, a retail optimization copilot. "
-                    "You help analyze shelf performance, recommend product relocations, simulate changes, and give business insights across footfall, POS sales, and online interest. "
-                    "You have access to memory, real-time data files, and tools to analyze store layout and behavior. "
-                    "Use the get_past_relocation_outcomes tool whenever a user asks about prior moves or relocation history. "
-                    "You can use category-level complementary logic to enhance placement strategy."
-                ),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad"),
-            ]
-        )
-
-        conversational_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True, k=3)
-        agent = create_tool_calling_agent(llm, tools, prompt)
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, memory=conversational_memory).with_config({"timeout": 20})
+        agent_executor = get_agent_executor()
 
         st.info("ShelfSense is ready to assist! Try asking: 'What are the top relocation recommendations?' or 'Tell me about product Formal Shirt Men.' You can also try: 'Record that Dettol was moved from A1 to B5 and sales increased by 10%.'")
 
@@ -519,9 +533,7 @@ with tab6:
 
 with tab3:
     st.header("POS Sales Heatmap")
-    fig = generate_pos_sales_heatmap()
-
-    st.pyplot(fig)
+    st.image(get_pos_sales_heatmap_png(), use_column_width=True)
 
 with tab7:
     st.header("🧠 Ask Anything")
@@ -554,3 +566,20 @@ with tab7:
             st.write(recommend_product_placement.func())
         else:
             st.write("I'll need more context to answer that.")
+
+with tab8:
+    st.header("⏱️ ShelfSense Tool Metrics")
+    st.markdown("Latency, data reads and result sizes of every agent tool call in this server process.")
+    metrics_df = metrics_frame()
+    if metrics_df.empty:
+        st.info("No tool calls recorded yet. Ask the Copilot something first.")
+    else:
+        st.dataframe(metrics_df)
+        st.bar_chart(metrics_df.set_index("Tool")["Mean_ms"])
+        col_a, col_b = st.columns(2)
+        with col_a:
+            if st.button("Export metrics"):
+                json_path, prom_path = export_metrics()
+                st.success(f"Metrics written to {json_path} and {prom_path}")
+        with col_b:
+            st.download_button("Download Prometheus text", to_prometheus(), file_name="tool_metrics.prom")
@@ -0,0 +1,254 @@
+"""Monte Carlo evaluation of candidate store layouts.
+
+Customer trajectories from ``movements.csv`` are resampled (bootstrap over
+customers) and replayed against each candidate layout. Every product carries a
+purchase rate per zone visit estimated from the current layout and hourly
+sales; a customer's expected purchases under a layout are the sum of the rates
+of the products placed in the zones they walk through, and realised purchases
+are drawn from a Poisson distribution around that expectation.
+
+Trials are split into a fixed number of chunks, each with its own child of one
+``SeedSequence``, and the chunks are spread over a process pool whose workers
+receive the expected-purchase matrix once at start-up. Results depend
+only on the seed and the chunk count, not on how many workers ran them, so a
+run is reproducible on any machine while scaling with the available cores.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_registry import load_dataset
+
+MOVEMENTS_PATH = os.path.join("data", "movements.csv")
+STORE_LAYOUT_PATH = os.path.join("data", "store_layout.csv")
+SALES_BY_HOUR_PATH = os.path.join("data", "sales_by_hour.csv")
+MONTE_CARLO_OUTPUT_PATH = os.path.join("insights", "layout_monte_carlo.csv")
+
+DEFAULT_TRIALS = 1000
+# Trials are always split into this many seeded chunks so that the result does
+# not depend on the worker count.
+N_CHUNKS = 32
+BASELINE = "current"
+TARGET_ZONE_COLUMNS = ["Recommended_Zone", "Suggested_Zone", "New_Zone", "Zone"]
+
+# Per-worker copy of the expected purchases, set once by the pool initializer
+_WORKER = {}
+
+
+def load_trajectories():
+    """Return ``(customer_codes, zone_codes, zones)`` for every movement event."""
+    movements = load_dataset(MOVEMENTS_PATH)
+    if movements.empty or not {"Customer_ID", "Zone"}.issubset(movements.columns):
+        return np.array([], dtype=int), np.array([], dtype=int), pd.Index([])
+    customers = pd.Categorical(movements["Customer_ID"].astype(str)).codes
+    zone_cat = pd.Categorical(movements["Zone"].astype(str))
+    return customers, zone_cat.codes, pd.Index(zone_cat.categories)
+
+
+def product_rates(layout_df: pd.DataFrame, zones: pd.Index, zone_footfall: np.ndarray) -> pd.Series:
+    """Purchases per zone visit for each product under the current layout."""
+    sales_df = load_dataset(SALES_BY_HOUR_PATH)
+    if sales_df.empty:
+        sales = pd.Series(0.0, index=layout_df["Product_ID"].unique())
+    else:
+        sales = sales_df.groupby("Product_ID")["Sales"].sum()
+    current = layout_df.drop_duplicates("Product_ID").set_index("Product_ID")["Zone"].astype(str)
+    footfall = pd.Series(zone_footfall, index=zones).reindex(current.values).fillna(0).to_numpy()
+    rates = sales.reindex(current.index).fillna(0).to_numpy(dtype=float) / np.maximum(footfall, 1)
+    return pd.Series(rates, index=current.index)
+
+
+def zone_rates(layout_df: pd.DataFrame, rates: pd.Series, zones: pd.Index) -> np.ndarray:
+    """Summed purchase rate of the products a layout places in each zone."""
+    placed = layout_df.drop_duplicates("Product_ID", keep="last")
+    codes = zones.get_indexer(placed["Zone"].astype(str))
+    weights = rates.reindex(placed["Product_ID"]).fillna(0).to_numpy()
+    known = codes >= 0
+    return np.bincount(codes[known], weights=weights[known], minlength=len(zones))
+
+
+def apply_moves(layout_df: pd.DataFrame, moves) -> pd.DataFrame:
+    """Copy of ``layout_df`` with ``moves`` (``{Product_ID: Zone}``) applied."""
+    layout = layout_df.copy()
+    moved = layout["Product_ID"].map(moves)
+    layout["Zone"] = moved.fillna(layout["Zone"])
+    return layout
+
+
+def _simulate_chunk(mu: np.ndarray, visits: np.ndarray, n_trials: int, seed, product_mu=None) -> dict:
+    """Run ``n_trials`` bootstrap replays for every layout column of ``mu``.
+
+    ``product_mu`` (customers x layouts) holds one product's own expected
+    purchases; its resampled totals are returned as ``product_expected``.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers, n_layouts = mu.shape
+    sales = np.empty((n_trials, n_layouts))
+    converted = np.empty((n_trials, n_layouts))
+    sales_per_visit = np.empty((n_trials, n_layouts))
+    expected = np.empty((n_trials, n_layouts))
+    product_expected = np.empty((n_trials, n_layouts))
+    for t in range(n_trials):
+        # Common random numbers: every layout replays the same resampled customers
+        sample = rng.integers(0, n_customers, n_customers)
+        sample_mu = mu[sample]
+        purchases = rng.poisson(sample_mu)
+        sales[t] = purchases.sum(axis=0)
+        converted[t] = (purchases > 0).mean(axis=0)
+        sales_per_visit[t] = sales[t] / max(visits[sample].sum(), 1)
+        expected[t] = sample_mu.sum(axis=0)
+        if product_mu is not None:
+            product_expected[t] = product_mu[sample].sum(axis=0)
+    result = {"sales": sales, "conversion": converted, "sales_per_visit": sales_per_visit, "expected": expected}
+    if product_mu is not None:
+        result["product_expected"] = product_expected
+    return result
+
+
+def _init_worker(mu: np.ndarray, visits: np.ndarray, product_mu=None):
+    _WORKER["mu"] = mu
+    _WORKER["visits"] = visits
+    _WORKER["product_mu"] = product_mu
+
+
+def _worker_chunk(n_trials: int, seed) -> dict:
+    """``_simulate_chunk`` over the arrays shipped to this worker by ``_init_worker``."""
+    return _simulate_chunk(_WORKER["mu"], _WORKER["visits"], n_trials, seed, _WORKER["product_mu"])
+
+
+def _uplift_pct(expected: np.ndarray) -> np.ndarray:
+    """Per-trial uplift of every column against the first, from expected (not drawn) sales.
+
+    Poisson draws are independent per layout, so their ratio would add noise and
+    bias; the resampled expectations give exactly 0 for an unchanged layout.
+    """
+    base = expected[:, :1]
+    ratio = np.divide(expected, base, out=np.ones_like(expected), where=base > 0)
+    return (ratio - 1) * 100
+
+
+def _interval(values: np.ndarray, ci: float):
+    tail = (1 - ci) / 2 * 100
+    return np.percentile(values, tail, axis=0), np.percentile(values, 100 - tail, axis=0)
+
+
+def simulate_layouts(layouts=None, n_trials: int = DEFAULT_TRIALS, seed: int = 0,
+                     ci: float = 0.95, max_workers=None, product_id=None) -> pd.DataFrame:
+    """Estimate sales and conversion distributions for candidate layouts.
+
+    Args:
+        layouts: ``{name: layout_df}`` with ``Product_ID`` and ``Zone`` columns;
+            products missing from a candidate keep their current zone. The
+            current store layout is always evaluated as ``"current"``.
+        n_trials: number of bootstrap replays per layout.
+        seed: root seed; the same seed always gives the same result.
+        ci: width of the reported percentile confidence intervals.
+        max_workers: process pool size (default: all cores; 1 runs inline).
+        product_id: also report this product's own expected-sales uplift
+            (``Product_Uplift_Pct_*``), e.g. for a single relocation.
+
+    Returns:
+        One row per layout with mean and interval of total sales, conversion
+        (share of customers buying anything), sales per zone visit and the
+        uplift in expected sales against the current layout over the same
+        resampled customers.
+    """
+    layout_df = load_dataset(STORE_LAYOUT_PATH)
+    customers, zone_codes, zones = load_trajectories()
+    if layout_df.empty or customers.size == 0:
+        print("Warning: store layout or movement data missing. Monte Carlo simulation skipped.")
+        return pd.DataFrame()
+
+    zone_footfall = np.bincount(zone_codes, minlength=len(zones))
+    rates = product_rates(layout_df, zones, zone_footfall)
+
+    names = [BASELINE]
+    placements = [layout_df]
+    for name, candidate in (layouts or {}).items():
+        names.append(name)
+        placements.append(pd.concat([layout_df[["Product_ID", "Zone"]], candidate[["Product_ID", "Zone"]]]))
+    lam = np.column_stack([zone_rates(placed, rates, zones) for placed in placements])
+
+    # Expected purchases per customer and layout: sum over their zone visits
+    n_customers = customers.max() + 1
+    mu = np.column_stack([
+        np.bincount(customers, weights=lam[zone_codes, j], minlength=n_customers)
+        for j in range(lam.shape[1])
+    ])
+    visits = np.bincount(customers, minlength=n_customers)
+    product_mu = None
+    if product_id is not None:
+        # The product's own expected purchases: its rate times visits to the zone it sits in
+        product_zones = [placed.drop_duplicates("Product_ID", keep="last").set_index("Product_ID")["Zone"]
+                         .astype(str).get(product_id) for placed in placements]
+        codes = zones.get_indexer(pd.Index(product_zones, dtype=object))
+        product_mu = np.column_stack([
+            np.bincount(customers, weights=(zone_codes == code) * rates.get(product_id, 0.0), minlength=n_customers)
+            for code in codes
+        ])
+
+    n_chunks = min(N_CHUNKS, n_trials)
+    chunk_trials = np.diff(np.linspace(0, n_trials, n_chunks + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    chunk_trials = [int(n) for n in chunk_trials]
+    if max_workers == 1:
+        chunks = [_simulate_chunk(mu, visits, n, s, product_mu) for n, s in zip(chunk_trials, seeds)]
+    else:
+        # mu is shipped once per worker; tasks carry only their trial count and seed
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(mu, visits, product_mu)) as pool:
+            chunks = list(pool.map(_worker_chunk, chunk_trials, seeds))
+
+    draws = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+    draws["uplift_pct"] = _uplift_pct(draws.pop("expected"))
+    metrics = [("sales", "Sales"), ("conversion", "Conversion"),
+               ("sales_per_visit", "Sales_per_Visit"), ("uplift_pct", "Uplift_Pct")]
+    if product_mu is not None:
+        draws["product_uplift_pct"] = _uplift_pct(draws.pop("product_expected"))
+        metrics.append(("product_uplift_pct", "Product_Uplift_Pct"))
+
+    result = pd.DataFrame({"Layout": names})
+    for key, label in metrics:
+        low, high = _interval(draws[key], ci)
+        result[f"{label}_Mean"] = draws[key].mean(axis=0)
+        result[f"{label}_CI_Low"] = low
+        result[f"{label}_CI_High"] = high
+    result["Trials"] = n_trials
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of candidate store layouts.")
+    parser.add_argument("layouts", nargs="*", help="Candidate layout CSVs with Product_ID and Zone columns")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    candidates = {}
+    for path in args.layouts:
+        df = load_dataset(path)
+        if df.empty:
+            continue
+        # Relocation plans name the target zone differently per planner
+        target = next((c for c in TARGET_ZONE_COLUMNS if c in df.columns), None)
+        if target is None or "Product_ID" not in df.columns:
+            print(f"Warning: {path} has no Product_ID/target zone columns. Skipping.")
+            continue
+        df = df[["Product_ID", target]].rename(columns={target: "Zone"}).dropna()
+        candidates[os.path.basename(path)] = df
+
+    result = simulate_layouts(candidates, n_trials=args.trials, seed=args.seed, max_workers=args.workers)
+    if result.empty:
+        return
+    os.makedirs(os.path.dirname(MONTE_CARLO_OUTPUT_PATH), exist_ok=True)
+    result.to_csv(MONTE_CARLO_OUTPUT_PATH, index=False)
+    print(result.to_string(index=False))
+    print(f"Monte Carlo results saved to {MONTE_CARLO_OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
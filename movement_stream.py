@@ -0,0 +1,303 @@
+"""Bounded-memory pass over the movement log.
+
+The log is read in chunks and every row is routed to a partition by a hash of
+its ``Customer_ID``, spilling each partition to a temporary file. All events of
+one customer therefore land in the same partition, and each partition is then
+sorted and reduced on its own. Peak memory is one read chunk plus one
+partition, regardless of how many days of movements the file holds. When
+``columnar_cache`` has a fresh Parquet copy of the log, the typed copy is read
+instead of parsing the CSV.
+
+A single pass yields per-zone footfall, unique customers, summed/mean dwell
+(seconds until the customer's next event) and a zones x zones transition
+matrix of consecutive moves.
+
+The log is read up to the size it had when the pass started and only complete
+lines count; ``stats["read"]`` records that offset together with a watermark
+(inode and a checksum of the bytes before it), so incremental readers can pick
+up exactly where the pass stopped and detect a log that was rewritten.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import columnar_path, columnar_signature
+from data_registry import file_signature, record_read
+
+MOVEMENTS_PATH = os.path.join("data", "movements.csv")
+LOG_COLUMNS = ["Customer_ID", "Timestamp", "Zone"]
+# Rows per batch when reading the Parquet copy of the log
+STREAM_CHUNKSIZE = 500_000
+# Bytes of CSV parsed per block by the bounded reader
+STREAM_BLOCK_BYTES = 32 * 1024 * 1024
+# Bytes before the watermark offset covered by its checksum
+WATERMARK_TAIL_BYTES = 64 * 1024
+# Target on-disk CSV bytes per partition; a partition holds roughly this much data
+PARTITION_BYTES = 256 * 1024 * 1024
+
+_RECORD = np.dtype([("customer", "<u8"), ("ts", "<i8"), ("zone", "<i4")])
+_NAT = np.iinfo(np.int64).min
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def empty_movement_stats():
+    """Statistics of an empty movement log."""
+    return {
+        "zones": [],
+        "footfall": np.zeros(0, dtype=np.int64),
+        "unique_customers": np.zeros(0, dtype=np.int64),
+        "dwell_total": np.zeros(0),
+        "dwell_count": np.zeros(0, dtype=np.int64),
+        "mean_dwell": np.zeros(0),
+        "transitions": np.zeros((0, 0), dtype=np.int64),
+        "read": None,
+    }
+
+
+def log_watermark(f, offset):
+    """Identify the first ``offset`` bytes of the open log ``f``.
+
+    Returns ``offset``, the file's inode and a SHA-256 of the bytes just before
+    ``offset``; the file position is moved.
+    """
+    start = max(offset - WATERMARK_TAIL_BYTES, 0)
+    f.seek(start)
+    tail = f.read(offset - start)
+    return {
+        "offset": offset,
+        "inode": os.fstat(f.fileno()).st_ino,
+        "tail_sha256": hashlib.sha256(tail).hexdigest(),
+    }
+
+
+def watermark_matches(path, watermark):
+    """True when ``path`` still starts with the bytes ``watermark`` was taken over."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < watermark["offset"]:
+                return False
+            return log_watermark(f, watermark["offset"]) == {
+                k: watermark.get(k) for k in ("offset", "inode", "tail_sha256")
+            }
+    except (OSError, KeyError, TypeError):
+        return False
+
+
+def read_log_blocks(path, limit, read, usecols=None, dtype=None, block_bytes=STREAM_BLOCK_BYTES, offset=None):
+    """Parse complete CSV lines of ``path`` between ``offset`` (default: after the header) and byte ``limit``.
+
+    Yields one frame per block of about ``block_bytes``; a trailing partial
+    line is left unread. ``read`` receives the header and the watermark of
+    the offset reached.
+    """
+    with open(path, "rb") as f:
+        header = f.readline().decode().strip()
+        names = header.split(",")
+        offset = max(offset or 0, f.tell())
+        f.seek(offset)
+        pending = b""
+        while offset + len(pending) < limit:
+            block = f.read(min(block_bytes, limit - offset - len(pending)))
+            if not block:
+                break
+            data = pending + block
+            end = data.rfind(b"\n") + 1
+            pending = data[end:]
+            if end:
+                yield pd.read_csv(io.BytesIO(data[:end]), header=None, names=names,
+                                  usecols=usecols, dtype=dtype)
+                offset += end
+        read.update(log_watermark(f, offset), path=path, header=header)
+
+
+def _log_chunks(path, mtime, size, read):
+    """Frames of the log's first ``size`` bytes, from its typed Parquet copy when that is fresh."""
+    if columnar_signature(path, mtime) is not None:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            pq = None
+        if pq is not None:
+            parquet = pq.ParquetFile(columnar_path(path))
+            for batch in parquet.iter_batches(batch_size=STREAM_CHUNKSIZE, columns=LOG_COLUMNS):
+                yield batch.to_pandas()
+            # The copy is at least as new as the CSV, so it covers all of it
+            with open(path, "rb") as f:
+                header = f.readline().decode().strip()
+                read.update(log_watermark(f, size), path=path, header=header)
+            return
+    yield from read_log_blocks(path, size, read, usecols=LOG_COLUMNS, dtype={"Customer_ID": str, "Zone": str})
+
+
+def _spill(chunks, n_partitions, tmpdir):
+    """Route every row to its customer partition file; return the zone vocabulary."""
+    zone_codes = {}
+    files = [open(os.path.join(tmpdir, f"part{i}.bin"), "wb") for i in range(n_partitions)]
+    try:
+        for chunk in chunks:
+            chunk = chunk.dropna(subset=["Customer_ID", "Zone"])
+            if chunk.empty:
+                continue
+            zones = pd.Categorical(chunk["Zone"])
+            for z in zones.categories:
+                zone_codes.setdefault(z, len(zone_codes))
+            remap = np.array([zone_codes[z] for z in zones.categories], dtype=np.int32)
+
+            records = np.empty(len(chunk), dtype=_RECORD)
+            records["customer"] = pd.util.hash_array(chunk["Customer_ID"].to_numpy(dtype=object))
+            ts = pd.to_datetime(chunk["Timestamp"], errors="coerce")
+            records["ts"] = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            records["zone"] = remap[zones.codes]
+
+            if n_partitions == 1:
+                records.tofile(files[0])
+                continue
+            # One sort groups the rows by partition; each file gets one contiguous slice
+            part = (records["customer"] % np.uint64(n_partitions)).astype(np.int64)
+            order = np.argsort(part, kind="stable")
+            counts = np.bincount(part, minlength=n_partitions)
+            for f, piece in zip(files, np.split(records[order], np.cumsum(counts)[:-1])):
+                if piece.size:
+                    piece.tofile(f)
+    finally:
+        for f in files:
+            f.close()
+    return list(zone_codes)
+
+
+def iter_customer_partitions(path=MOVEMENTS_PATH, n_partitions=None, read=None):
+    """Yield ``(zones, customer, ts, zone)`` for each customer partition of the log.
+
+    ``zones`` is the zone vocabulary (codes index into it). Within a partition
+    rows are sorted by customer then timestamp, so consecutive rows of the same
+    customer are consecutive events of their trip. Every customer's events are
+    in exactly one partition. The log is read up to its current size, from its
+    Parquet copy when that is fresh; ``read`` receives what was read (see
+    ``read_log_blocks``).
+    """
+    sig = file_signature(path)
+    if sig is None or sig[2] == 0:
+        return
+    resolved, mtime, size = sig
+    if n_partitions is None:
+        n_partitions = max(1, -(-size // PARTITION_BYTES))
+    read = {} if read is None else read
+
+    with tempfile.TemporaryDirectory(prefix="movement_stream_") as tmpdir:
+        try:
+            zones = _spill(_log_chunks(resolved, mtime, size, read), n_partitions, tmpdir)
+        except (pd.errors.EmptyDataError, ValueError) as e:
+            print(f"Warning: could not stream {resolved}: {e}")
+            return
+        for i in range(n_partitions):
+            records = np.fromfile(os.path.join(tmpdir, f"part{i}.bin"), dtype=_RECORD)
+            if not records.size:
+                continue
+            order = np.lexsort((records["ts"], records["customer"]))
+            records = records[order]
+            yield zones, records["customer"], records["ts"], records["zone"]
+
+
+def _reduce_partition(cust, ts, zone, n_zones, stats):
+    """Fold one customer partition into the running totals in ``stats``."""
+    stats["footfall"] += np.bincount(zone, minlength=n_zones)
+    # Customers never span partitions, so per-partition distinct counts add up
+    _, cust_idx = np.unique(cust, return_inverse=True)
+    pairs = np.unique(cust_idx.astype(np.int64) * n_zones + zone)
+    stats["unique_customers"] += np.bincount(pairs % n_zones, minlength=n_zones)
+
+    same = cust[:-1] == cust[1:]
+    src, dst = zone[:-1][same], zone[1:][same]
+    stats["transitions"] += np.bincount(src.astype(np.int64) * n_zones + dst,
+                                        minlength=n_zones * n_zones).reshape(n_zones, n_zones)
+
+    valid = same & (ts[:-1] != _NAT) & (ts[1:] != _NAT)
+    dwell = (ts[1:] - ts[:-1])[valid] / 1e9
+    dwell_zone = zone[:-1][valid]
+    stats["dwell_total"] += np.bincount(dwell_zone, weights=dwell, minlength=n_zones)
+    stats["dwell_count"] += np.bincount(dwell_zone, minlength=n_zones)
+
+
+def compute_movement_stats(path=MOVEMENTS_PATH, n_partitions=None):
+    """Stream ``path`` once and return zone-level movement statistics.
+
+    Returns a dict with ``zones`` (sorted zone names) and arrays aligned with
+    it: ``footfall``, ``unique_customers``, ``dwell_total``, ``dwell_count``,
+    ``mean_dwell`` (NaN where no dwell was observed) and the ``transitions``
+    matrix, where ``transitions[i, j]`` counts moves from zone i to zone j.
+    ``read`` holds the path, header and watermark of the bytes counted.
+    """
+    stats = None
+    zones = []
+    read = {}
+    for zones, cust, ts, zone in iter_customer_partitions(path, n_partitions, read):
+        n_zones = len(zones)
+        if stats is None:
+            stats = {
+                "footfall": np.zeros(n_zones, dtype=np.int64),
+                "unique_customers": np.zeros(n_zones, dtype=np.int64),
+                "dwell_total": np.zeros(n_zones),
+                "dwell_count": np.zeros(n_zones, dtype=np.int64),
+                "transitions": np.zeros((n_zones, n_zones), dtype=np.int64),
+            }
+        _reduce_partition(cust, ts, zone, n_zones, stats)
+    if stats is None:
+        return empty_movement_stats()
+    stats["read"] = read
+
+    # Report zones in sorted order regardless of first appearance in the log
+    order = np.argsort(np.array(zones, dtype=object), kind="stable")
+    for key in ["footfall", "unique_customers", "dwell_total", "dwell_count"]:
+        stats[key] = stats[key][order]
+    stats["transitions"] = stats["transitions"][np.ix_(order, order)]
+    stats["zones"] = [zones[i] for i in order]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats["mean_dwell"] = stats["dwell_total"] / stats["dwell_count"]
+    return stats
+
+
+def get_movement_stats(path=MOVEMENTS_PATH):
+    """Cached ``compute_movement_stats``; recomputed when the log changes."""
+    sig = file_signature(path)
+    # Keyed on the resolved file, so each store keeps its own entry
+    key = sig[0] if sig is not None else path
+    with _LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None and cached[0] == sig:
+            record_read(True)
+            return cached[1]
+        record_read(False, sig[2] if sig is not None else 0)
+        stats = compute_movement_stats(path)
+        _CACHE[key] = (sig, stats)
+        return stats
+
+
+def top_transitions(stats, top_n=5):
+    """Return the ``top_n`` most frequent ``(from_zone, to_zone, count)`` moves."""
+    matrix = stats["transitions"]
+    if matrix.size == 0:
+        return []
+    flat = matrix.ravel()
+    n_nonzero = int(np.count_nonzero(flat))
+    best = np.argsort(-flat, kind="stable")[:min(top_n, n_nonzero)]
+    zones = stats["zones"]
+    n = len(zones)
+    return [(zones[i // n], zones[i % n], int(flat[i])) for i in best]
+
+
+if __name__ == "__main__":
+    result = get_movement_stats()
+    print(pd.DataFrame({
+        "Footfall": result["footfall"],
+        "Unique_Customers": result["unique_customers"],
+        "Mean_Dwell": result["mean_dwell"],
+    }, index=result["zones"]))
+    for a, b, count in top_transitions(result):
+        print(f"{a} -> {b}: {count}")
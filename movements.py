@@ -1,52 +1,114 @@
-import pandas as pd
-import random
-from datetime import datetime, timedelta
+import argparse
 import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+STORE_LAYOUT_PATH = os.path.join("data", "store_layout.csv")
+MOVEMENTS_OUTPUT_PATH = os.path.join("data", "movements.csv")
+
+BASE_START_TIME = datetime(2025, 7, 3, 9, 0, 0)
+# Customers are generated in batches; each batch holds a customers x zones key matrix
+MAX_BATCH_CELLS = 5_000_000
+
+
+def _batch_events(rng, zones, first_customer, n_customers, min_moves, max_moves, start_time):
+    """Movement events of customers ``first_customer .. first_customer + n_customers - 1``.
+
+    Each customer visits ``min_moves..max_moves`` zones. Up to one visit per zone
+    is drawn without replacement by ranking random keys (one key matrix per
+    batch instead of a ``random.sample`` per customer); longer trips top up with
+    repeat visits, and the whole trip is then shuffled.
+    """
+    n_zones = len(zones)
+    moves = rng.integers(min_moves, max_moves + 1, n_customers)
+    width = int(moves.max())
+
+    visits = np.argsort(rng.random((n_customers, n_zones)), axis=1)[:, :min(width, n_zones)]
+    if width > n_zones:
+        extra = rng.integers(0, n_zones, (n_customers, width - n_zones))
+        visits = np.concatenate([visits, extra], axis=1)
+        # Shuffle each trip's valid prefix; padding keys sort last
+        keys = rng.random((n_customers, width))
+        keys[np.arange(width) >= moves[:, None]] = np.inf
+        visits = np.take_along_axis(visits, np.argsort(keys, axis=1), axis=1)
+    valid = np.arange(width) < moves[:, None]
+
+    start = rng.integers(0, 181, n_customers) * 60
+    step = rng.integers(15, 91, (n_customers, width))
+    # Each event is stamped before the customer spends its dwell time in the zone
+    offset = start[:, None] + np.cumsum(step, axis=1) - step
+
+    customer_ids = np.array([f"C{str(first_customer + i + 1).zfill(4)}" for i in range(n_customers)], dtype=object)
+    return pd.DataFrame({
+        "Customer_ID": np.repeat(customer_ids, moves),
+        "Timestamp": np.datetime64(start_time, "s") + offset[valid].astype("timedelta64[s]"),
+        "Zone": zones[visits[valid]],
+    })
+
+
+def generate_movements(num_customers=200, min_moves=10, max_moves=30, seed=None,
+                       layout_path=STORE_LAYOUT_PATH, output_path=MOVEMENTS_OUTPUT_PATH,
+                       output_format="csv", start_time=BASE_START_TIME):
+    """Simulate customer movements and stream them to ``output_path`` in batches.
+
+    ``output_format`` is ``"csv"`` or ``"parquet"``. Passing ``seed`` makes the
+    output reproducible. Returns the number of events written.
+    """
+    layout_df = pd.read_csv(layout_path)
+    zones = layout_df["Zone"].to_numpy(dtype=object)
+    rng = np.random.default_rng(seed)
+    batch = max(1, MAX_BATCH_CELLS // max(len(zones), max_moves))
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    writer = None
+    total = 0
+    try:
+        for first in range(0, num_customers, batch):
+            events = _batch_events(rng, zones, first, min(batch, num_customers - first),
+                                   min_moves, max_moves, start_time)
+            if output_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(events, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                # Formatting the whole column at once is several times faster than date_format
+                stamps = np.datetime_as_string(events["Timestamp"].to_numpy(dtype="datetime64[s]"), unit="s")
+                events["Timestamp"] = np.char.replace(stamps, "T", " ")
+                events.to_csv(tmp_path, mode="w" if total == 0 else "a", header=total == 0, index=False)
+            total += len(events)
+    finally:
+        if writer is not None:
+            writer.close()
+    if total:
+        os.replace(tmp_path, output_path)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate in-store customer movements.")
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--min-moves", type=int, default=10)
+    parser.add_argument("--max-moves", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--layout", default=STORE_LAYOUT_PATH)
+    parser.add_argument("--output", default=MOVEMENTS_OUTPUT_PATH)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.layout):
+        print(f"Error: {args.layout} not found. Please run store_layout.py first.")
+        return
+    total = generate_movements(args.customers, args.min_moves, args.max_moves, args.seed,
+                               args.layout, args.output, args.format)
+    print(f"Generated {args.output} with {total} customer movement records for {args.customers} customers.")
+
 
-os.makedirs("data", exist_ok=True)
-
-try:
-    layout_df = pd.read_csv("data/store_layout.csv")
-    zones = layout_df["Zone"].tolist()
-except FileNotFoundError:
-    print("Error: data/store_layout.csv not found. Please run store_layout.py first.")
-    exit()
-
-num_customers = 200
-min_movements_per_customer = 10
-max_movements_per_customer = 30
-movement_data = []
-
-base_start_time = datetime(2025, 7, 3, 9, 0, 0)
-
-for i in range(num_customers):
-    customer_id = f"C{str(i+1).zfill(4)}"
-    num_movements = random.randint(min_movements_per_customer, max_movements_per_customer)
-    
-    start_time_offset_minutes = random.randint(0, 180)
-    customer_start_time = base_start_time + timedelta(minutes=start_time_offset_minutes)
-    
-    visited_zones = random.sample(zones, min(num_movements, len(zones)))
-    if num_movements > len(zones):
-        extra_visits = random.choices(zones, k=(num_movements - len(zones)))
-        visited_zones.extend(extra_visits)
-    
-    random.shuffle(visited_zones)
-
-    current_timestamp = customer_start_time
-    for j, zone in enumerate(visited_zones):
-        time_spent_seconds = random.randint(15, 90)
-        
-        movement_data.append({
-            "Customer_ID": customer_id,
-            "Timestamp": current_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-            "Zone": zone
-        })
-        
-        current_timestamp += timedelta(seconds=time_spent_seconds)
-
-movement_df = pd.DataFrame(movement_data)
-
-movement_df.to_csv("data/movements.csv", index=False)
-
-print(f"Generated data/movements.csv with {len(movement_df)} customer movement records for {num_customers} customers.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Chain-wide batch run over every store under ``stores/<store_id>/``.
+
+Each store is processed in its own worker of a process pool: final insights,
+relocation plan, relocation scores and layout optimization run inside
+``data_registry.store_scope(store_id)``, so they read and write that store's
+``data/`` and ``insights/`` only. Every worker returns a one-row summary; the
+rows are combined into ``insights/chain_summary.csv`` at the chain level.
+
+    python multi_store.py
+    python multi_store.py store_001 store_002 --workers 4 --full
+
+For the complete per-store DAG (plans, alerts, heatmaps) run
+``python pipeline.py --store <store_id>``.
+"""
+import argparse
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_registry import list_stores, load_dataset, store_scope
+
+CHAIN_SUMMARY_PATH = os.path.join("insights", "chain_summary.csv")
+FINAL_INSIGHTS_PATH = os.path.join("insights", "final_product_insights.csv")
+RELOCATION_PLAN_PATH = os.path.join("insights", "relocation_plan.csv")
+RELOCATION_SCORES_PATH = os.path.join("insights", "relocation_intelligence.csv")
+
+
+def _store_summary(store_id):
+    """Headline numbers of the store in scope, from the outputs just written."""
+    final_df = load_dataset(FINAL_INSIGHTS_PATH)
+    plan_df = load_dataset(RELOCATION_PLAN_PATH)
+    scores_df = load_dataset(RELOCATION_SCORES_PATH)
+    summary = {
+        "Store_ID": store_id,
+        "Products": len(final_df),
+        "Zones": final_df["Zone"].nunique() if "Zone" in final_df.columns else 0,
+        "Visits": int(final_df["Visits"].sum()) if "Visits" in final_df.columns else 0,
+        "Online_Views": int(final_df["Online_Views"].sum()) if "Online_Views" in final_df.columns else 0,
+        "Cold_Zone_Products": int((final_df.get("Zone_Category") == "Cold").sum()) if not final_df.empty else 0,
+        "Planned_Relocations": len(plan_df),
+        "Mean_Relocation_Score": None,
+        "Top_Relocation_Product": None,
+    }
+    if not scores_df.empty and "Relocation_Score" in scores_df.columns:
+        summary["Mean_Relocation_Score"] = round(float(scores_df["Relocation_Score"].mean()), 4)
+        summary["Top_Relocation_Product"] = scores_df.loc[scores_df["Relocation_Score"].idxmax(), "Product_Name"]
+    return summary
+
+
+def process_store(store_id, incremental=True):
+    """Run the insights chain for one store; returns its summary row (with ``Error`` on failure)."""
+    from Final_insights import generate_final_insights
+    from relocation_engine import generate_relocation_plan
+    from relocation_intelligence import generate_relocation_scores
+    from layout_optimizer import optimize_store_layout
+
+    start = time.perf_counter()
+    try:
+        with store_scope(store_id):
+            generate_final_insights(incremental=incremental)
+            generate_relocation_plan()
+            generate_relocation_scores()
+            optimize_store_layout()
+            summary = _store_summary(store_id)
+        summary["Error"] = None
+    except Exception as e:
+        traceback.print_exc()
+        summary = {"Store_ID": store_id, "Error": f"{type(e).__name__}: {e}"}
+    summary["Seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def run_stores(store_ids=None, workers=None, incremental=True, output=CHAIN_SUMMARY_PATH):
+    """Process ``store_ids`` (default: every store) in parallel and write the chain summary.
+
+    Returns the summary frame, one row per store in ID order.
+    """
+    store_ids = list(store_ids or list_stores())
+    if not store_ids:
+        print("Warning: no stores found under stores/. Nothing to do.")
+        return pd.DataFrame()
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_store, sid, incremental): sid for sid in store_ids}
+        for future in as_completed(futures):
+            row = future.result()
+            status = f"failed ({row['Error']})" if row["Error"] else "done"
+            print(f"Store {futures[future]} {status} in {row['Seconds']:.1f}s")
+            rows.append(row)
+
+    summary = pd.DataFrame(rows).sort_values("Store_ID").reset_index(drop=True)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    summary.to_csv(output, index=False)
+    print(f"Chain summary for {len(summary)} stores saved to {output}")
+    return summary
+
+
+def chain_totals(summary):
+    """Chain-level totals of a ``run_stores`` summary."""
+    ok = summary[summary["Error"].isna()] if "Error" in summary.columns else summary
+    return {
+        "stores": len(summary),
+        "failed": len(summary) - len(ok),
+        "products": int(ok["Products"].sum()) if len(ok) else 0,
+        "visits": int(ok["Visits"].sum()) if len(ok) else 0,
+        "planned_relocations": int(ok["Planned_Relocations"].sum()) if len(ok) else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the insights chain for every store under stores/.")
+    parser.add_argument("stores", nargs="*", help="Store IDs (default: every folder under stores/)")
+    parser.add_argument("--workers", type=int, help="Stores processed in parallel (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="Rebuild final insights instead of folding new movements")
+    parser.add_argument("--output", default=CHAIN_SUMMARY_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = run_stores(args.stores, args.workers, incremental=not args.full, output=args.output)
+    if summary.empty:
+        return
+    totals = chain_totals(summary)
+    print(f"{totals['stores']} stores ({totals['failed']} failed), {totals['products']} products, "
+          f"{totals['visits']} visits, {totals['planned_relocations']} planned relocations "
+          f"in {time.perf_counter() - start:.1f}s")
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
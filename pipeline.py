@@ -0,0 +1,297 @@
+"""Headless batch runner for the HeatSight insights pipeline.
+
+Every stage declares the files it reads and writes. A stage depends on the
+earlier stages that write its inputs, write the same outputs or read what it
+overwrites, so declaration order is a valid run order and stages without a
+path between them run in parallel on a process pool.
+
+A stage is skipped when all of its outputs exist and its inputs have the same
+content (SHA-256) as after its last successful run. Hashes are recorded in
+``insights/pipeline_state.json`` together with each file's mtime and size, so
+unchanged files are not re-read. Source stages, which simulate demo data,
+only run when one of their outputs is missing, so a store's real data is
+never overwritten.
+
+    python pipeline.py
+    python pipeline.py --workers 8 --dry-run
+    python pipeline.py --force seasonal_plan stock_alerts
+    python pipeline.py --store store_001
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from data_registry import file_signature, invalidate, store_dir
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_STATE_PATH = os.path.join("insights", "pipeline_state.json")
+HASH_CHUNK_SIZE = 1 << 20
+
+LAYOUT = os.path.join("data", "store_layout.csv")
+MOVEMENTS = os.path.join("data", "movements.csv")
+ONLINE = os.path.join("data", "online_product_performance.csv")
+POS_SALES = os.path.join("data", "pos_sales.csv")
+STOCK_LEVELS = os.path.join("data", "stock_levels.csv")
+FINAL_INSIGHTS = os.path.join("insights", "final_product_insights.csv")
+RELOCATION_PLAN = os.path.join("insights", "relocation_plan.csv")
+RELOCATION_SCORES = os.path.join("insights", "relocation_intelligence.csv")
+
+# In run order. ``script`` runs as ``__main__`` with ``args``; ``call`` is "module:function".
+# Stages must rewrite every output, except ``ensure`` stages, which only create missing ones.
+STAGES = [
+    {"name": "store_layout", "script": "store_layout.py", "source": True,
+     "inputs": [], "outputs": [LAYOUT]},
+    {"name": "movements", "script": "movements.py", "source": True,
+     "inputs": [LAYOUT], "outputs": [MOVEMENTS]},
+    {"name": "online_data", "script": "online_data.py", "source": True,
+     "inputs": [LAYOUT], "outputs": [ONLINE]},
+    {"name": "pos_sales", "call": "pos_heatmap:ensure_pos_sales", "source": True, "ensure": True,
+     "inputs": [LAYOUT], "outputs": [POS_SALES]},
+    {"name": "final_insights", "script": "Final_insights.py", "args": ["--incremental"],
+     "inputs": [LAYOUT, MOVEMENTS, ONLINE], "outputs": [FINAL_INSIGHTS]},
+    {"name": "relocation_plan", "script": "relocation_engine.py",
+     "inputs": [FINAL_INSIGHTS], "outputs": [RELOCATION_PLAN]},
+    {"name": "relocation_scores", "script": "relocation_intelligence.py",
+     "inputs": [LAYOUT, FINAL_INSIGHTS, POS_SALES, MOVEMENTS], "outputs": [RELOCATION_SCORES]},
+    # Rewrites the insights and plan in place (Recommended_Zone), so it runs after their other users
+    {"name": "zone_assignment", "script": "dynamic_zone_assignment.py",
+     "inputs": [LAYOUT, FINAL_INSIGHTS, POS_SALES, MOVEMENTS],
+     "outputs": [FINAL_INSIGHTS, RELOCATION_PLAN, RELOCATION_SCORES,
+                 os.path.join("insights", "zone_performance.csv")]},
+    {"name": "layout_optimizer", "script": "layout_optimizer.py",
+     "inputs": [FINAL_INSIGHTS, POS_SALES, MOVEMENTS],
+     "outputs": [os.path.join("insights", "optimized_layout.csv"), "relocation_memory.json"]},
+    {"name": "seasonal_plan", "script": "seasonal_planner.py",
+     "inputs": [FINAL_INSIGHTS], "outputs": [os.path.join("insights", "seasonal_plan.csv")]},
+    {"name": "stock_alerts", "script": "stock_alerts.py",
+     "inputs": [LAYOUT, STOCK_LEVELS], "outputs": [os.path.join("insights", "stock_alerts.csv")]},
+    {"name": "staff_schedule", "script": "staff_scheduler.py",
+     "inputs": [], "outputs": [os.path.join("insights", "staff_schedule.csv")]},
+    {"name": "pos_heatmap", "script": "pos_heatmap.py",
+     "inputs": [POS_SALES], "outputs": [os.path.join("heatmap", "pos_sales_heatmap.png")]},
+    {"name": "zone_heatmap", "script": os.path.join("heatmap", "zone_heatmap.py"),
+     "inputs": [MOVEMENTS], "outputs": [os.path.join("heatmap", "zone_heatmap.png")]},
+]
+
+
+def stage_dependencies(stages=STAGES):
+    """Names of the earlier stages each stage has to wait for."""
+    deps = {}
+    for i, stage in enumerate(stages):
+        reads, writes = set(stage["inputs"]), set(stage["outputs"])
+        deps[stage["name"]] = [
+            earlier["name"] for earlier in stages[:i]
+            if set(earlier["outputs"]) & (reads | writes) or set(earlier["inputs"]) & writes
+        ]
+    return deps
+
+
+def _load_state(path=PIPELINE_STATE_PATH):
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"hashes": {}, "stages": {}}
+    state.setdefault("hashes", {})
+    state.setdefault("stages", {})
+    return state
+
+
+def _save_state(state, path=PIPELINE_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def content_hash(path, state):
+    """SHA-256 of ``path`` (``None`` when missing), re-read only when its mtime or size changed."""
+    sig = file_signature(path)
+    if sig is None:
+        return None
+    resolved, mtime_ns, size = sig
+    cached = state["hashes"].get(path)
+    if cached is not None and cached[0] == mtime_ns and cached[1] == size:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(resolved, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    state["hashes"][path] = [mtime_ns, size, digest.hexdigest()]
+    return digest.hexdigest()
+
+
+def stage_reason(stage, state, force=False):
+    """Why ``stage`` has to run, or ``None`` when it is up to date."""
+    if force:
+        return "forced"
+    missing = [p for p in stage["outputs"] if file_signature(p) is None]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    if stage.get("source"):
+        return None
+    recorded = state["stages"].get(stage["name"])
+    if recorded is None:
+        return "never run"
+    changed = [p for p in stage["inputs"] if content_hash(p, state) != recorded["inputs"].get(p)]
+    if changed:
+        return f"changed {', '.join(changed)}"
+    return None
+
+
+def _run_stage(stage, root):
+    """Pool worker: run one stage in ``root`` and report its status and duration."""
+    start = time.perf_counter()
+    os.chdir(root)
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    error = None
+    try:
+        if "call" in stage:
+            module, func = stage["call"].split(":")
+            getattr(importlib.import_module(module), func)()
+        else:
+            script = os.path.join(REPO_DIR, stage["script"])
+            sys.argv = [script] + list(stage.get("args", []))
+            runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"exited with status {e.code}"
+    except Exception:
+        error = traceback.format_exc(limit=3).strip().splitlines()[-1]
+    finally:
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+    return {"status": "failed" if error else "ran", "error": error, "seconds": time.perf_counter() - start}
+
+
+def run_pipeline(root=".", workers=None, force=(), dry_run=False, stages=STAGES):
+    """Run the out-of-date stages in ``root``; returns one result dict per stage.
+
+    ``force`` is a collection of stage names to run regardless (``True`` for
+    all). A failed stage's dependents are reported as blocked.
+    """
+    cwd = os.getcwd()
+    root = os.path.abspath(root)
+    os.chdir(root)
+    try:
+        return _run_stages(root, workers, force, dry_run, stages)
+    finally:
+        os.chdir(cwd)
+
+
+def _run_stages(root, workers, force, dry_run, stages):
+    state = _load_state()
+    deps = stage_dependencies(stages)
+    by_name = {s["name"]: s for s in stages}
+    results = {}
+    pending = [s["name"] for s in stages]
+    running = {}
+
+    def decide(name):
+        """Resolve ``name`` without running it, or return the reason it has to run."""
+        stage = by_name[name]
+        blocked = [d for d in deps[name] if results[d]["status"] in ("failed", "blocked")]
+        if blocked:
+            results[name] = {"status": "blocked", "error": f"{', '.join(blocked)} failed", "seconds": 0.0}
+            return None
+        reason = stage_reason(stage, state, force is True or name in force)
+        upstream = [d for d in deps[name] if results[d]["status"] == "would run"]
+        if reason is None and upstream:
+            reason = f"after {', '.join(upstream)}"
+        if reason is None:
+            results[name] = {"status": "skipped", "error": None, "seconds": 0.0}
+        elif dry_run:
+            results[name] = {"status": "would run", "error": None, "seconds": 0.0, "reason": reason}
+            return None
+        return reason
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                if any(d not in results for d in deps[name]):
+                    continue
+                pending.remove(name)
+                reason = decide(name)
+                if reason is not None:
+                    print(f"Running {name} ({reason})")
+                    before = {p: file_signature(p) for p in by_name[name]["outputs"]}
+                    running[pool.submit(_run_stage, by_name[name], root)] = (name, reason, before)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, reason, before = running.pop(future)
+                try:
+                    results[name] = dict(future.result(), reason=reason)
+                except Exception as e:
+                    results[name] = {"status": "failed", "error": str(e), "seconds": 0.0, "reason": reason}
+                # Several scripts print an error and exit() cleanly when an input is missing,
+                # leaving a missing or stale output behind; a stage must rewrite every output
+                for p in before:
+                    invalidate(p)
+                ensure = by_name[name].get("ensure", False)
+                after = {p: file_signature(p) for p in before}
+                unwritten = [p for p, sig in before.items()
+                             if after[p] is None or (after[p] == sig and not ensure)]
+                if results[name]["status"] == "ran" and unwritten:
+                    results[name].update(status="failed", error=f"did not write {', '.join(unwritten)}")
+                if results[name]["status"] == "failed":
+                    print(f"Warning: stage {name} failed: {results[name]['error']}")
+
+    if not dry_run:
+        # Hashed after the whole run, so a later stage rewriting a shared input in
+        # place (zone_assignment) does not make its readers stale on the next run
+        finished_at = datetime.now().isoformat()
+        for name, result in results.items():
+            if result["status"] == "ran":
+                state["stages"][name] = {
+                    "inputs": {p: content_hash(p, state) for p in by_name[name]["inputs"]},
+                    "finished_at": finished_at,
+                }
+        _save_state(state)
+    return [dict(results[s["name"]], name=s["name"]) for s in stages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the HeatSight insights pipeline, skipping up-to-date stages.")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="Run these stages (every stage when no name is given) even if up to date")
+    parser.add_argument("--root", default=".", help="Store folder holding data/ and insights/")
+    parser.add_argument("--store", help="Store ID under stores/ (overrides --root)")
+    parser.add_argument("--workers", type=int, help="Parallel stages (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the stages that would run")
+    args = parser.parse_args()
+
+    force = () if args.force is None else (args.force or True)
+    if force is not True:
+        unknown = sorted(set(force) - {s["name"] for s in STAGES})
+        if unknown:
+            parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    root = store_dir(args.store) if args.store else args.root
+    if not os.path.isdir(root):
+        parser.error(f"store folder {root} not found")
+    results = run_pipeline(root, args.workers, force, args.dry_run)
+    for r in results:
+        detail = r.get("error") or r.get("reason") or ""
+        print(f"  {r['name']:<20} {r['status']:<10} {r['seconds']:7.2f}s  {detail}")
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s")
+    if any(r["status"] in ("failed", "blocked") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
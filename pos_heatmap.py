@@ -1,51 +1,59 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
 import os
-import streamlit as st
+
+from data_registry import file_signature, fingerprint, load_dataset
+from heatmap_renderer import heatmap_png, render_heatmap
+from store_grid import zone_grid
 
 POS_SALES_PATH = os.path.join('data', 'pos_sales.csv')
+STORE_LAYOUT_PATH = os.path.join('data', 'store_layout.csv')
 
 
-@st.cache_data
-def load_pos_sales():
-    return pd.read_csv(POS_SALES_PATH)
+POS_HEATMAP_PATH = os.path.join('heatmap', 'pos_sales_heatmap.png')
+POS_HEATMAP_TITLE = 'POS Sales Heatmap'
+POS_HEATMAP_CMAP = 'Blues'
 
 
-def generate_pos_sales_heatmap():
-    """Generate a heatmap of POS sales by zone."""
-    os.makedirs('heatmap', exist_ok=True)
-    if not os.path.exists(POS_SALES_PATH):
-        layout_df = pd.read_csv('Data/store_layout.csv')
+def ensure_pos_sales():
+    """Simulate ``pos_sales.csv`` from the store layout when it does not exist yet."""
+    if file_signature(POS_SALES_PATH) is None:
+        layout_df = load_dataset(STORE_LAYOUT_PATH)
         zones = layout_df['Zone']
         sales_df = pd.DataFrame({'Zone': zones, 'Sales': np.random.randint(50, 200, len(zones))})
         sales_df.to_csv(POS_SALES_PATH, index=False)
 
-    sales_df = load_pos_sales()
-
-    zone_sales = sales_df.set_index('Zone')['Sales'].to_dict()
-    rows = [chr(ord('A') + i) for i in range(10)]
-    cols = range(1, 11)
-    grid = np.zeros((len(rows), len(cols)), dtype=int)
-    for r_idx, r in enumerate(rows):
-        for c_idx, c in enumerate(cols):
-            grid[r_idx, c_idx] = zone_sales.get(f'{r}{c}', 0)
-
-    fig, ax = plt.subplots(figsize=(12, 10))
-    sns.heatmap(grid, annot=True, fmt='d', cmap='Blues',
-                xticklabels=cols, yticklabels=rows, linewidths=.5, linecolor='lightgray', ax=ax)
-    ax.set_title('POS Sales Heatmap', color='#f0f0f0')
-    ax.set_xlabel('Shelf Column', color='#f0f0f0')
-    ax.set_ylabel('Shelf Row', color='#f0f0f0')
-    ax.tick_params(axis='x', rotation=0, colors='#e0e0e0')
-    ax.tick_params(axis='y', rotation=0, colors='#e0e0e0')
-    ax.set_facecolor('#121212')
-    fig.patch.set_facecolor('#121212')
-    plt.tight_layout()
-    plt.savefig('heatmap/pos_sales_heatmap.png')
+
+def _pos_sales_grid():
+    sales_df = load_dataset(POS_SALES_PATH)
+    # Sales are summed per zone, so multi-product or multi-day logs are fully counted
+    return zone_grid(sales_df['Zone'], sales_df['Sales'].to_numpy())
+
+
+def generate_pos_sales_heatmap():
+    """Generate a heatmap of POS sales by zone."""
+    os.makedirs('heatmap', exist_ok=True)
+    ensure_pos_sales()
+    grid, rows, cols = _pos_sales_grid()
+    fig = render_heatmap(grid, rows, cols, POS_HEATMAP_TITLE, cmap=POS_HEATMAP_CMAP)
+    fig.savefig(POS_HEATMAP_PATH)
     return fig
 
 
+def get_pos_sales_heatmap_png():
+    """PNG bytes of the POS sales heatmap, re-rendered only when the sales data changes.
+
+    ``heatmap/pos_sales_heatmap.png`` is rewritten only on a re-render.
+    """
+    os.makedirs('heatmap', exist_ok=True)
+    ensure_pos_sales()
+    png, rendered = heatmap_png('pos_sales', fingerprint(POS_SALES_PATH), _pos_sales_grid,
+                                POS_HEATMAP_TITLE, cmap=POS_HEATMAP_CMAP)
+    if rendered or not os.path.exists(POS_HEATMAP_PATH):
+        with open(POS_HEATMAP_PATH, 'wb') as f:
+            f.write(png)
+    return png
+
+
 if __name__ == '__main__':
     generate_pos_sales_heatmap()
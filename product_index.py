@@ -0,0 +1,194 @@
+"""Product name lookup index shared by the agent tools.
+
+``get_product_index`` builds, once per DataFrame, lowercased exact-name and
+token maps, a sorted name list for prefix lookups and a trigram index. The
+cached index follows the data registry's frames: a regenerated CSV yields a
+new frame and therefore a new index.
+
+``match_products`` returns the same rows, in the same order, as a
+case-insensitive literal ``str.contains``, but only verifies names that share
+every trigram of the query instead of scanning the whole catalog.
+``search_products`` ranks candidates (exact, prefix, whole-token and substring
+matches, then fuzzy trigram similarity for typos) and returns them with their
+product IDs.
+"""
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PRODUCT_INDEX_CACHE_SIZE = 8
+# Minimum share of the query's trigrams a fuzzy candidate must contain
+FUZZY_MIN_SCORE = 0.4
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_INDEXES = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _padded_trigrams(text):
+    """Trigrams of `` text `` so word boundaries at either end count too."""
+    return _trigrams(f" {text} ")
+
+
+def build_product_index(names):
+    """Index a sequence of product names; row positions refer to its order."""
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object).str.lower(), use_na_sentinel=True)
+    uniques = [str(u) for u in uniques]
+    valid = codes >= 0
+    # Rows of every unique name in frame order, as CSR offsets into ``rows``
+    rows = np.nonzero(valid)[0][np.argsort(codes[valid], kind="stable")]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[valid], minlength=len(uniques)))])
+
+    tokens, trigrams = {}, {}
+    for uid, name in enumerate(uniques):
+        for token in set(_TOKEN_RE.findall(name)):
+            tokens.setdefault(token, []).append(uid)
+        # Padded trigrams are a superset of the plain ones, so substring filtering still holds
+        for tri in _padded_trigrams(name):
+            trigrams.setdefault(tri, []).append(uid)
+
+    by_name = sorted(range(len(uniques)), key=uniques.__getitem__)
+    return {
+        "names": uniques,
+        "exact": {name: uid for uid, name in enumerate(uniques)},
+        "sorted_names": [uniques[u] for u in by_name],
+        "sorted_ids": by_name,
+        "tokens": {t: np.array(ids, dtype=np.int64) for t, ids in tokens.items()},
+        "trigrams": {t: np.array(ids, dtype=np.int64) for t, ids in trigrams.items()},
+        "rows": rows,
+        "offsets": offsets,
+    }
+
+
+def get_product_index(df, column="Product_Name"):
+    """Index of ``df[column]``, built once per frame object and reused while it is cached."""
+    key = (id(df), column)
+    with _LOCK:
+        cached = _INDEXES.get(key)
+        # The frame is kept in the entry, so its id cannot be reused while cached
+        if cached is not None and cached[0] is df and cached[1] == len(df):
+            _INDEXES.move_to_end(key)
+            return cached[2]
+    index = build_product_index(df[column].to_numpy(dtype=object))
+    with _LOCK:
+        _INDEXES[key] = (df, len(df), index)
+        while len(_INDEXES) > PRODUCT_INDEX_CACHE_SIZE:
+            _INDEXES.popitem(last=False)
+    return index
+
+
+def _substring_ids(index, query):
+    """Unique-name ids whose name contains ``query`` (already lowercased)."""
+    names = index["names"]
+    if len(query) < 3:
+        return [uid for uid, name in enumerate(names) if query in name]
+    postings = []
+    for tri in _trigrams(query):
+        ids = index["trigrams"].get(tri)
+        if ids is None:
+            return []
+        postings.append(ids)
+    postings.sort(key=len)
+    candidates = postings[0]
+    for ids in postings[1:]:
+        candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        if not len(candidates):
+            return []
+    return [int(uid) for uid in candidates if query in names[uid]]
+
+
+def _rows_for(index, uids):
+    offsets, rows = index["offsets"], index["rows"]
+    if not uids:
+        return np.zeros(0, dtype=np.int64)
+    return np.sort(np.concatenate([rows[offsets[u]:offsets[u + 1]] for u in uids]))
+
+
+def match_products(df, query, column="Product_Name"):
+    """Rows of ``df`` whose ``column`` contains ``query``, ignoring case.
+
+    Equivalent to ``df[df[column].str.contains(query, case=False, na=False,
+    regex=False)]``, including row order.
+    """
+    if df.empty or column not in df.columns:
+        return df.iloc[0:0]
+    index = get_product_index(df, column)
+    return df.iloc[_rows_for(index, _substring_ids(index, str(query).lower()))]
+
+
+def _prefix_ids(index, prefix):
+    """Unique-name ids starting with ``prefix``, by binary search over the sorted names."""
+    sorted_names = index["sorted_names"]
+    lo = bisect.bisect_left(sorted_names, prefix)
+    hi = bisect.bisect_left(sorted_names, prefix + "\U0010ffff")
+    return index["sorted_ids"][lo:hi]
+
+
+def _fuzzy_scores(index, query):
+    """Share of ``query``'s padded trigrams found in each unique name."""
+    query_tris = _padded_trigrams(query)
+    postings = [index["trigrams"][t] for t in query_tris if t in index["trigrams"]]
+    if not postings:
+        return np.zeros(len(index["names"]))
+    return np.bincount(np.concatenate(postings), minlength=len(index["names"])) / len(query_tris)
+
+
+def search_products(df, query, k=5, column="Product_Name", id_column="Product_ID"):
+    """Up to ``k`` ranked candidates for ``query`` as dicts with name, ID, score and match type.
+
+    Exact matches rank first, then names starting with the query, names
+    containing all of its words, other substring matches and finally fuzzy
+    trigram matches (for misspellings) sharing at least ``FUZZY_MIN_SCORE`` of
+    the query's trigrams.
+    """
+    if df.empty or column not in df.columns:
+        return []
+    index = get_product_index(df, column)
+    query = str(query).strip().lower()
+    if not query:
+        return []
+    names = index["names"]
+
+    ranked = {}
+    if query in index["exact"]:
+        ranked[index["exact"][query]] = (4.0, "exact")
+    for uid in _prefix_ids(index, query):
+        ranked.setdefault(uid, (3.0, "prefix"))
+    query_tokens = _TOKEN_RE.findall(query)
+    if query_tokens and all(t in index["tokens"] for t in query_tokens):
+        token_ids = index["tokens"][query_tokens[0]]
+        for t in query_tokens[1:]:
+            token_ids = np.intersect1d(token_ids, index["tokens"][t], assume_unique=True)
+        for uid in token_ids:
+            ranked.setdefault(int(uid), (2.0, "token"))
+    for uid in _substring_ids(index, query):
+        ranked.setdefault(uid, (1.0, "substring"))
+
+    if len(ranked) < k:
+        scores = _fuzzy_scores(index, query)
+        for uid in np.argsort(-scores, kind="stable")[:k + len(ranked)]:
+            if scores[uid] < FUZZY_MIN_SCORE:
+                break
+            ranked.setdefault(int(uid), (float(scores[uid]), "fuzzy"))
+
+    # Higher score first; shorter (closer) names break ties
+    best = sorted(ranked.items(), key=lambda item: (-item[1][0], len(names[item[0]]), names[item[0]]))[:k]
+    has_ids = id_column in df.columns
+    results = []
+    for uid, (score, kind) in best:
+        row = df.iloc[int(index["rows"][index["offsets"][uid]])]
+        results.append({
+            "Product_Name": row[column],
+            "Product_ID": row[id_column] if has_ids else None,
+            "Score": round(score, 3),
+            "Match": kind,
+        })
+    return results
@@ -1,39 +1,28 @@
 import pandas as pd
 import os
 
+from data_registry import load_dataset, store_aware, store_file
+
 # Define file paths
 INSIGHTS_DIR = "insights"
 
 FINAL_INSIGHTS_FILE_PATH = os.path.join(INSIGHTS_DIR, "final_product_insights.csv")
 RELOCATION_PLAN_PATH = os.path.join(INSIGHTS_DIR, "relocation_plan.csv")
 
-# Ensure insights directory exists
-os.makedirs(INSIGHTS_DIR, exist_ok=True)
-
-def _load_df(file_path):
-    """Helper to load CSV, returning empty DataFrame if file is missing or empty."""
-    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-        print(f"Warning: {file_path} not found or is empty.")
-        return pd.DataFrame()
-    try:
-        return pd.read_csv(file_path)
-    except pd.errors.EmptyDataError:
-        print(f"Warning: {file_path} is an empty CSV file.")
-        return pd.DataFrame()
-    except Exception as e:
-        print(f"Error loading {file_path}: {e}")
-        return pd.DataFrame()
-
+@store_aware
 def generate_relocation_plan():
     print("Generating smart relocation plan...")
+    os.makedirs(store_file(INSIGHTS_DIR), exist_ok=True)
+    plan_path = store_file(RELOCATION_PLAN_PATH)
 
     # Load the final product insights
-    final_insights_df = _load_df(FINAL_INSIGHTS_FILE_PATH)
+    # Copy: New_Zone/Old_Product_Name are filled in below and the cached frame is shared
+    final_insights_df = load_dataset(FINAL_INSIGHTS_FILE_PATH).copy()
 
     if final_insights_df.empty:
         print("Error: Final product insights data not available. Cannot generate relocation plan.")
         # Create an empty relocation_plan.csv if the source is empty
-        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(RELOCATION_PLAN_PATH, index=False)
+        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(plan_path, index=False)
         print("Empty relocation plan created.")
         return
 
@@ -45,7 +34,7 @@ def generate_relocation_plan():
     
     if final_insights_df['Online_Views'].sum() == 0 and final_insights_df['Visits'].sum() == 0:
         print("No online views or in-store visits data to analyze for relocation.")
-        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(RELOCATION_PLAN_PATH, index=False)
+        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(plan_path, index=False)
         print("Empty relocation plan created.")
         return
 
@@ -105,13 +94,13 @@ def generate_relocation_plan():
     relocation_df = pd.DataFrame(relocation_plan)
 
     if not relocation_df.empty:
-        relocation_df.to_csv(RELOCATION_PLAN_PATH, index=False)
+        relocation_df.to_csv(plan_path, index=False)
         print(f"Smart relocation plan generated and saved to {RELOCATION_PLAN_PATH}")
         print("Relocation Plan:")
         print(relocation_df)
     else:
         # Ensure an empty CSV is created if no recommendations are found
-        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(RELOCATION_PLAN_PATH, index=False)
+        pd.DataFrame(columns=['Product_ID', 'Product_Name', 'Current_Zone', 'Online_Views', 'Visits', 'Zone_Category', 'New_Zone', 'Old_Product_Name']).to_csv(plan_path, index=False)
         print("No relocation plan generated. This might be due to insufficient candidates in either category.")
 
 
@@ -1,26 +1,27 @@
 import os
+import re
 import json
+import threading
 import numpy as np
 import pandas as pd
 from datetime import datetime
 
+from assignment_solver import solve_assignment
+from data_registry import file_signature, fingerprint, load_dataset, resolve_path, store_aware, store_file
+from zone_stats import MOVEMENTS_PATH, get_zone_stats
+
 DATA_DIR = "Data"
 INSIGHTS_DIR = "insights"
 MEMORY_PATH = os.path.join("agent_memory", "relocation_memory.json")
 POS_SALES_PATH = os.path.join("data", "pos_sales.csv")
+STORE_LAYOUT_PATH = os.path.join(DATA_DIR, "store_layout.csv")
+FINAL_INSIGHTS_PATH = os.path.join(INSIGHTS_DIR, "final_product_insights.csv")
+RELOCATION_SCORES_PATH = os.path.join(INSIGHTS_DIR, "relocation_intelligence.csv")
 
-os.makedirs(INSIGHTS_DIR, exist_ok=True)
-os.makedirs(os.path.dirname(MEMORY_PATH), exist_ok=True)
-
-# helper to load CSV
-
-def _load_csv(path):
-    if not os.path.exists(path) or os.path.getsize(path) == 0:
-        return pd.DataFrame()
-    try:
-        return pd.read_csv(path)
-    except Exception:
-        return pd.DataFrame()
+# Scorer state per store (keyed on the resolved final insights path): raw and
+# normalized factors, their bounds, scores and the last result
+_SCORER = {}
+_LOCK = threading.Lock()
 
 def _load_json(path):
     if not os.path.exists(path):
@@ -31,137 +32,206 @@ def _load_json(path):
     except Exception:
         return []
 
-def _normalize(series):
-    if series.empty:
-        return series
-    min_v = series.min()
-    max_v = series.max()
+# Keyword lists for the rudimentary product category used by the suggestion logic
+ELECTRONICS_KEYWORDS = [
+    "tv",
+    "laptop",
+    "speaker",
+    "headphone",
+    "power bank",
+    "phone",
+    "printer",
+    "iron",
+    "mixer",
+    "charger",
+    "bulb",
+    "fan",
+]
+GROCERY_KEYWORDS = [
+    "milk",
+    "flour",
+    "sugar",
+    "rice",
+    "bread",
+    "butter",
+    "oil",
+    "jam",
+    "biscuit",
+    "noodle",
+    "juice",
+    "masala",
+    "dal",
+    "salt",
+    "cookies",
+    "chips",
+    "onion",
+    "apple",
+    "banana",
+    "potato",
+]
+# One alternation per category, compiled once and matched over whole name columns
+_ELECTRONICS_RE = re.compile("|".join(re.escape(k) for k in ELECTRONICS_KEYWORDS))
+_GROCERY_RE = re.compile("|".join(re.escape(k) for k in GROCERY_KEYWORDS))
+
+# Raw inputs of the scoring; a product is re-scored when any of them changes
+RAW_FACTORS = ("footfall", "zone_sales", "online_views", "conversion", "cold_zone", "recently_moved")
+# Min-max normalized factors (velocity reuses the POS bounds)
+NORMALIZED_FACTORS = {"footfall": "footfall", "pos": "zone_sales", "online": "online_views", "conversion": "conversion"}
+
+# Factors that can appear in Why_This_Zone, in tie-break order, with their weights
+EXPLAINED_FACTORS = [
+    ("footfall", 0.15),
+    ("pos", 0.15),
+    ("online", 0.15),
+    ("velocity", 0.10),
+    ("conversion", 0.10),
+    ("cold_zone", 0.10),
+]
+
+
+def categorize_products(names) -> np.ndarray:
+    """Vectorized keyword category (electronics / grocery / general) for product names."""
+    lowered = pd.Series(names, dtype=object).astype(str).str.lower()
+    is_electronics = lowered.str.contains(_ELECTRONICS_RE).to_numpy(dtype=bool)
+    is_grocery = lowered.str.contains(_GROCERY_RE).to_numpy(dtype=bool)
+    return np.select([is_electronics, is_grocery], ["electronics", "grocery"], "general")
+
+
+def zone_pair_mask(current_zones, product_categories, target_zones, target_categories) -> np.ndarray:
+    """Boolean (products x zones) mask of allowed moves.
+
+    A move is ruled out when the target is the product's current zone or when one
+    side is electronics and the other grocery.
+    """
+    pcat = np.asarray(product_categories)[:, None]
+    zcat = np.asarray(target_categories)[None, :]
+    incompatible = ((pcat == "electronics") & (zcat == "grocery")) | ((pcat == "grocery") & (zcat == "electronics"))
+    same_zone = np.asarray(current_zones, dtype=object)[:, None] == np.asarray(target_zones, dtype=object)[None, :]
+    return ~(incompatible | same_zone)
+
+
+def _normalize(values) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    min_v = values.min()
+    max_v = values.max()
     if max_v - min_v == 0:
-        return series.apply(lambda x: 0.0)
-    return (series - min_v) / (max_v - min_v)
+        return np.zeros_like(values)
+    return (values - min_v) / (max_v - min_v)
 
-def generate_relocation_scores():
-    layout_df = _load_csv(os.path.join(DATA_DIR, "store_layout.csv"))
-    movements_df = _load_csv(os.path.join(DATA_DIR, "movements.csv"))
-    online_df = _load_csv(os.path.join(DATA_DIR, "online_product_performance.csv"))
-    final_df = _load_csv(os.path.join(INSIGHTS_DIR, "final_product_insights.csv"))
 
-    if layout_df.empty or final_df.empty:
-        print("Required data missing. Run store_layout.py and Final_insights.py first.")
-        return pd.DataFrame()
+def _explain(factors: dict, footfall, zone_sales, online_views, conversion) -> np.ndarray:
+    """Top-3 weighted factor phrases per product, ranked in one argsort."""
+    contributions = np.column_stack([weight * factors[name] for name, weight in EXPLAINED_FACTORS])
+    top = np.argsort(-contributions, axis=1, kind="stable")[:, :3]
 
-    if movements_df.empty:
-        movements_df = pd.DataFrame({"Zone": layout_df["Zone"], "Visits": 0})
-    footfall = movements_df["Zone"].value_counts().to_dict()
+    footfall_txt = np.trunc(footfall).astype(np.int64).astype(str)
+    sales_txt = np.trunc(zone_sales).astype(np.int64).astype(str)
+    phrases = np.column_stack([
+        np.char.add("footfall ", footfall_txt),
+        np.char.add("POS sales ", sales_txt),
+        np.char.add("online views ", np.trunc(online_views).astype(np.int64).astype(str)),
+        np.char.add("sales velocity ", sales_txt),
+        np.char.mod("conversion %.2f", conversion),
+        np.full(len(footfall), "in cold zone"),
+    ]).astype(object)
+    chosen = np.take_along_axis(phrases, top, axis=1)
+    return chosen[:, 0] + ", " + chosen[:, 1] + ", " + chosen[:, 2]
 
-    # POS sales
-    if not os.path.exists(POS_SALES_PATH):
-        # create simple random sales if missing
-        zones = layout_df["Zone"]
-        sales_df = pd.DataFrame({"Zone": zones, "Sales": np.random.randint(50, 200, len(zones))})
-        os.makedirs(os.path.dirname(POS_SALES_PATH), exist_ok=True)
-        sales_df.to_csv(POS_SALES_PATH, index=False)
-    sales_df = _load_csv(POS_SALES_PATH)
-    zone_sales = sales_df.set_index("Zone")["Sales"].to_dict()
-
-    # Merge basic info
-    df = final_df.merge(online_df, on=["Product_ID", "Product_Name"], how="left")
-    df["Online_Views_y"].fillna(0, inplace=True)
-    df.rename(columns={"Online_Views_x": "Online_Views"}, inplace=True)
-    df["Footfall"] = df["Zone"].map(footfall).fillna(0)
-    df["Zone_Sales"] = df["Zone"].map(zone_sales).fillna(0)
-    df["Conversion"] = df.apply(lambda r: r["Zone_Sales"] / r["Footfall"] if r["Footfall"] > 0 else 0, axis=1)
-
-    # scoring
-    df["footfall_score"] = _normalize(df["Footfall"])
-    df["pos_score"] = _normalize(df["Zone_Sales"])
-    df["online_score"] = _normalize(df["Online_Views"])
-    df["velocity_score"] = df["pos_score"]
-    df["conversion_score"] = _normalize(df["Conversion"])
-    df["cold_zone_bonus"] = df["Zone_Category"].apply(lambda x: 1 if str(x).lower() == "cold" else 0)
-
-    memory = _load_json(MEMORY_PATH)
+
+def _bounds(raw: dict) -> dict:
+    """``(min, max)`` of every normalized factor over all products."""
+    return {name: (raw[col].min(), raw[col].max()) if raw[col].size else (0.0, 0.0)
+            for name, col in NORMALIZED_FACTORS.items()}
+
+
+def _scale(values, bounds) -> np.ndarray:
+    """``_normalize`` with fixed bounds, so a subset scales exactly like the full column."""
+    min_v, max_v = bounds
+    if max_v - min_v == 0:
+        return np.zeros_like(values)
+    return (values - min_v) / (max_v - min_v)
+
+
+def _score_rows(raw: dict, bounds: dict, rows=slice(None)):
+    """Relocation score and explanation for ``rows`` of the raw factor arrays."""
+    factors = {name: _scale(raw[col][rows], bounds[name]) for name, col in NORMALIZED_FACTORS.items()}
+    factors["velocity"] = factors["pos"]
+    factors["cold_zone"] = raw["cold_zone"][rows]
+    relocation_penalty = -raw["recently_moved"][rows]
+
+    # seasonal_match, complementary_bonus, price_visibility_boost and ab_test_bonus
+    # (0.05 each) are not sourced yet and contribute 0
+    score = sum(weight * factors[name] for name, weight in EXPLAINED_FACTORS)
+    score = (score + 0.05 * relocation_penalty) * 100
+    why = _explain(factors, raw["footfall"][rows], raw["zone_sales"][rows],
+                   raw["online_views"][rows], raw["conversion"][rows])
+    return score, why
+
+
+def _raw_factors(final_df, stats) -> dict:
+    """Per-product raw factors as aligned float arrays."""
+    product_zone = final_df["Zone"].astype(str)
+    footfall = product_zone.map(stats["Footfall"]).fillna(0).to_numpy(dtype=float)
+    zone_sales = product_zone.map(stats["Sales"]).fillna(0).to_numpy(dtype=float)
+    memory = _load_json(store_file(MEMORY_PATH))
     recent_products = {m.get("product_id") for m in memory if m.get("timestamp")}
-    df["relocation_penalty"] = df["Product_ID"].apply(lambda x: -1 if x in recent_products else 0)
-
-    df["seasonal_match"] = 0
-    df["complementary_bonus"] = 0
-    df["price_visibility_boost"] = 0
-    df["ab_test_bonus"] = 0
-
-    df["Relocation_Score"] = (
-        0.15 * df["footfall_score"] +
-        0.15 * df["pos_score"] +
-        0.15 * df["online_score"] +
-        0.10 * df["velocity_score"] +
-        0.10 * df["conversion_score"] +
-        0.10 * df["cold_zone_bonus"] +
-        0.05 * df["relocation_penalty"] +
-        0.05 * df["seasonal_match"] +
-        0.05 * df["complementary_bonus"] +
-        0.05 * df["price_visibility_boost"] +
-        0.05 * df["ab_test_bonus"]
-    ) * 100
+    return {
+        "footfall": footfall,
+        "zone_sales": zone_sales,
+        "online_views": final_df["Online_Views"].fillna(0).to_numpy(dtype=float),
+        "conversion": np.divide(zone_sales, footfall, out=np.zeros_like(zone_sales), where=footfall > 0),
+        "cold_zone": (final_df["Zone_Category"].astype(str).str.lower() == "cold").to_numpy(dtype=float),
+        "recently_moved": final_df["Product_ID"].isin(recent_products).to_numpy(dtype=float),
+    }
 
+
+def _update_scores(previous, ids, names, raw):
+    """Scores, explanations and categories for ``raw``, re-scoring only what changed.
+
+    Rows are reused from ``previous`` when the products are the same and no
+    normalization bound moved; otherwise every row is scored. Returns the new
+    state and the number of re-scored rows.
+    """
+    bounds = _bounds(raw)
+    same_products = (
+        previous is not None
+        and np.array_equal(previous["ids"], ids)
+        and np.array_equal(previous["names"], names)
+    )
+    if same_products and previous["bounds"] == bounds:
+        changed = np.zeros(len(ids), dtype=bool)
+        for col in RAW_FACTORS:
+            changed |= raw[col] != previous["raw"][col]
+        rows = np.flatnonzero(changed)
+        score, why = previous["score"].copy(), previous["why"].copy()
+        if len(rows):
+            score[rows], why[rows] = _score_rows(raw, bounds, rows)
+        category = previous["category"]
+    else:
+        rows = np.arange(len(ids))
+        score, why = _score_rows(raw, bounds)
+        category = categorize_products(names)
+    state = {"ids": ids, "names": names, "raw": raw, "bounds": bounds,
+             "score": score, "why": why, "category": category}
+    return state, len(rows)
+
+
+def _suggest_zones(df, layout_df, stats):
+    """Add ``Suggested_Zone`` to the score-sorted ``df`` via the capacity-constrained assignment."""
     # zone scoring for suggestions
     zone_df = pd.DataFrame({
         "Zone": layout_df["Zone"],
-        "footfall": [footfall.get(z, 0) for z in layout_df["Zone"]],
-        "sales": [zone_sales.get(z, 0) for z in layout_df["Zone"]],
+        "footfall": layout_df["Zone"].map(stats["Footfall"]).fillna(0).to_numpy(),
+        "sales": layout_df["Zone"].map(stats["Sales"]).fillna(0).to_numpy(),
     })
     zone_df["score"] = _normalize(zone_df["footfall"]) * 0.6 + _normalize(zone_df["sales"]) * 0.4
+    zone_df = zone_df.drop_duplicates("Zone")
 
     # ----- diversified zone suggestion logic -----
-    def _categorize(name: str) -> str:
-        """Rudimentary product category based on keywords."""
-        name = str(name).lower()
-        electronics_kw = [
-            "tv",
-            "laptop",
-            "speaker",
-            "headphone",
-            "power bank",
-            "phone",
-            "printer",
-            "iron",
-            "mixer",
-            "charger",
-            "bulb",
-            "fan",
-        ]
-        grocery_kw = [
-            "milk",
-            "flour",
-            "sugar",
-            "rice",
-            "bread",
-            "butter",
-            "oil",
-            "jam",
-            "biscuit",
-            "noodle",
-            "juice",
-            "masala",
-            "dal",
-            "salt",
-            "cookies",
-            "chips",
-            "onion",
-            "apple",
-            "banana",
-            "potato",
-        ]
-        if any(k in name for k in electronics_kw):
-            return "electronics"
-        if any(k in name for k in grocery_kw):
-            return "grocery"
-        return "general"
-
     # category of each zone based on currently placed product
-    zone_category_map = {
-        row["Zone"]: _categorize(row["Product_Name"])
-        for _, row in layout_df.iterrows()
-    }
+    zone_category_map = dict(zip(layout_df["Zone"], categorize_products(layout_df["Product_Name"])))
 
     # compute top hot zones
     top_zones = (
@@ -171,74 +241,101 @@ def generate_relocation_scores():
         top_zones = zone_df.sort_values("score", ascending=False)["Zone"].tolist()
 
     # mock capacity: current product count + 4
-    base_capacity = layout_df["Zone"].value_counts().to_dict()
-    zone_capacity = {z: base_capacity.get(z, 0) + 4 for z in top_zones}
-    assigned = {z: 0 for z in top_zones}
-
-    # add product categories
-    df["product_category"] = df["Product_Name"].apply(_categorize)
-
-    # sort products by score for assignment
-    df = df.sort_values("Relocation_Score", ascending=False)
-
-    suggestions = []
-    for _, row in df.iterrows():
-        current_zone = row["Zone"]
-        pcat = row["product_category"]
-        chosen = current_zone
-        for zone in top_zones:
-            if zone == current_zone:
-                continue
-            if assigned[zone] >= zone_capacity[zone]:
-                continue
-            zcat = zone_category_map.get(zone, "general")
-            # incompatible if one is electronics and the other is grocery
-            if (
-                (pcat == "electronics" and zcat == "grocery")
-                or (pcat == "grocery" and zcat == "electronics")
-            ):
-                continue
-            chosen = zone
-            assigned[zone] += 1
-            break
-        suggestions.append(chosen)
-
-    df["Suggested_Zone"] = suggestions
-
-
-    def explain(row):
-        contributions = {
-            "footfall": 0.15 * row["footfall_score"],
-            "pos": 0.15 * row["pos_score"],
-            "online": 0.15 * row["online_score"],
-            "velocity": 0.10 * row["velocity_score"],
-            "conversion": 0.10 * row["conversion_score"],
-            "cold_zone": 0.10 * row["cold_zone_bonus"],
-        }
-        top = sorted(contributions.items(), key=lambda x: x[1], reverse=True)[:3]
-        parts = []
-        for k, v in top:
-            if k == "footfall":
-                parts.append(f"footfall {int(row['Footfall'])}")
-            elif k == "pos":
-                parts.append(f"POS sales {int(row['Zone_Sales'])}")
-            elif k == "online":
-                parts.append(f"online views {int(row['Online_Views'])}")
-            elif k == "velocity":
-                parts.append(f"sales velocity {int(row['Zone_Sales'])}")
-            elif k == "conversion":
-                parts.append(f"conversion {row['Conversion']:.2f}")
-            elif k == "cold_zone":
-                parts.append("in cold zone")
-        return ", ".join(parts)
-
-    df["Why_This_Zone"] = df.apply(explain, axis=1)
-
-    output_cols = [
-        "Product_ID", "Product_Name", "Zone", "Suggested_Zone", "Relocation_Score", "Why_This_Zone"
-    ]
-    result = df[output_cols].rename(columns={"Zone": "Current_Zone"})
-    result.to_csv(os.path.join(INSIGHTS_DIR, "relocation_intelligence.csv"), index=False)
+    base_capacity = layout_df["Zone"].value_counts()
+    capacity = base_capacity.reindex(top_zones, fill_value=0).to_numpy() + 4
+
+    # Optimal plan: maximize sum(score x zone desirability) under zone capacity,
+    # the electronics/grocery incompatibility rule and recent-move exclusions.
+    target_zones = np.asarray(top_zones, dtype=object)
+    zone_weight = zone_df.set_index("Zone")["score"].reindex(top_zones).fillna(0).to_numpy()
+    benefit = np.maximum(df["Relocation_Score"].to_numpy(), 0)[:, None] * (zone_weight[None, :] + 0.01)
+    allowed = zone_pair_mask(
+        df["Zone"].to_numpy(dtype=object),
+        df["product_category"].to_numpy(),
+        target_zones,
+        np.array([zone_category_map.get(z, "general") for z in top_zones]),
+    )
+    allowed &= ~df["recently_moved"].to_numpy()[:, None]
+    choice = solve_assignment(benefit, capacity, allowed)
+    df["Suggested_Zone"] = np.where(choice >= 0, target_zones[np.maximum(choice, 0)], df["Zone"].to_numpy(dtype=object))
+    return df
+
+
+def _save_scores(result):
+    path = store_file(RELOCATION_SCORES_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    result.to_csv(path, index=False)
+    return file_signature(RELOCATION_SCORES_PATH)
+
+
+@store_aware
+def generate_relocation_scores():
+    """Score every product for relocation and write ``relocation_intelligence.csv``.
+
+    The result is memoized on the input files' signatures. When movements,
+    sales or online views change, only the affected products are re-scored
+    unless a normalization bound moved. The frame is shared between callers;
+    copy it before mutating.
+    """
+    layout_df = load_dataset(STORE_LAYOUT_PATH)
+    final_df = load_dataset(FINAL_INSIGHTS_PATH)
+
+    if layout_df.empty or final_df.empty:
+        print("Required data missing. Run store_layout.py and Final_insights.py first.")
+        return pd.DataFrame()
+
+    # POS sales
+    if file_signature(POS_SALES_PATH) is None:
+        # create simple random sales if missing
+        zones = layout_df["Zone"]
+        sales_df = pd.DataFrame({"Zone": zones, "Sales": np.random.randint(50, 200, len(zones))})
+        os.makedirs(os.path.dirname(store_file(POS_SALES_PATH)), exist_ok=True)
+        sales_df.to_csv(store_file(POS_SALES_PATH), index=False)
+
+    key = resolve_path(FINAL_INSIGHTS_PATH)
+    inputs = fingerprint(STORE_LAYOUT_PATH, FINAL_INSIGHTS_PATH, POS_SALES_PATH, MOVEMENTS_PATH, MEMORY_PATH)
+    with _LOCK:
+        previous = _SCORER.get(key)
+    if previous is not None and previous["inputs"] == inputs:
+        if file_signature(RELOCATION_SCORES_PATH) != previous["csv_sig"]:
+            previous["csv_sig"] = _save_scores(previous["result"])
+        return previous["result"]
+
+    stats = get_zone_stats()
+    ids = final_df["Product_ID"].to_numpy()
+    names = final_df["Product_Name"].to_numpy()
+    zones = final_df["Zone"].astype(str).to_numpy(dtype=object)
+    state, rescored = _update_scores(previous, ids, names, _raw_factors(final_df, stats))
+
+    # Suggestions depend on every score, the layout and the zone stats; reuse
+    # them only when none of those moved (e.g. a new column in final insights)
+    suggest_inputs = fingerprint(STORE_LAYOUT_PATH, POS_SALES_PATH, MOVEMENTS_PATH)
+    if (previous is not None and rescored == 0 and previous["suggest_inputs"] == suggest_inputs
+            and np.array_equal(previous["zones"], zones)):
+        result = previous["result"]
+    else:
+        df = pd.DataFrame({
+            "Product_ID": ids,
+            "Product_Name": names,
+            "Zone": zones,
+            "Relocation_Score": state["score"],
+            "product_category": state["category"],
+            "recently_moved": state["raw"]["recently_moved"].astype(bool),
+            "Why_This_Zone": state["why"],
+        }, index=final_df.index)
+
+        # sort products by score for assignment
+        df = _suggest_zones(df.sort_values("Relocation_Score", ascending=False), layout_df, stats)
+
+        output_cols = [
+            "Product_ID", "Product_Name", "Zone", "Suggested_Zone", "Relocation_Score", "Why_This_Zone"
+        ]
+        result = df[output_cols].rename(columns={"Zone": "Current_Zone"})
+
+    state.update(inputs=inputs, suggest_inputs=suggest_inputs, zones=zones, result=result,
+                 csv_sig=_save_scores(result))
+    with _LOCK:
+        _SCORER[key] = state
     return result
 
 if __name__ == "__main__":
@@ -1,22 +1,22 @@
 import pandas as pd
 import os
 
+from data_registry import file_signature, load_dataset
+from zone_stats import get_zone_stats
+
 LAYOUT_PATH = os.path.join('Data', 'store_layout.csv')
 POS_SALES_PATH = os.path.join('data', 'pos_sales.csv')
 
 
 def calculate_revenue_per_sqft():
-    if not os.path.exists(LAYOUT_PATH) or not os.path.exists(POS_SALES_PATH):
+    layout = load_dataset(LAYOUT_PATH)
+    if layout.empty or file_signature(POS_SALES_PATH) is None:
         return pd.DataFrame()
-    layout = pd.read_csv(LAYOUT_PATH)
-    sales = pd.read_csv(POS_SALES_PATH)
-    layout['Width'] = 1
-    layout['Height'] = 1
-    area = layout['Width'] * layout['Height']
-    zone_sales = sales.groupby('Zone')['Sales'].sum()
-    layout['Sales'] = layout['Zone'].map(zone_sales).fillna(0)
-    layout['Revenue_per_sqft'] = layout['Sales'] / area
-    return layout[['Zone', 'Revenue_per_sqft']]
+    revenue = get_zone_stats()['Revenue_per_sqft']
+    return pd.DataFrame({
+        'Zone': layout['Zone'],
+        'Revenue_per_sqft': layout['Zone'].map(revenue).fillna(0),
+    })
 
 
 if __name__ == '__main__':
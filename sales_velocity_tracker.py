@@ -1,15 +1,16 @@
 import pandas as pd
 import os
 
+from data_registry import load_dataset
+
 POS_SALES_PATH = os.path.join('data', 'pos_sales.csv')
 
 
 def identify_declines(window=30, drop_pct=0.2):
-    if not os.path.exists(POS_SALES_PATH):
-        return pd.DataFrame()
-    df = pd.read_csv(POS_SALES_PATH)
-    if 'Date' not in df.columns:
+    df = load_dataset(POS_SALES_PATH)
+    if df.empty or 'Date' not in df.columns:
         return pd.DataFrame()
+    df = df.copy()
     df['Date'] = pd.to_datetime(df['Date'])
     recent = df[df['Date'] >= df['Date'].max() - pd.Timedelta(days=window)]
     baseline = df[df['Date'] < df['Date'].max() - pd.Timedelta(days=window)]
@@ -1,14 +1,16 @@
 import pandas as pd
 import numpy as np
 import os
-from heatsight_tools import _load_final_insights_df
 
+from data_registry import load_dataset
+
+FINAL_INSIGHTS_PATH = os.path.join('insights', 'final_product_insights.csv')
 SEASONAL_PLAN_PATH = os.path.join('insights', 'seasonal_plan.csv')
 
 
 def generate_seasonal_plan(season: str = 'winter'):
     """Generate a simplistic seasonal relocation plan based on online views."""
-    df = _load_final_insights_df()
+    df = load_dataset(FINAL_INSIGHTS_PATH)
     if df.empty:
         print('Final insights unavailable. Seasonal plan not generated.')
         pd.DataFrame().to_csv(SEASONAL_PLAN_PATH, index=False)
@@ -2,104 +2,210 @@ import os
 import numpy as np
 import pandas as pd
 
-from heatsight_tools import (
-    _load_df,
-    _load_final_insights_df,
-    STORE_LAYOUT_PATH,
-    DATA_DIR,
-    premium_products,
-)
-from conversion_rate_analysis import calculate_zone_conversion_rates
-
-
-def _ensure_sales_by_zone():
-    """Aggregate sales by zone using sales_by_hour and store layout."""
-    sales_hour_path = os.path.join(DATA_DIR, "sales_by_hour.csv")
-    layout_df = _load_df(STORE_LAYOUT_PATH)
-    sales_df = _load_df(sales_hour_path)
-    if layout_df.empty:
-        return pd.Series(dtype=float)
-    if sales_df.empty:
-        zones = layout_df["Zone"].unique()
-        np.random.seed(0)
-        return pd.Series(np.random.randint(50, 200, len(zones)), index=zones)
-    prod_sales = sales_df.groupby("Product_ID")["Sales"].sum().reset_index()
-    zone_sales = pd.merge(layout_df, prod_sales, on="Product_ID", how="left").groupby("Zone")["Sales"].sum().fillna(0)
-    return zone_sales
+from data_registry import load_dataset
+from product_index import match_products
+from conversion_engine import get_conversion_table
+
+DATA_DIR = "data"
+STORE_LAYOUT_PATH = os.path.join(DATA_DIR, "store_layout.csv")
+FINAL_INSIGHTS_PATH = os.path.join("insights", "final_product_insights.csv")
+
+# List of premium products considered for special placement simulations
+premium_products = [
+    "Chocolate Gift Pack",
+    "Protein Shake",
+    "Luxury Shampoo",
+    "Dry Fruits",
+    "Premium Cookies",
+]
 
 
 def _ensure_dwell_time():
     path = os.path.join(DATA_DIR, "dwell_time.csv")
-    df = _load_df(path)
+    df = load_dataset(path)
     if df.empty:
         return pd.Series(dtype=float)
     return df.set_index("Zone")["Avg_Dwell_Time"]
 
 
-def run_what_if_placement(product_name: str, new_zone: str) -> dict:
-    """Simulate moving a product to a new zone and estimate sales uplift."""
-    insights = _load_final_insights_df()
-    if insights.empty:
-        return {"error": "Insights data unavailable"}
+def _first_per_zone(series: pd.Series) -> pd.Series:
+    return series[~series.index.duplicated()]
 
-    prod_match = insights[insights["Product_Name"].str.contains(product_name, case=False, na=False)]
-    if prod_match.empty:
-        return {"error": f"Product '{product_name}' not found"}
-    prod_row = prod_match.iloc[0]
-    current_zone = prod_row["Zone"]
 
-    visits_by_zone = insights.groupby("Zone")["Visits"].sum()
-    visits_current = visits_by_zone.get(current_zone, 0)
-    visits_new = visits_by_zone.get(new_zone, visits_by_zone.mean())
+def _zone_features(insights: pd.DataFrame) -> dict:
+    """Zone-level inputs shared by every what-if evaluation.
 
-    conversion = calculate_zone_conversion_rates()
+    Built once per request so that a batch of placements reuses the same
+    conversion, dwell and entrance lookups.
+    """
+    conversion = get_conversion_table("zone")
     if conversion.empty or "Zone" not in conversion.columns:
-        conv_dict = {}
+        conv = pd.Series(dtype=float)
     else:
-        conv_dict = dict(zip(conversion["Zone"], conversion["Conversion_Rate"]))
-    conv_current = conv_dict.get(current_zone, 0)
-    conv_new = conv_dict.get(new_zone, conv_current)
-
-    zone_sales = _ensure_sales_by_zone()
-    sales_current = zone_sales.get(current_zone, 0)
-    sales_new = zone_sales.get(new_zone, sales_current)
+        # dict(zip(...)) semantics: the last row per zone wins
+        conv = conversion.drop_duplicates("Zone", keep="last").set_index("Zone")["Conversion_Rate"]
+    dwell = _first_per_zone(_ensure_dwell_time())
+    categories = insights.drop_duplicates("Zone").set_index("Zone")["Zone_Category"].astype(str).str.lower()
+    return {
+        "visits": insights.groupby("Zone")["Visits"].sum(),
+        "conversion": conv,
+        "dwell": dwell,
+        "dwell_default": dwell.mean() if not dwell.empty else 1,
+        "category": categories,
+        "entrance": insights.sort_values("Visits", ascending=False)["Zone"].head(3).str.upper().tolist(),
+    }
 
-    dwell = _ensure_dwell_time()
-    dwell_current = dwell.get(current_zone, dwell.mean() if not dwell.empty else 1)
-    dwell_new = dwell.get(new_zone, dwell_current)
 
-    footfall_ratio = visits_new / max(visits_current, 1)
-    conv_ratio = conv_new / max(conv_current, 0.01)
-    dwell_ratio = dwell_new / max(dwell_current, 1)
+def _score_pairs(features: dict, product_names, current_zones, new_zones) -> pd.DataFrame:
+    """Vectorized uplift model for aligned arrays of products, source and target zones."""
+    current = pd.Index(current_zones)
+    new = pd.Index(new_zones)
+    visits, conv, dwell = features["visits"], features["conversion"], features["dwell"]
+
+    visits_current = visits.reindex(current).fillna(0).to_numpy(dtype=float)
+    visits_new = visits.reindex(new).fillna(visits.mean()).to_numpy(dtype=float)
+    conv_current = conv.reindex(current).fillna(0).to_numpy(dtype=float)
+    conv_new = conv.reindex(new).to_numpy(dtype=float)
+    conv_new = np.where(np.isnan(conv_new), conv_current, conv_new)
+    dwell_current = dwell.reindex(current).fillna(features["dwell_default"]).to_numpy(dtype=float)
+    dwell_new = dwell.reindex(new).to_numpy(dtype=float)
+    dwell_new = np.where(np.isnan(dwell_new), dwell_current, dwell_new)
+
+    footfall_ratio = visits_new / np.maximum(visits_current, 1)
+    conv_ratio = conv_new / np.maximum(conv_current, 0.01)
+    dwell_ratio = dwell_new / np.maximum(dwell_current, 1)
+
+    entrance = new.astype(str).str.upper().isin(features["entrance"])
+    cold = (features["category"].reindex(new) == "cold").to_numpy()
+    premium = pd.Index(product_names).isin(premium_products)
+
+    predicted_factor = (0.5 * footfall_ratio + 0.3 * conv_ratio + 0.2 * dwell_ratio) * np.where(entrance, 1.1, 1.0)
+    predicted_factor = predicted_factor * np.where(cold, 0.8, 1.0) * np.where(premium & entrance, 1.1, 1.0)
+
+    return pd.DataFrame({
+        "Product_Name": list(product_names),
+        "From_Zone": list(current_zones),
+        "To_Zone": list(new_zones),
+        "Visits_From": visits_current,
+        "Visits_To": visits_new,
+        "Conversion_From": conv_current,
+        "Conversion_To": conv_new,
+        "Dwell_From": dwell_current,
+        "Dwell_To": dwell_new,
+        "Footfall_Ratio": footfall_ratio,
+        "Entrance_Zone": entrance,
+        "Predicted_Factor": predicted_factor,
+        "Uplift_Pct": (predicted_factor - 1) * 100,
+    })
+
+
+def _match_product(insights: pd.DataFrame, product_name: str):
+    prod_match = match_products(insights, product_name)
+    return None if prod_match.empty else prod_match.iloc[0]
 
-    entrance_candidates = insights.sort_values("Visits", ascending=False)["Zone"].head(3).str.upper().tolist()
-    impulse_bonus = 1.1 if new_zone.upper() in entrance_candidates else 1.0
 
-    base_factor = 0.5 * footfall_ratio + 0.3 * conv_ratio + 0.2 * dwell_ratio
-    predicted_factor = base_factor * impulse_bonus
+def run_what_if_placement(product_name: str, new_zone: str) -> dict:
+    """Simulate moving a product to a new zone and estimate sales uplift."""
+    insights = load_dataset(FINAL_INSIGHTS_PATH)
+    if insights.empty:
+        return {"error": "Insights data unavailable"}
 
-    new_zone_cat = insights.loc[insights["Zone"] == new_zone, "Zone_Category"].astype(str).str.lower()
-    if not new_zone_cat.empty and new_zone_cat.iloc[0] == "cold":
-        predicted_factor *= 0.8
+    prod_row = _match_product(insights, product_name)
+    if prod_row is None:
+        return {"error": f"Product '{product_name}' not found"}
+    current_zone = prod_row["Zone"]
 
-    if prod_row["Product_Name"] in premium_products and new_zone.upper() in entrance_candidates:
-        predicted_factor *= 1.1
-    uplift_pct = (predicted_factor - 1) * 100
+    features = _zone_features(insights)
+    result = _score_pairs(features, [prod_row["Product_Name"]], [current_zone], [new_zone]).iloc[0]
+    visits_current = features["visits"].get(current_zone, 0)
+    visits_new = features["visits"].get(new_zone, features["visits"].mean())
 
     reasoning = (
         f"Moving from {current_zone} (visits {visits_current}) to {new_zone} "
-        f"(visits {visits_new}) changes visibility by {footfall_ratio:.2f}x. "
-        f"Conversion shifts from {conv_current:.2f} to {conv_new:.2f}. "
-        f"Dwell time changes from {dwell_current:.1f}s to {dwell_new:.1f}s."
+        f"(visits {visits_new}) changes visibility by {result['Footfall_Ratio']:.2f}x. "
+        f"Conversion shifts from {result['Conversion_From']:.2f} to {result['Conversion_To']:.2f}. "
+        f"Dwell time changes from {result['Dwell_From']:.1f}s to {result['Dwell_To']:.1f}s."
     )
-    if new_zone.upper() in entrance_candidates:
+    if result["Entrance_Zone"]:
         reasoning += " Entrance zone expected to boost impulse purchases."
 
     return {
         "product": prod_row["Product_Name"],
         "from": current_zone,
         "to": new_zone,
-        "predicted_sales_uplift": f"{uplift_pct:+.0f}%",
+        "predicted_sales_uplift": f"{result['Uplift_Pct']:+.0f}%",
         "reasoning": reasoning,
     }
 
+
+def run_what_if_batch(pairs=None, products=None, zones=None) -> pd.DataFrame:
+    """Evaluate many product -> zone moves in one pass.
+
+    Pass either ``pairs`` as ``(product_name, new_zone)`` tuples, or ``products``
+    and/or ``zones`` to evaluate their full grid (``products`` defaults to every
+    product in the insights, ``zones`` to every known zone). Product names match
+    the same way as ``run_what_if_placement``. Returns one row per evaluated pair
+    sorted by ``Uplift_Pct``; unmatched products are reported and skipped.
+    """
+    insights = load_dataset(FINAL_INSIGHTS_PATH)
+    if insights.empty:
+        return pd.DataFrame()
+
+    if pairs is None:
+        if products is None:
+            products = insights["Product_Name"].dropna().unique().tolist()
+        if zones is None:
+            zones = insights["Zone"].dropna().unique().tolist()
+        pairs = [(p, z) for p in products for z in zones]
+    if not pairs:
+        return pd.DataFrame()
+
+    # Each distinct name is matched once, however many zones it is paired with
+    resolved = {name: _match_product(insights, name) for name in dict.fromkeys(p for p, _ in pairs)}
+    missing = [name for name, row in resolved.items() if row is None]
+    if missing:
+        print(f"Warning: products not found, skipped: {', '.join(map(str, missing))}")
+
+    kept = [(resolved[p], z) for p, z in pairs if resolved[p] is not None]
+    if not kept:
+        return pd.DataFrame()
+    result = _score_pairs(
+        _zone_features(insights),
+        [row["Product_Name"] for row, _ in kept],
+        [row["Zone"] for row, _ in kept],
+        [z for _, z in kept],
+    )
+    result.insert(1, "Product_ID", [row.get("Product_ID") for row, _ in kept])
+    return result.sort_values("Uplift_Pct", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def run_what_if_monte_carlo(product_name: str, new_zone: str, n_trials: int = 1000, seed: int = 0,
+                            max_workers=None) -> dict:
+    """Stochastic counterpart of ``run_what_if_placement`` with confidence intervals."""
+    from monte_carlo_simulator import STORE_LAYOUT_PATH as LAYOUT_PATH, apply_moves, simulate_layouts
+
+    insights = load_dataset(FINAL_INSIGHTS_PATH)
+    if insights.empty:
+        return {"error": "Insights data unavailable"}
+    prod_row = _match_product(insights, product_name)
+    if prod_row is None:
+        return {"error": f"Product '{product_name}' not found"}
+
+    candidate = apply_moves(load_dataset(LAYOUT_PATH), {prod_row["Product_ID"]: new_zone})
+    result = simulate_layouts({"moved": candidate}, n_trials=n_trials, seed=seed, max_workers=max_workers,
+                              product_id=prod_row["Product_ID"])
+    if result.empty:
+        return {"error": "Movement or layout data unavailable"}
+    moved = result.set_index("Layout").loc["moved"]
+    # predicted_sales_uplift is the product's own, as in run_what_if_placement
+    return {
+        "product": prod_row["Product_Name"],
+        "from": prod_row["Zone"],
+        "to": new_zone,
+        "predicted_sales_uplift": f"{moved['Product_Uplift_Pct_Mean']:+.1f}%",
+        "uplift_interval": (moved["Product_Uplift_Pct_CI_Low"], moved["Product_Uplift_Pct_CI_High"]),
+        "store_sales_uplift": f"{moved['Uplift_Pct_Mean']:+.1f}%",
+        "store_uplift_interval": (moved["Uplift_Pct_CI_Low"], moved["Uplift_Pct_CI_High"]),
+        "conversion_interval": (moved["Conversion_CI_Low"], moved["Conversion_CI_High"]),
+        "trials": int(moved["Trials"]),
+    }
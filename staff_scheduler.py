@@ -16,6 +16,7 @@ def generate_staff_schedule():
             staff_count = np.random.randint(3, 7)
             schedule.append({'Day': day, 'Shift': shift, 'Zone': zone, 'Staff_Count': staff_count})
 
+    os.makedirs(os.path.dirname(SCHEDULE_PATH), exist_ok=True)
     pd.DataFrame(schedule).to_csv(SCHEDULE_PATH, index=False)
     print(f'Staff schedule saved to {SCHEDULE_PATH}')
 
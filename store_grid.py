@@ -0,0 +1,84 @@
+"""Store grid geometry shared by the heatmap renderers.
+
+Zone IDs are a spreadsheet-style row label followed by a 1-based column number
+(``A1``, ``J10``, ``AB120``). ``parse_zones`` turns a column of IDs into
+``(row, col)`` indices, parsing each distinct ID once, and ``zone_grid`` sums
+per-zone values into a ``rows x cols`` matrix with a single ``np.bincount``,
+so the grid can be any size.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+ZONE_PATTERN = re.compile(r"^\s*([A-Za-z]+)\s*(\d+)\s*$")
+# Smallest grid drawn, so a sparse log still shows the standard 10x10 store
+DEFAULT_SHAPE = (10, 10)
+
+
+def row_label(index):
+    """Spreadsheet-style row label: 0 -> A, 25 -> Z, 26 -> AA."""
+    label = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        label = chr(ord("A") + rem) + label
+    return label
+
+
+def row_index(label):
+    """Inverse of ``row_label``: A -> 0, Z -> 25, AA -> 26."""
+    index = 0
+    for ch in label.upper():
+        index = index * 26 + ord(ch) - ord("A") + 1
+    return index - 1
+
+
+def grid_zones(rows, cols):
+    return [f"{row_label(r)}{c}" for r in range(rows) for c in range(1, cols + 1)]
+
+
+def parse_zone(zone):
+    """``(row, col)`` indices of one zone ID, or ``None`` when it is not a grid zone."""
+    match = ZONE_PATTERN.match(str(zone))
+    if not match or int(match.group(2)) < 1:
+        return None
+    return row_index(match.group(1)), int(match.group(2)) - 1
+
+
+def parse_zones(zones):
+    """Row and column index arrays for a sequence of zone IDs; unparsable IDs get -1."""
+    codes, uniques = pd.factorize(pd.Series(zones, dtype=object), use_na_sentinel=True)
+    parsed = [parse_zone(z) for z in uniques]
+    unique_rows = np.array([p[0] if p else -1 for p in parsed] + [-1], dtype=np.int64)
+    unique_cols = np.array([p[1] if p else -1 for p in parsed] + [-1], dtype=np.int64)
+    # NA codes are -1 and pick the trailing sentinel
+    return unique_rows[codes], unique_cols[codes]
+
+
+def grid_shape(rows, cols, min_shape=DEFAULT_SHAPE):
+    """Grid dimensions covering every parsed index, at least ``min_shape``."""
+    n_rows = max(int(rows.max()) + 1 if len(rows) else 0, min_shape[0])
+    n_cols = max(int(cols.max()) + 1 if len(cols) else 0, min_shape[1])
+    return n_rows, n_cols
+
+
+def zone_grid(zones, values=None, shape=None, min_shape=DEFAULT_SHAPE):
+    """Sum ``values`` (default: 1 per entry) per zone into a grid.
+
+    Returns ``(grid, row_labels, col_labels)``. Zones that are not grid IDs or
+    fall outside an explicit ``shape`` are dropped. Integer values keep an
+    integer grid.
+    """
+    rows, cols = parse_zones(zones)
+    if values is None:
+        values = np.ones(len(rows), dtype=np.int64)
+    values = np.asarray(values)
+    n_rows, n_cols = shape or grid_shape(rows[rows >= 0], cols[cols >= 0], min_shape)
+
+    keep = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+    flat = rows[keep] * n_cols + cols[keep]
+    grid = np.bincount(flat, weights=values[keep], minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    if np.issubdtype(values.dtype, np.integer) or values.dtype == bool:
+        grid = np.rint(grid).astype(np.int64)
+    return grid, [row_label(r) for r in range(n_rows)], list(range(1, n_cols + 1))
@@ -0,0 +1,124 @@
+"""Synthetic store generator for benchmarks at configurable scale.
+
+``generate_synthetic_store`` writes the same CSVs as ``store_layout.py``,
+``movements.py`` and ``online_data.py`` (plus POS, hourly sales, dwell and
+restock data) for an arbitrary grid, SKU count, customer count and number of
+days. Everything is drawn with NumPy from one seed, so a given scale always
+produces the same store.
+"""
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from store_grid import grid_zones
+
+BASE_PRODUCT_NAMES = [
+    "Coca Cola 2L", "Lays Chips Family", "Parle-G Biscuits Pack", "Maggi Noodles 6-Pack", "Tata Salt 1kg",
+    "Colgate Toothpaste 150g", "Amul Butter 500g", "Nescafe Classic Coffee 100g", "Sugar 1kg", "Rice Basmati 5kg",
+    "Fresh Apples 1kg", "Bananas Dozen", "Amul Milk 1L Pouch", "Eggs 6-pack", "Bread Loaf Brown",
+    "Dove Shampoo 180ml", "Dettol Antiseptic Liquid", "Lifebuoy Total Soap", "Nivea Body Lotion", "Oral-B Toothbrush",
+    "Duracell AA Batteries 4-pack", "Philips LED Bulb", "Bajaj Mixer Grinder", "Smart LED TV 32inch",
+    "Bluetooth Speaker JBL", "Headphones Boat", "Power Bank MI", "USB Cable Charger", "Laptop Bag",
+    "Men's T-Shirt Basic", "Women's Jeans Denim", "Sport Shoes Adidas", "Formal Shirt Men", "Barbie Doll",
+    "Lego Classic Box", "Notebook A4 200 pages", "Pedigree Dog Food 1kg", "Engine Oil 1L", "Paracetamol Tablets",
+    "Band-Aid Strips",
+]
+BASE_START_TIME = datetime(2025, 7, 3, 9, 0, 0)
+
+
+def generate_synthetic_store(root=".", rows=10, cols=10, n_products=100, n_customers=200, days=1,
+                             min_moves=10, max_moves=30, seed=0):
+    """Write a synthetic store under ``root/data`` and return the row counts written."""
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(root, "data")
+    # Same folder layout as the repo so every pipeline can write its outputs
+    for folder in ("data", "insights", "agent_memory", "heatmap"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    zones = np.array(grid_zones(rows, cols), dtype=object)
+    product_ids = np.array([f"P{str(i + 1).zfill(max(3, len(str(n_products))))}" for i in range(n_products)], dtype=object)
+    base = np.array(BASE_PRODUCT_NAMES, dtype=object)
+    names = base[np.arange(n_products) % len(base)]
+    repeat = np.arange(n_products) // len(base)
+    names = np.where(repeat > 0, names + " #" + (repeat + 1).astype(str).astype(object), names)
+    product_zone = zones[rng.permutation(np.arange(n_products) % len(zones))]
+
+    layout = pd.DataFrame({"Zone": product_zone, "Product_ID": product_ids, "Product_Name": names})
+    layout.to_csv(os.path.join(data_dir, "store_layout.csv"), index=False)
+
+    online_views = np.where(rng.random(n_products) < 0.7,
+                            rng.integers(500, 2001, n_products), rng.integers(2500, 8001, n_products))
+    pd.DataFrame({"Product_ID": product_ids, "Product_Name": names, "Online_Views": online_views}).to_csv(
+        os.path.join(data_dir, "online_product_performance.csv"), index=False)
+
+    # One trip per customer per day; zone popularity is skewed so hot/cold zones exist
+    trips = n_customers * days
+    moves = rng.integers(min_moves, max_moves + 1, trips)
+    total = int(moves.sum())
+    trip = np.repeat(np.arange(trips), moves)
+    popularity = rng.gamma(2.0, 1.0, len(zones))
+    visit_zone = rng.choice(len(zones), size=total, p=popularity / popularity.sum())
+    day = trip // n_customers
+    start = (day * 86400 + rng.integers(0, 180 * 60, trips)[trip]).astype(np.int64)
+    # Seconds since the trip started: running sum of the time spent in earlier zones
+    step = rng.integers(15, 91, total)
+    before = np.cumsum(step) - step
+    first = np.concatenate([[0], np.cumsum(moves)[:-1]])
+    elapsed = before - np.repeat(before[first], moves)
+    timestamps = pd.Timestamp(BASE_START_TIME) + pd.to_timedelta(start + elapsed, unit="s")
+    customer_ids = pd.Series(trip % n_customers + 1).astype(str).str.zfill(max(4, len(str(n_customers))))
+    movements = pd.DataFrame({
+        "Customer_ID": "C" + customer_ids,
+        "Timestamp": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "Zone": zones[visit_zone],
+    })
+    movements.to_csv(os.path.join(data_dir, "movements.csv"), index=False)
+
+    dates = pd.date_range(BASE_START_TIME.date(), periods=max(days, 1), freq="D").strftime("%Y-%m-%d")
+    pos = pd.DataFrame({
+        "Zone": np.tile(product_zone, len(dates)),
+        "Product_ID": np.tile(product_ids, len(dates)),
+        "Date": np.repeat(dates, n_products),
+        "Sales": rng.integers(0, 20, n_products * len(dates)),
+    })
+    pos.to_csv(os.path.join(data_dir, "pos_sales.csv"), index=False)
+
+    hours = np.arange(9, 22)
+    pd.DataFrame({
+        "Product_ID": np.repeat(product_ids, len(hours)),
+        "Hour": np.tile([f"{h:02d}" for h in hours], n_products),
+        "Sales": rng.integers(0, 10, n_products * len(hours)),
+    }).to_csv(os.path.join(data_dir, "sales_by_hour.csv"), index=False)
+
+    pd.DataFrame({"Zone": zones, "Avg_Dwell_Time": rng.integers(15, 90, len(zones))}).to_csv(
+        os.path.join(data_dir, "dwell_time.csv"), index=False)
+
+    restock_days = rng.integers(0, 30, n_products)
+    pd.DataFrame({
+        "Product_ID": product_ids,
+        "Timestamp": (pd.Timestamp(BASE_START_TIME) - pd.to_timedelta(restock_days, unit="D")).strftime("%Y-%m-%dT%H:%M:%S"),
+    }).to_csv(os.path.join(data_dir, "restock_log.csv"), index=False)
+
+    return {"zones": len(zones), "products": n_products, "movements": total, "pos_rows": len(pos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic store dataset.")
+    parser.add_argument("--root", default="synthetic_store", help="Folder to write data/ into")
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate_synthetic_store(args.root, args.rows, args.cols, args.products,
+                                      args.customers, args.days, seed=args.seed)
+    print(f"Generated synthetic store in {os.path.join(args.root, 'data')}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""In-process metrics for the ShelfSense agent tools.
+
+``instrument_tool`` wraps a LangChain tool so that every call records its
+latency in a histogram, the CSV bytes and cache hits/misses it caused in the
+data registry, the size of the returned text and whether it raised. The
+registry is shared by every Streamlit session in the process; ``metrics_frame``
+feeds the dashboard and ``export_metrics`` writes JSON and Prometheus text
+files.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data_registry import track_reads
+
+TOOL_METRICS_JSON_PATH = os.path.join("insights", "tool_metrics.json")
+TOOL_METRICS_PROM_PATH = os.path.join("insights", "tool_metrics.prom")
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf]
+
+_METRICS = {}
+_LOCK = threading.Lock()
+
+
+def _new_entry():
+    return {
+        "calls": 0,
+        "errors": 0,
+        "latency_sum": 0.0,
+        "latency_max": 0.0,
+        "latency_buckets": [0] * len(LATENCY_BUCKETS),
+        "bytes_read": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "result_chars": 0,
+    }
+
+
+def record_call(name, duration, reads, result_chars, error=False):
+    """Add one tool call to the registry."""
+    with _LOCK:
+        entry = _METRICS.setdefault(name, _new_entry())
+        entry["calls"] += 1
+        entry["errors"] += int(error)
+        entry["latency_sum"] += duration
+        entry["latency_max"] = max(entry["latency_max"], duration)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                entry["latency_buckets"][i] += 1
+                break
+        entry["bytes_read"] += reads["bytes_read"]
+        entry["cache_hits"] += reads["hits"]
+        entry["cache_misses"] += reads["misses"]
+        entry["result_chars"] += result_chars
+
+
+def instrument_tool(tool):
+    """Wrap ``tool.func`` with metrics collection; already instrumented tools are left as is."""
+    if getattr(tool.func, "_instrumented", False):
+        return tool
+    original = tool.func
+    name = tool.name
+
+    def wrapped(*args, **kwargs):
+        start = time.perf_counter()
+        with track_reads() as reads:
+            try:
+                result = original(*args, **kwargs)
+            except Exception:
+                record_call(name, time.perf_counter() - start, reads, 0, error=True)
+                raise
+        duration = time.perf_counter() - start
+        record_call(name, duration, reads, len(str(result)) if result is not None else 0)
+        return result
+
+    wrapped._instrumented = True
+    wrapped.__wrapped__ = original
+    tool.func = wrapped
+    return tool
+
+
+def snapshot():
+    """Deep copy of the registry keyed by tool name."""
+    with _LOCK:
+        return {name: {k: (list(v) if isinstance(v, list) else v) for k, v in entry.items()}
+                for name, entry in _METRICS.items()}
+
+
+def reset_metrics():
+    with _LOCK:
+        _METRICS.clear()
+
+
+def _quantile(buckets, q):
+    """Upper bucket bound containing quantile ``q`` (histogram estimate)."""
+    total = sum(buckets)
+    if total == 0:
+        return math.nan
+    running = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        running += count
+        if running >= q * total:
+            return bound
+    return math.inf
+
+
+def metrics_frame():
+    """One row per tool, slowest mean latency first."""
+    rows = []
+    for name, e in snapshot().items():
+        calls = max(e["calls"], 1)
+        rows.append({
+            "Tool": name,
+            "Calls": e["calls"],
+            "Errors": e["errors"],
+            "Mean_ms": e["latency_sum"] / calls * 1000,
+            "P50_ms_le": _quantile(e["latency_buckets"], 0.5) * 1000,
+            "P95_ms_le": _quantile(e["latency_buckets"], 0.95) * 1000,
+            "Max_ms": e["latency_max"] * 1000,
+            "Total_s": e["latency_sum"],
+            "Bytes_Read": e["bytes_read"],
+            "Cache_Hits": e["cache_hits"],
+            "Cache_Misses": e["cache_misses"],
+            "Mean_Result_Chars": e["result_chars"] / calls,
+        })
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values("Mean_ms", ascending=False).reset_index(drop=True)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus():
+    """Registry in the Prometheus text exposition format."""
+    metrics = snapshot()
+    lines = [
+        "# HELP shelfsense_tool_latency_seconds Tool call latency.",
+        "# TYPE shelfsense_tool_latency_seconds histogram",
+    ]
+    for name, e in metrics.items():
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, e["latency_buckets"]):
+            cumulative += count
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(f'shelfsense_tool_latency_seconds_bucket{{tool="{_label(name)}",le="{le}"}} {cumulative}')
+        lines.append(f'shelfsense_tool_latency_seconds_sum{{tool="{_label(name)}"}} {e["latency_sum"]}')
+        lines.append(f'shelfsense_tool_latency_seconds_count{{tool="{_label(name)}"}} {e["calls"]}')
+    counters = [
+        ("shelfsense_tool_errors_total", "errors", "Tool calls that raised."),
+        ("shelfsense_tool_bytes_read_total", "bytes_read", "Dataset bytes read from disk by the tool."),
+        ("shelfsense_tool_cache_hits_total", "cache_hits", "Data registry cache hits."),
+        ("shelfsense_tool_cache_misses_total", "cache_misses", "Data registry cache misses."),
+        ("shelfsense_tool_result_chars_total", "result_chars", "Characters returned to the agent."),
+    ]
+    for metric, key, help_text in counters:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, e in metrics.items():
+            lines.append(f'{metric}{{tool="{_label(name)}"}} {e[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(json_path=TOOL_METRICS_JSON_PATH, prom_path=TOOL_METRICS_PROM_PATH):
+    """Write the registry as JSON and Prometheus text; returns the two paths."""
+    for path in (json_path, prom_path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {
+        "generated_at": time.time(),
+        "latency_buckets": [b if not math.isinf(b) else "+Inf" for b in LATENCY_BUCKETS],
+        "tools": snapshot(),
+    }
+    with open(json_path, "w") as f:
+        json.dump(data, f, indent=4)
+    with open(prom_path, "w") as f:
+        f.write(to_prometheus())
+    return json_path, prom_path
@@ -0,0 +1,269 @@
+"""Zone x hour x day visit cube for time-windowed heat queries.
+
+Movement events are counted per (day, hour of day, zone) in one chunked pass
+over the log and stored as a 2-D prefix sum over days and hours, so the visits
+of every zone in any window ("18:00-20:00 over the last 7 days") come from four
+array lookups instead of a scan of the events. ``hourly_customer_traffic.csv``
+has no dates; its visits form a separate hour x zone layer that is added to
+windows without a date range.
+
+The cube is saved to ``insights/traffic_cube.npz`` (in the active store's
+folder) together with the source files' signatures and rebuilt when either
+file changes.
+"""
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import columnar_path, columnar_signature
+from data_registry import file_signature, load_dataset, record_read, resolve_path, store_file
+from movement_stream import MOVEMENTS_PATH, STREAM_CHUNKSIZE
+
+HOURLY_TRAFFIC_PATH = os.path.join("data", "hourly_customer_traffic.csv")
+TRAFFIC_CUBE_PATH = os.path.join("insights", "traffic_cube.npz")
+HOURS = 24
+# Zone codes are packed below this multiplier when counting (day, hour, zone) keys
+_ZONE_SPACE = 1 << 24
+_EPOCH = date(1970, 1, 1)
+
+_CUBE = {}
+_LOCK = threading.Lock()
+
+
+def _movement_chunks(path, chunksize):
+    """Timestamp and Zone frames of the log, from its typed Parquet copy when that is fresh."""
+    if columnar_signature(path, os.stat(path).st_mtime_ns) is not None:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            pq = None
+        if pq is not None:
+            parquet = pq.ParquetFile(columnar_path(path))
+            for batch in parquet.iter_batches(batch_size=chunksize, columns=["Timestamp", "Zone"]):
+                yield batch.to_pandas()
+            return
+    yield from pd.read_csv(path, usecols=["Timestamp", "Zone"], chunksize=chunksize, dtype={"Zone": str})
+
+
+def _count_movements(path, chunksize=STREAM_CHUNKSIZE):
+    """Visit counts keyed by ``(day, hour, zone)`` plus the zone vocabulary."""
+    zone_codes = {}
+    key_parts, count_parts = [], []
+    for chunk in _movement_chunks(path, chunksize):
+        ts = pd.to_datetime(chunk["Timestamp"], errors="coerce")
+        ok = ts.notna().to_numpy() & chunk["Zone"].notna().to_numpy()
+        if not ok.any():
+            continue
+        zones = pd.Categorical(chunk["Zone"].to_numpy()[ok])
+        for z in zones.categories:
+            zone_codes.setdefault(z, len(zone_codes))
+        remap = np.array([zone_codes[z] for z in zones.categories], dtype=np.int64)
+
+        stamps = ts.to_numpy()[ok]
+        day_hour = stamps.astype("datetime64[h]").astype(np.int64)
+        keys, counts = np.unique(day_hour * _ZONE_SPACE + remap[zones.codes], return_counts=True)
+        key_parts.append(keys)
+        count_parts.append(counts)
+    if not key_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), []
+    keys, inverse = np.unique(np.concatenate(key_parts), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(count_parts)).astype(np.int64)
+    return keys, counts, list(zone_codes)
+
+
+def _load_hourly_traffic(path):
+    """``(zone, hour, visits)`` rows of the undated hourly traffic file."""
+    if file_signature(path) is None:
+        return pd.DataFrame(columns=["Zone", "Hour", "Visits"])
+    try:
+        df = load_dataset(path)
+    except (pd.errors.EmptyDataError, ValueError) as e:
+        print(f"Warning: could not read {path}: {e}")
+        return pd.DataFrame(columns=["Zone", "Hour", "Visits"])
+    if not {"Zone", "Hour", "Visits"}.issubset(df.columns):
+        print(f"Warning: {path} needs Zone, Hour and Visits columns; ignoring it.")
+        return pd.DataFrame(columns=["Zone", "Hour", "Visits"])
+    df = pd.DataFrame({
+        "Zone": df["Zone"].astype(str),
+        "Hour": pd.to_numeric(df["Hour"], errors="coerce"),
+        "Visits": pd.to_numeric(df["Visits"], errors="coerce"),
+    }).dropna()
+    return df[(df["Hour"] >= 0) & (df["Hour"] < HOURS)]
+
+
+def _prefix(counts, axes):
+    """Cumulative sums along ``axes`` with a leading zero row on each of them."""
+    prefix = counts
+    for axis in axes:
+        prefix = np.cumsum(prefix, axis=axis, dtype=counts.dtype)
+        pad = [(0, 0)] * prefix.ndim
+        pad[axis] = (1, 0)
+        prefix = np.pad(prefix, pad)
+    return prefix
+
+
+def build_traffic_cube(movements_path=MOVEMENTS_PATH, traffic_path=HOURLY_TRAFFIC_PATH):
+    """Count visits per (day, hour, zone) and return the prefix-summed cube.
+
+    ``prefix[d, h, z]`` is the number of visits to zone ``z`` on days
+    ``< d`` (counted from ``first_day``) during hours ``< h``; ``undated`` is the
+    same over hours only for the undated hourly traffic file.
+    """
+    keys, counts, zones = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), []
+    if file_signature(movements_path) is not None:
+        try:
+            keys, counts, zones = _count_movements(file_signature(movements_path)[0])
+        except (pd.errors.EmptyDataError, ValueError) as e:
+            print(f"Warning: could not read {movements_path}: {e}")
+    traffic = _load_hourly_traffic(traffic_path)
+
+    names = sorted(set(zones) | set(traffic["Zone"]))
+    position = {z: i for i, z in enumerate(names)}
+    n_zones = len(names)
+
+    day_hour, zone = keys // _ZONE_SPACE, keys % _ZONE_SPACE
+    zone = np.array([position[z] for z in zones], dtype=np.int64)[zone] if len(keys) else zone
+    first_day = int(day_hour.min() // HOURS) if len(keys) else 0
+    n_days = int(day_hour.max() // HOURS) - first_day + 1 if len(keys) else 0
+    total = int(counts.sum())
+    dtype = np.int32 if total < np.iinfo(np.int32).max else np.int64
+
+    cube = np.zeros((n_days, HOURS, n_zones), dtype=dtype)
+    # Keys are unique, so every cell is assigned at most once
+    cube[day_hour // HOURS - first_day, day_hour % HOURS, zone] = counts
+
+    undated = np.zeros((HOURS, n_zones), dtype=np.int64)
+    if not traffic.empty:
+        np.add.at(undated, (traffic["Hour"].to_numpy(dtype=np.int64),
+                            traffic["Zone"].map(position).to_numpy(dtype=np.int64)),
+                  traffic["Visits"].to_numpy(dtype=np.int64))
+
+    return {
+        "zones": np.array(names, dtype=str),
+        "first_day": np.int64(first_day),
+        "prefix": _prefix(cube, (0, 1)),
+        "undated": _prefix(undated, (0,)),
+    }
+
+
+def _source_signature(movements_path, traffic_path):
+    parts = []
+    for path in (movements_path, traffic_path):
+        sig = file_signature(path)
+        parts.extend([sig[1], sig[2]] if sig is not None else [-1, -1])
+    return np.array(parts, dtype=np.int64)
+
+
+def save_traffic_cube(cube, source, path=TRAFFIC_CUBE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp_path, source=source, **cube)
+    os.replace(tmp_path, path)
+
+
+def _load_saved(source, path=TRAFFIC_CUBE_PATH):
+    try:
+        with np.load(path) as data:
+            if not np.array_equal(data["source"], source):
+                return None
+            return {k: data[k] for k in ("zones", "first_day", "prefix", "undated")}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def get_traffic_cube(movements_path=MOVEMENTS_PATH, traffic_path=HOURLY_TRAFFIC_PATH):
+    """Return the cube, rebuilding and re-saving it when a source file changed."""
+    source = _source_signature(movements_path, traffic_path)
+    # Resolved paths, so every store keeps its own cube
+    key = (resolve_path(movements_path), resolve_path(traffic_path))
+    with _LOCK:
+        cached = _CUBE.get(key)
+        if cached is not None and np.array_equal(cached[0], source):
+            record_read(True)
+            return cached[1]
+        record_read(False)
+        cube = _load_saved(source, store_file(TRAFFIC_CUBE_PATH))
+        if cube is None:
+            cube = build_traffic_cube(movements_path, traffic_path)
+            try:
+                save_traffic_cube(cube, source, store_file(TRAFFIC_CUBE_PATH))
+            except OSError as e:
+                print(f"Warning: could not save traffic cube: {e}")
+        cube["zone_names"] = [str(z) for z in cube["zones"]]
+        _CUBE[key] = (source, cube)
+        return cube
+
+
+def cube_dates(cube=None):
+    """First and last date covered by the movement log, or ``None`` when it is empty."""
+    cube = get_traffic_cube() if cube is None else cube
+    n_days = cube["prefix"].shape[0] - 1
+    if n_days <= 0:
+        return None
+    first = _EPOCH + timedelta(days=int(cube["first_day"]))
+    return first, first + timedelta(days=n_days - 1)
+
+
+def _day_offset(cube, day):
+    return (pd.Timestamp(day).date() - _EPOCH).days - int(cube["first_day"])
+
+
+def _hour_slice(prefix, h0, h1):
+    """Sum over hours ``[h0, h1)`` along axis -2; ``h0 > h1`` wraps past midnight."""
+    if h0 <= h1:
+        return prefix[..., h1, :] - prefix[..., h0, :]
+    return prefix[..., HOURS, :] - prefix[..., h0, :] + prefix[..., h1, :]
+
+
+def zone_traffic(start_hour=0, end_hour=24, start_date=None, end_date=None, include_undated=None, cube=None):
+    """Visits per zone during hours ``[start_hour, end_hour)`` of days ``start_date..end_date``.
+
+    Dates are inclusive and default to the whole log. ``include_undated``
+    (default: only when no date is given) adds the undated hourly traffic
+    file. Returns a Series indexed by zone, named ``Visits``.
+    """
+    cube = get_traffic_cube() if cube is None else cube
+    if not (0 <= start_hour <= HOURS and 0 <= end_hour <= HOURS):
+        raise ValueError(f"hours must be between 0 and {HOURS}")
+    prefix = cube["prefix"]
+    n_days = prefix.shape[0] - 1
+    d0 = 0 if start_date is None else min(max(_day_offset(cube, start_date), 0), n_days)
+    d1 = n_days if end_date is None else min(max(_day_offset(cube, end_date) + 1, d0), n_days)
+
+    by_hour = _hour_slice(prefix[[d0, d1]].astype(np.int64), start_hour, end_hour)
+    visits = by_hour[1] - by_hour[0]
+    if include_undated is None:
+        include_undated = start_date is None and end_date is None
+    if include_undated:
+        visits = visits + _hour_slice(cube["undated"], start_hour, end_hour)
+    return pd.Series(visits, index=pd.Index(cube["zone_names"], name="Zone"), name="Visits")
+
+
+def visits_by_hour(cube=None):
+    """``(24, zones)`` movement-log visits per hour of day, summed over every recorded day."""
+    cube = get_traffic_cube() if cube is None else cube
+    return np.diff(cube["prefix"][-1].astype(np.int64), axis=0)
+
+
+def visits_by_day(cube=None):
+    """``(dates, (days, zones) visits)`` for every day covered by the movement log."""
+    cube = get_traffic_cube() if cube is None else cube
+    visits = np.diff(cube["prefix"][:, HOURS, :].astype(np.int64), axis=0)
+    first = _EPOCH + timedelta(days=int(cube["first_day"]))
+    return [first + timedelta(days=d) for d in range(visits.shape[0])], visits
+
+
+def last_days_window(days, cube=None):
+    """``(start_date, end_date)`` of the last ``days`` days in the log, e.g. 7 for "last week"."""
+    bounds = cube_dates(cube)
+    if bounds is None:
+        return None, None
+    return max(bounds[1] - timedelta(days=days - 1), bounds[0]), bounds[1]
+
+
+if __name__ == "__main__":
+    print(f"Cube covers {cube_dates()}")
+    print(zone_traffic(18, 20).sort_values(ascending=False).head(10))
@@ -0,0 +1,122 @@
+"""Per-zone aggregate table shared by every zone-level metric.
+
+``get_zone_stats`` returns one row per zone with footfall, unique customers,
+mean dwell, sales, conversion rate and revenue per sqft. The table is kept in
+memory and maintained per source: when only POS sales change, the movement
+aggregates are reused, and vice versa, so a refresh costs one pass over the
+changed file and every later lookup is O(zones). Movement aggregates come from
+``movement_stream`` so the log itself is never held in memory.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from conversion_engine import conversion_rates
+from data_registry import file_signature, load_dataset, record_read
+from movement_stream import empty_movement_stats, get_movement_stats
+
+MOVEMENTS_PATH = os.path.join("data", "movements.csv")
+POS_SALES_PATH = os.path.join("data", "pos_sales.csv")
+STORE_LAYOUT_PATH = os.path.join("data", "store_layout.csv")
+
+ZONE_STATS_COLUMNS = [
+    "Footfall",
+    "Unique_Customers",
+    "Mean_Dwell",
+    "Sales",
+    "Conversion_Rate",
+    "Revenue_per_sqft",
+]
+
+_PARTIALS = {}
+_LOCK = threading.Lock()
+
+
+def _movement_aggregates(stats: dict) -> pd.DataFrame:
+    """Footfall, unique customers and mean dwell (seconds to next event) per zone."""
+    agg = pd.DataFrame({
+        "Footfall": stats["footfall"],
+        "Unique_Customers": stats["unique_customers"],
+        "Mean_Dwell": stats["mean_dwell"],
+    }, index=pd.Index(stats["zones"], name="Zone", dtype=object))
+    agg = agg[agg["Footfall"] > 0]
+    agg.attrs["movements_read"] = stats.get("read")
+    return agg
+
+
+def _sales_aggregates(sales_df: pd.DataFrame) -> pd.Series:
+    if sales_df.empty or "Zone" not in sales_df.columns:
+        return pd.Series(dtype=float, name="Sales")
+    sales = sales_df.groupby(sales_df["Zone"].astype(str), sort=False)["Sales"].sum()
+    sales.name = "Sales"
+    return sales
+
+
+def _layout_area(layout_df: pd.DataFrame) -> pd.Series:
+    """Shelf area per zone; zones default to 1 sqft when the layout has no dimensions."""
+    if layout_df.empty or "Zone" not in layout_df.columns:
+        return pd.Series(dtype=float, name="Area")
+    width = layout_df["Width"] if "Width" in layout_df.columns else 1
+    height = layout_df["Height"] if "Height" in layout_df.columns else 1
+    area = pd.Series(width * height, index=layout_df.index, dtype=float)
+    area = area.groupby(layout_df["Zone"].astype(str), sort=False).first()
+    area.name = "Area"
+    return area
+
+
+# The movement log is reduced by the streaming engine instead of being loaded
+_SOURCES = {
+    "movements": (MOVEMENTS_PATH, get_movement_stats, _movement_aggregates),
+    "sales": (POS_SALES_PATH, load_dataset, _sales_aggregates),
+    "layout": (STORE_LAYOUT_PATH, load_dataset, _layout_area),
+}
+_EMPTY = {
+    get_movement_stats: empty_movement_stats,
+    load_dataset: pd.DataFrame,
+}
+
+
+def _partial(name):
+    path, loader, builder = _SOURCES[name]
+    sig = file_signature(path)
+    cached = _PARTIALS.get(name)
+    if cached is not None and cached[0] == sig:
+        record_read(True)
+        return cached[1], False
+    result = builder(loader(path) if sig is not None else _EMPTY[loader]())
+    _PARTIALS[name] = (sig, result)
+    return result, True
+
+
+def get_zone_stats() -> pd.DataFrame:
+    """Return the zone aggregate table indexed by ``Zone``.
+
+    ``attrs["movements_read"]`` is the part of the movement log the footfall
+    was counted over (see ``movement_stream.read_log_blocks``). The frame is
+    shared between callers; copy it before mutating.
+    """
+    with _LOCK:
+        movement_agg, m_changed = _partial("movements")
+        sales, s_changed = _partial("sales")
+        area, l_changed = _partial("layout")
+        cached = _PARTIALS.get("table")
+        if cached is not None and not (m_changed or s_changed or l_changed):
+            return cached[1]
+
+        zones = pd.Index(area.index).append(movement_agg.index).append(sales.index).unique()
+        stats = movement_agg.reindex(zones)
+        stats["Footfall"] = stats["Footfall"].fillna(0).astype(int)
+        stats["Unique_Customers"] = stats["Unique_Customers"].fillna(0).astype(int)
+        stats["Sales"] = sales.reindex(zones, fill_value=0)
+        stats["Conversion_Rate"] = conversion_rates(stats["Sales"], stats["Footfall"])
+        stats["Revenue_per_sqft"] = stats["Sales"] / area.reindex(zones).fillna(1).replace(0, 1)
+        stats.index.name = "Zone"
+        stats = stats[ZONE_STATS_COLUMNS]
+        stats.attrs["movements_read"] = movement_agg.attrs.get("movements_read")
+        _PARTIALS["table"] = (None, stats)
+        return stats
+
+
+if __name__ == "__main__":
+    print(get_zone_stats())